@@ -0,0 +1,111 @@
+# achievement.py
+# 학기 성적/성취도 엔진
+# - midterm_scores, final_scores 를 subject_weights 비율로 합산해 semester_scores 에 저장
+# - 한 번의 INSERT ... SELECT ... ON CONFLICT DO UPDATE 로 범위(학년/학생/과목) 단위 갱신
+#
+# 환산 점수 = (중간*중간비율 + 기말*기말비율) / (입력된 시험들의 비율 합)
+#  - 수행평가 점수 테이블이 아직 없으므로 지필 비율만으로 100점 환산
+#  - 한 시험만 입력된 경우에도 입력된 시험 기준으로 환산 (미입력 시험을 0점 처리하지 않음)
+# 성취도: 90↑ A, 80↑ B, 70↑ C, 60↑ D, 그 외 E
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+# 비율 설정이 없을 때 기본값(중간:기말:수행)
+DEFAULT_RATIOS = (50, 50, 0)
+
+ACHIEVEMENT_CUTS = [(90, "A"), (80, "B"), (70, "C"), (60, "D")]
+
+
+def _achievement_case(col: str) -> str:
+    whens = " ".join(f"WHEN {col} >= {cut} THEN '{lv}'" for cut, lv in ACHIEVEMENT_CUTS)
+    return f"CASE WHEN {col} IS NULL THEN NULL {whens} ELSE 'E' END"
+
+
+def achievement_of(score: Optional[float]) -> Optional[str]:
+    if score is None:
+        return None
+    for cut, lv in ACHIEVEMENT_CUTS:
+        if score >= cut:
+            return lv
+    return "E"
+
+
+def refresh_semester_scores(
+    db: Session,
+    year: int,
+    term: int,
+    student_ids: Optional[Iterable[int]] = None,
+    subject_ids: Optional[Iterable[int]] = None,
+    grade: Optional[int] = None,
+) -> int:
+    """
+    (year, term) 범위의 학기 성적을 다시 계산해 semester_scores 에 업서트
+    - student_ids / subject_ids / grade 로 범위를 좁히면 증분 갱신
+    - 커밋은 호출자가 수행 (성적 업서트와 같은 트랜잭션)
+    - 반환: 갱신 대상 행 수
+    """
+    conds = ["year = :year", "term = :term"]
+    params: dict = {"year": year, "term": term}
+    binds = []
+    if student_ids is not None:
+        conds.append("student_id IN :student_ids")
+        params["student_ids"] = list(set(student_ids))
+        binds.append(bindparam("student_ids", expanding=True))
+    if subject_ids is not None:
+        conds.append("subject_id IN :subject_ids")
+        params["subject_ids"] = list(set(subject_ids))
+        binds.append(bindparam("subject_ids", expanding=True))
+    if grade is not None:
+        # 그 학년도의 학년 (전환 전 기록이 있으면 student_years, 없으면 현재 학년)
+        conds.append("student_id IN (SELECT s.id FROM students s"
+                     " LEFT JOIN student_years sy ON sy.student_id = s.id AND sy.school_year = :year"
+                     " WHERE COALESCE(sy.grade, s.grade) = :grade)")
+        params["grade"] = grade
+    where = " AND ".join(conds)
+
+    mr = f"COALESCE(w.midterm_ratio, {DEFAULT_RATIOS[0]})"
+    fr = f"COALESCE(w.final_ratio, {DEFAULT_RATIOS[1]})"
+    sql = f"""
+        INSERT INTO semester_scores
+            (student_id, subject_id, year, term, midterm, final, score, achievement, updated_at)
+        SELECT student_id, subject_id, year, term, midterm, final, score,
+               {_achievement_case("score")}, CURRENT_TIMESTAMP
+        FROM (
+            SELECT k.student_id, k.subject_id, k.year, k.term,
+                   m.score AS midterm, f.score AS final,
+                   ROUND(
+                       (COALESCE(m.score * {mr}, 0) + COALESCE(f.score * {fr}, 0)) * 1.0
+                       / NULLIF((CASE WHEN m.score IS NULL THEN 0 ELSE {mr} END)
+                              + (CASE WHEN f.score IS NULL THEN 0 ELSE {fr} END), 0),
+                       2) AS score
+            FROM (
+                SELECT student_id, subject_id, year, term FROM midterm_scores WHERE {where}
+                UNION
+                SELECT student_id, subject_id, year, term FROM final_scores WHERE {where}
+            ) AS k
+            LEFT JOIN midterm_scores m
+                   ON m.student_id = k.student_id AND m.subject_id = k.subject_id
+                  AND m.year = k.year AND m.term = k.term
+            LEFT JOIN final_scores f
+                   ON f.student_id = k.student_id AND f.subject_id = k.subject_id
+                  AND f.year = k.year AND f.term = k.term
+            LEFT JOIN subject_weights w
+                   ON w.subject_id = k.subject_id AND w.year = k.year AND w.term = k.term
+        ) AS calc
+        WHERE true
+        ON CONFLICT (student_id, subject_id, year, term) DO UPDATE SET
+            midterm = excluded.midterm,
+            final = excluded.final,
+            score = excluded.score,
+            achievement = excluded.achievement,
+            updated_at = excluded.updated_at
+    """
+    stmt = text(sql)
+    if binds:
+        stmt = stmt.bindparams(*binds)
+    return db.execute(stmt, params).rowcount or 0
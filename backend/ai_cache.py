@@ -0,0 +1,149 @@
+# ai_cache.py
+# AI 응답 캐시 (같은 제공자/모델/프롬프트/파라미터면 유료 호출 재사용)
+# - 키: (provider, model, prompt, params) 를 정규화한 JSON 의 SHA-256 → 프롬프트 원문은 저장하지 않음
+# - 1단: 메모리 LRU, 2단: 별도 SQLite 파일(재기동 후에도 유지)
+# - 디스크 항목은 TTL 만료 시 무시/삭제, 총 크기 초과 시 오래 안 쓴 순으로 제거
+# - 응답 본문은 상담 암호화 키로 암호화해 저장 (키 미설정 시 평문)
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from security import encrypt_text, decrypt_text
+
+CACHE_PATH = os.getenv("AI_CACHE_PATH", "./ai_cache.db")
+MEM_ENTRIES = int(os.getenv("AI_CACHE_MEM_ENTRIES", "256"))
+TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+MAX_BYTES = int(os.getenv("AI_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+_mem: "OrderedDict[str, tuple[float, str]]" = OrderedDict()   # key → (저장 시각, 응답)
+_lock = threading.Lock()
+_stats = {"mem_hits": 0, "disk_hits": 0, "misses": 0, "bypass": 0, "stores": 0, "evictions": 0}
+_conn: Optional[sqlite3.Connection] = None
+
+
+def make_key(provider: str, model: str, prompt: str, params: Optional[dict] = None) -> str:
+    raw = json.dumps({"provider": provider, "model": model, "prompt": prompt, "params": params or {}},
+                     ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ---------- 디스크 ----------
+def _db() -> sqlite3.Connection:
+    # 호출부는 _lock 을 잡은 상태
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS ai_cache ("
+            " key TEXT PRIMARY KEY, provider TEXT, model TEXT, body TEXT,"
+            " size INTEGER, created_at REAL, accessed_at REAL)"
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS ix_ai_cache_accessed ON ai_cache(accessed_at)")
+        _conn.commit()
+    return _conn
+
+
+def _evict_disk(conn: sqlite3.Connection, now: float) -> None:
+    n = conn.execute("DELETE FROM ai_cache WHERE created_at < ?", (now - TTL_SECONDS,)).rowcount
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ai_cache").fetchone()[0]
+    if total > MAX_BYTES:
+        # 오래 안 쓴 순으로 누적 크기가 한도 안에 들어올 때까지 삭제
+        cut, freed = None, 0
+        for accessed_at, size in conn.execute("SELECT accessed_at, size FROM ai_cache ORDER BY accessed_at"):
+            freed += size
+            cut = accessed_at
+            if total - freed <= MAX_BYTES:
+                break
+        n += conn.execute("DELETE FROM ai_cache WHERE accessed_at <= ?", (cut,)).rowcount
+    _stats["evictions"] += n
+
+
+# ---------- 메모리 ----------
+def _mem_put(key: str, created_at: float, text: str) -> None:
+    _mem[key] = (created_at, text)
+    _mem.move_to_end(key)
+    while len(_mem) > MEM_ENTRIES:
+        _mem.popitem(last=False)
+
+
+# ---------- 공개 API ----------
+def get(key: str) -> Optional[str]:
+    now = time.time()
+    with _lock:
+        hit = _mem.get(key)
+        if hit is not None:
+            if hit[0] >= now - TTL_SECONDS:
+                _mem.move_to_end(key)
+                _stats["mem_hits"] += 1
+                return hit[1]
+            del _mem[key]
+
+        conn = _db()
+        row = conn.execute("SELECT body, created_at FROM ai_cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < now - TTL_SECONDS:
+            _stats["misses"] += 1
+            return None
+        conn.execute("UPDATE ai_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        conn.commit()
+        text = decrypt_text(row[0])
+        _mem_put(key, row[1], text)
+        _stats["disk_hits"] += 1
+        return text
+
+
+def put(key: str, provider: str, model: str, text: str) -> None:
+    now = time.time()
+    body = encrypt_text(text)
+    with _lock:
+        _mem_put(key, now, text)
+        conn = _db()
+        conn.execute(
+            "INSERT OR REPLACE INTO ai_cache (key, provider, model, body, size, created_at, accessed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, provider, model, body, len(body.encode("utf-8")), now, now),
+        )
+        _evict_disk(conn, now)
+        conn.commit()
+        _stats["stores"] += 1
+
+
+def note_bypass() -> None:
+    with _lock:
+        _stats["bypass"] += 1
+
+
+def stats() -> dict:
+    with _lock:
+        conn = _db()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ai_cache").fetchone()
+        s = dict(_stats)
+        s.update(mem_entries=len(_mem), disk_entries=entries, disk_bytes=size)
+    lookups = s["mem_hits"] + s["disk_hits"] + s["misses"]
+    s["hit_rate"] = round((s["mem_hits"] + s["disk_hits"]) / lookups, 4) if lookups else 0.0
+    return s
+
+
+def clear() -> int:
+    with _lock:
+        _mem.clear()
+        conn = _db()
+        n = conn.execute("DELETE FROM ai_cache").rowcount
+        conn.commit()
+    return n
+
+
+def close() -> None:
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
@@ -0,0 +1,269 @@
+# ai_client.py
+# AI 제공자(Gemini/OpenAI) 호출용 공용 비동기 HTTP 클라이언트
+# - 앱 lifespan 에서 httpx.AsyncClient 하나를 만들어 keep-alive 커넥션 재사용
+# - 제공자별 동시 호출 수 제한(세마포어) → 한 제공자가 느려도 다른 쪽/서버 전체가 막히지 않음
+# - 일시 오류(연결/타임아웃/429/5xx)는 지수 백오프 + 지터로 재시도
+# - 엔드포인트 주소는 환경변수로 변경 가능 (테스트 시 로컬 스텁 서버 사용)
+# - generate_cached: 같은 요청은 ai_cache 에서 재사용
+# - stream: 제공자 스트리밍 API(SSE)를 열어 텍스트 조각을 순서대로 전달
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import random
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+
+import ai_cache
+
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com")
+
+DEFAULT_MODELS = {
+    "gemini": "gemini-2.5-flash",
+    "openai": "gpt-5-mini",
+}
+
+# 연결은 짧게, 응답 생성은 길게 기다림 (초)
+CONNECT_TIMEOUT = float(os.getenv("AI_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("AI_READ_TIMEOUT", "60"))
+MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "2"))
+BACKOFF_BASE = 0.5      # 첫 재시도 최대 대기(초), 회차마다 2배
+BACKOFF_MAX = 8.0
+CONCURRENCY = {
+    "gemini": int(os.getenv("AI_CONCURRENCY_GEMINI", "8")),
+    "openai": int(os.getenv("AI_CONCURRENCY_OPENAI", "8")),
+}
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_client: Optional[httpx.AsyncClient] = None
+_limits: Dict[str, asyncio.Semaphore] = {}
+
+PROVIDER_LABEL = {"gemini": "Gemini", "openai": "OpenAI"}
+
+
+# ---------- 수명 주기 ----------
+async def start() -> None:
+    """
+    lifespan startup 에서 호출: 공용 클라이언트/세마포어 생성
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=sum(CONCURRENCY.values()),
+                                max_keepalive_connections=sum(CONCURRENCY.values())),
+        )
+    for provider, n in CONCURRENCY.items():
+        _limits.setdefault(provider, asyncio.Semaphore(n))
+
+
+async def aclose() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _limits.clear()
+    ai_cache.close()
+
+
+async def _get_client() -> httpx.AsyncClient:
+    # lifespan 밖(스크립트 등)에서 호출된 경우 지연 생성
+    if _client is None:
+        await start()
+    return _client
+
+
+def new_client() -> httpx.AsyncClient:
+    """
+    공용 클라이언트와 같은 설정의 새 클라이언트 (앱 이벤트 루프 밖에서 돌리는 배치 작업용)
+    """
+    return httpx.AsyncClient(timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT))
+
+
+class RateLimiter:
+    """
+    초당 rate 건으로 호출 시작을 고르게 분산 (토큰 버킷, 버스트 burst 건)
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._last is not None:
+                    self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# ---------- 요청 구성/응답 해석 ----------
+def _build_request(provider: str, key: str, model: str, prompt: str,
+                   stream: bool = False) -> Tuple[str, dict, dict]:
+    if provider == "gemini":
+        if stream:
+            url = f"{GEMINI_API_BASE}/v1beta/models/{model}:streamGenerateContent?alt=sse"
+        else:
+            url = f"{GEMINI_API_BASE}/v1beta/models/{model}:generateContent"
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        return url, body, {"x-goog-api-key": key}
+    url = f"{OPENAI_API_BASE}/v1/chat/completions"
+    body = {"model": model, "messages": [{"role": "user", "content": prompt}]}
+    if stream:
+        body["stream"] = True
+    return url, body, {"Authorization": f"Bearer {key}"}
+
+
+def _extract_text(provider: str, data: dict) -> str:
+    try:
+        if provider == "gemini":
+            cands = data.get("candidates") or []
+            if not cands:
+                return ""
+            parts = (cands[0].get("content") or {}).get("parts") or []
+            return "".join(p.get("text", "") for p in parts)
+        return data["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return ""
+
+
+def _extract_delta(provider: str, data: dict) -> str:
+    """
+    스트리밍 이벤트 1건에서 새로 생성된 텍스트 조각
+    """
+    if provider == "gemini":
+        return _extract_text(provider, data)
+    try:
+        return (data["choices"][0].get("delta") or {}).get("content") or ""
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return ""
+
+
+def _retry_delay(attempt: int, resp: Optional[httpx.Response]) -> float:
+    """
+    Retry-After(초) 가 있으면 우선, 없으면 full jitter 지수 백오프
+    """
+    if resp is not None:
+        ra = resp.headers.get("retry-after")
+        if ra and ra.isdigit():
+            return min(float(ra), BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+# ---------- 호출 ----------
+async def generate(provider: str, key: str, prompt: str,
+                   model: Optional[str] = None,
+                   client: Optional[httpx.AsyncClient] = None) -> Tuple[str, str]:
+    """
+    프롬프트 1건 호출. 반환: (모델명, 응답 텍스트)
+    - 제공자 오류는 502, 재시도 후에도 시간 초과면 504
+    - client 지정 시(별도 이벤트 루프의 배치 작업 등) 그 클라이언트를 쓰고 동시성 제한은 호출자가 담당
+    """
+    model = model or DEFAULT_MODELS[provider]
+    label = PROVIDER_LABEL[provider]
+    url, body, headers = _build_request(provider, key, model, prompt)
+    limit = contextlib.nullcontext() if client is not None else None
+    if client is None:
+        client = await _get_client()
+        limit = _limits[provider]
+
+    async with limit:
+        for attempt in range(MAX_RETRIES + 1):
+            resp: Optional[httpx.Response] = None
+            try:
+                resp = await client.post(url, json=body, headers=headers)
+            except httpx.TimeoutException:
+                if attempt >= MAX_RETRIES:
+                    raise HTTPException(status_code=504, detail=f"{label} 응답 시간 초과")
+            except httpx.TransportError as e:
+                if attempt >= MAX_RETRIES:
+                    raise HTTPException(status_code=502, detail=f"{label} 연결 오류: {e.__class__.__name__}")
+            else:
+                if resp.status_code == 200:
+                    return model, _extract_text(provider, resp.json())
+                if resp.status_code not in RETRY_STATUS or attempt >= MAX_RETRIES:
+                    raise HTTPException(status_code=502, detail=f"{label} 오류: {resp.text}")
+            await asyncio.sleep(_retry_delay(attempt, resp))
+    raise HTTPException(status_code=502, detail=f"{label} 호출 실패")
+
+
+async def generate_cached(provider: str, key: str, prompt: str, model: Optional[str] = None,
+                          no_cache: bool = False) -> Tuple[str, str, bool]:
+    """
+    generate() + 응답 캐시. 반환: (모델명, 응답 텍스트, 캐시 적중 여부)
+    - no_cache=True 면 캐시를 읽지 않고 새로 호출한 결과로 덮어씀 (다시 생성)
+    """
+    model = model or DEFAULT_MODELS[provider]
+    ckey = ai_cache.make_key(provider, model, prompt)
+    if no_cache:
+        ai_cache.note_bypass()
+    else:
+        hit = await asyncio.to_thread(ai_cache.get, ckey)
+        if hit is not None:
+            return model, hit, True
+    model, text = await generate(provider, key, prompt, model)
+    if text:
+        await asyncio.to_thread(ai_cache.put, ckey, provider, model, text)
+    return model, text, False
+
+
+async def stream(provider: str, key: str, prompt: str,
+                 model: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    제공자 스트리밍 호출: 텍스트 조각을 도착 순서대로 yield
+    - 재시도는 첫 조각을 보내기 전까지만. 이미 조각을 보낸 뒤의 오류는 그대로 전파
+    - 소비자가 멈추거나 닫으면(aclose) 업스트림 연결도 즉시 닫힘
+    """
+    model = model or DEFAULT_MODELS[provider]
+    label = PROVIDER_LABEL[provider]
+    url, body, headers = _build_request(provider, key, model, prompt, stream=True)
+    client = await _get_client()
+
+    sent = False
+    async with _limits[provider]:
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                async with client.stream("POST", url, json=body, headers=headers) as resp:
+                    if resp.status_code != 200:
+                        text = (await resp.aread()).decode("utf-8", "replace")
+                        if resp.status_code not in RETRY_STATUS or attempt >= MAX_RETRIES:
+                            raise HTTPException(status_code=502, detail=f"{label} 오류: {text}")
+                        delay = _retry_delay(attempt, resp)
+                    else:
+                        async for line in resp.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            try:
+                                chunk = _extract_delta(provider, json.loads(data))
+                            except ValueError:
+                                continue
+                            if chunk:
+                                sent = True
+                                yield chunk
+                        return
+            except httpx.TimeoutException:
+                if sent or attempt >= MAX_RETRIES:
+                    raise HTTPException(status_code=504, detail=f"{label} 응답 시간 초과")
+                delay = _retry_delay(attempt, None)
+            except httpx.TransportError as e:
+                if sent or attempt >= MAX_RETRIES:
+                    raise HTTPException(status_code=502, detail=f"{label} 연결 오류: {e.__class__.__name__}")
+                delay = _retry_delay(attempt, None)
+            await asyncio.sleep(delay)
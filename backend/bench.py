@@ -0,0 +1,346 @@
+# bench.py
+# 엔드포인트 벤치마크 (프로세스 내부, httpx ASGITransport → 네트워크/uvicorn 영향 없음)
+#
+# - datagen 으로 만든 데이터셋(규모별 파일로 보관, 없으면 생성)을 실행마다 임시 파일로 복사해 사용
+#   → 쓰기 케이스(출결 등록/업로드)가 있어도 매 실행 같은 상태에서 시작
+# - 케이스별: 워밍업 후 n회 순차 호출, 지연 시간 p50/p95/p99/평균(ms), 처리량(req/s), 요청당 SQL 수
+#   (SQL 수는 MetricsMiddleware 의 Server-Timing 헤더에서 읽음)
+# - 결과는 JSON 저장. compare: 기준(baseline) 대비 지표가 threshold 비율 이상 나빠진 케이스를 표시하고 exit 1
+#
+# 사용 예
+#   python bench.py run --out bench_result.json
+#   python bench.py run --baseline bench_baseline.json          # 실행 + 비교
+#   python bench.py compare bench_baseline.json bench_result.json --threshold 0.2
+#   python bench.py run --classes 56 --per-class 30 --years 5   # 5,000명 규모
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+DATA_DIR = os.getenv("BENCH_DATA_DIR", "./bench_data")
+TEACHER_PASSWORD = "pass1234"     # datagen 기본 비밀번호
+ADMIN = ("admin", "admin")        # main._ensure_admin_user 기본 계정
+QUERIES_RE = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+@dataclass
+class Case:
+    name: str
+    role: str                                   # "teacher" | "admin" | "none"
+    request: Callable[[int], Tuple[str, str, dict]]   # i → (method, url, httpx 인자)
+    n: int = 100
+    warmup: int = 3
+
+
+# ---------- 통계 ----------
+def _percentile(sorted_ms: List[float], p: float) -> float:
+    # nearest-rank
+    if not sorted_ms:
+        return 0.0
+    k = max(0, min(len(sorted_ms) - 1, int(round(p / 100 * len(sorted_ms) + 0.5)) - 1))
+    return sorted_ms[k]
+
+
+def summarize(latencies: List[float], wall: float, queries: List[int], errors: int) -> dict:
+    ms = sorted(x * 1000 for x in latencies)
+    return {
+        "n": len(ms),
+        "errors": errors,
+        "p50_ms": round(_percentile(ms, 50), 3),
+        "p95_ms": round(_percentile(ms, 95), 3),
+        "p99_ms": round(_percentile(ms, 99), 3),
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "throughput_rps": round(len(ms) / wall, 2) if wall else 0.0,
+        "queries": round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+# ---------- 데이터셋 ----------
+def dataset_path(classes: int, per_class: int, years: int, grades: int, seed: int) -> str:
+    return os.path.join(DATA_DIR, f"school_g{grades}_c{classes}_p{per_class}_y{years}_s{seed}.db")
+
+
+def ensure_dataset(path: str, args) -> None:
+    """
+    규모별 데이터셋 파일이 없거나 --regen 이면 datagen 을 별도 프로세스로 실행해 생성
+    (DATABASE_URL 은 import 시점에 정해지므로 프로세스를 나눔)
+    """
+    if os.path.exists(path) and not args.regen:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    cmd = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "datagen.py"),
+           "--reset", "--grades", str(args.grades), "--classes", str(args.classes),
+           "--per-class", str(args.per_class), "--years", str(args.years),
+           "--to-year", str(args.to_year), "--seed", str(args.seed), "--password", TEACHER_PASSWORD]
+    print(f"데이터셋 생성: {path}", file=sys.stderr)
+    subprocess.run(cmd, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+# ---------- 케이스 ----------
+def _roster_xlsx(students: List[dict]) -> bytes:
+    import openpyxl
+    from routers.homeroom_upload import EXPECTED_HEADERS
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(EXPECTED_HEADERS)
+    for s in students:
+        ws.append([s["grade"], s["class_no"], s["number"], s["name"], s["student_no"],
+                   "남" if s["gender"] == "M" else "여", None, s["address"], None,
+                   s["phone"], s["parent1_phone"], s["parent2_phone"], None])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _users_csv(n: int) -> bytes:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(["username", "password", "full_name", "role"])
+    for i in range(n):
+        w.writerow([f"bench{i:03d}", "Bench!2345", f"벤치{i:03d}", "student"])
+    return buf.getvalue().encode("utf-8")
+
+
+def build_cases(ctx: dict, scale: float) -> List[Case]:
+    """
+    ctx: 담임 교사(t001)의 학반/학생 정보 (load_context)
+    scale: 반복 횟수 배율 (--quick 등)
+    """
+    year = ctx["year"]
+    ids = [s["id"] for s in ctx["students"]]
+    grade, class_no = ctx["grade"], ctx["class_no"]
+    roster = _roster_xlsx(ctx["students"])
+    users_csv = _users_csv(10)
+    day0 = date(year + 1, 3, 2)   # 생성 데이터에 없는 학년도 → 출결 중복 없음
+
+    def n(x: int) -> int:
+        return max(5, int(x * scale))
+
+    return [
+        Case("login", "none", lambda i: ("POST", "/auth/token",
+             {"data": {"username": "t001", "password": TEACHER_PASSWORD}}), n=n(20)),
+        Case("list_students", "admin", lambda i: ("GET", "/core/students", {}), n=n(30)),
+        Case("list_counsels", "teacher", lambda i: ("GET", "/counsels",
+             {"params": {"student_id": ids[i % len(ids)]}}), n=n(200)),
+        Case("create_attendance", "teacher", lambda i: ("POST", "/attendance", {"json": {
+             "student_id": ids[i % len(ids)], "type": "late",
+             "date": (day0 + timedelta(days=i // len(ids))).isoformat()}}), n=n(200), warmup=0),
+        Case("attendance_summary", "teacher", lambda i: ("GET", "/attendance/summary",
+             {"params": {"student_id": ids[i % len(ids)], "year": year}}), n=n(200)),
+        Case("midterm_summary", "teacher", lambda i: ("GET", "/grades/midterm/summary",
+             {"params": {"student_id": ids[i % len(ids)], "year": year, "term": 1}}), n=n(200)),
+        Case("final_summary", "teacher", lambda i: ("GET", "/grades/final/summary",
+             {"params": {"student_id": ids[i % len(ids)], "year": year, "term": 1}}), n=n(200)),
+        Case("semester_class", "teacher", lambda i: ("GET", "/grades/semester",
+             {"params": {"year": year, "term": 1 + i % 2, "grade": grade, "class_no": class_no}}), n=n(100)),
+        Case("upload_xlsx", "teacher", lambda i: ("POST", "/homeroom/students/upload-xlsx",
+             {"files": {"file": ("roster.xlsx", roster)}}), n=n(20)),
+        Case("bulk_users", "admin", lambda i: ("POST", "/auth/admin/bulk_users_simple",
+             {"files": {"file": ("users.csv", users_csv)}}), n=n(5), warmup=1),
+    ]
+
+
+def load_context(year: int) -> dict:
+    from sqlalchemy import text
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        row = db.execute(text(
+            "SELECT ha.grade, ha.class_no FROM homeroom_assignments ha JOIN users u ON u.id = ha.teacher_user_id"
+            " WHERE u.username = 't001' AND ha.school_year = :y"), {"y": year}).first()
+        if row is None:
+            raise SystemExit(f"t001 의 {year}학년도 담임 배정이 없습니다. (--to-year 확인)")
+        students = [dict(r._mapping) for r in db.execute(text(
+            "SELECT id, student_no, name, grade, class_no, number, gender, phone, parent1_phone,"
+            " parent2_phone, address FROM students WHERE grade = :g AND class_no = :c ORDER BY number"),
+            {"g": row.grade, "c": row.class_no})]
+    finally:
+        db.close()
+    return {"year": year, "grade": row.grade, "class_no": row.class_no, "students": students}
+
+
+# ---------- 실행 ----------
+async def _token(client, username: str, password: str) -> str:
+    r = await client.post("/auth/token", data={"username": username, "password": password})
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def run_cases(cases: List[Case], only: Optional[List[str]]) -> Dict[str, dict]:
+    import httpx
+    from main import app
+
+    results: Dict[str, dict] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)   # 500 도 오류 건수로 집계
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            headers = {
+                "none": {},
+                "teacher": {"Authorization": "Bearer " + await _token(client, "t001", TEACHER_PASSWORD)},
+                "admin": {"Authorization": "Bearer " + await _token(client, *ADMIN)},
+            }
+            for case in cases:
+                if only and case.name not in only:
+                    continue
+                for i in range(case.warmup):
+                    method, url, kw = case.request(i)
+                    await client.request(method, url, headers=headers[case.role], **kw)
+                latencies, queries, errors = [], [], 0
+                wall = time.perf_counter()
+                for i in range(case.warmup, case.warmup + case.n):
+                    method, url, kw = case.request(i)
+                    t0 = time.perf_counter()
+                    r = await client.request(method, url, headers=headers[case.role], **kw)
+                    latencies.append(time.perf_counter() - t0)
+                    if r.status_code >= 400:
+                        errors += 1
+                    m = QUERIES_RE.search(r.headers.get("server-timing", ""))
+                    if m:
+                        queries.append(int(m.group(1)))
+                results[case.name] = summarize(latencies, time.perf_counter() - wall, queries, errors)
+                print(f"{case.name:20s} p50 {results[case.name]['p50_ms']:9.2f}ms"
+                      f"  p95 {results[case.name]['p95_ms']:9.2f}ms"
+                      f"  {results[case.name]['throughput_rps']:8.1f} req/s"
+                      f"  err {errors}", file=sys.stderr)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ---------- 비교 ----------
+COMPARE_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def compare(base: dict, cur: dict, threshold: float, min_ms: float) -> List[dict]:
+    """
+    케이스별 지표 변화. regression: 지연 시간이 threshold 비율 이상(그리고 min_ms 이상) 증가,
+    또는 요청당 SQL 수 증가, 또는 오류 발생
+    """
+    rows = []
+    for name, c in cur["results"].items():
+        b = base["results"].get(name)
+        if b is None:
+            continue
+        row = {"case": name, "regressions": []}
+        for m in COMPARE_METRICS:
+            row[m] = (b[m], c[m])
+            if c[m] > b[m] * (1 + threshold) and c[m] - b[m] >= min_ms:
+                row["regressions"].append(f"{m} {b[m]:.2f}→{c[m]:.2f}ms (+{(c[m] / b[m] - 1) * 100:.0f}%)"
+                                          if b[m] else f"{m} {b[m]:.2f}→{c[m]:.2f}ms")
+        if b.get("queries") is not None and c.get("queries") is not None and c["queries"] > b["queries"]:
+            row["regressions"].append(f"queries {b['queries']}→{c['queries']}")
+        if c.get("errors", 0) > b.get("errors", 0):
+            row["regressions"].append(f"errors {b.get('errors', 0)}→{c['errors']}")
+        rows.append(row)
+    return rows
+
+
+def print_compare(rows: List[dict]) -> bool:
+    bad = False
+    for r in rows:
+        status = "REGRESSION" if r["regressions"] else "ok"
+        bad = bad or bool(r["regressions"])
+        p95 = r["p95_ms"]
+        print(f"{r['case']:20s} p95 {p95[0]:9.2f} → {p95[1]:9.2f}ms  {status}"
+              + (f"  ({'; '.join(r['regressions'])})" if r["regressions"] else ""))
+    return bad
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="엔드포인트 벤치마크 (프로세스 내부)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    rp = sub.add_parser("run", help="벤치마크 실행")
+    rp.add_argument("--grades", type=int, default=3)
+    rp.add_argument("--classes", type=int, default=10)
+    rp.add_argument("--per-class", type=int, default=30)
+    rp.add_argument("--years", type=int, default=3)
+    rp.add_argument("--to-year", type=int, default=2025)
+    rp.add_argument("--seed", type=int, default=42)
+    rp.add_argument("--regen", action="store_true", help="데이터셋 다시 생성")
+    rp.add_argument("--scale", type=float, default=1.0, help="반복 횟수 배율 (0.2 = 빠른 확인)")
+    rp.add_argument("--case", action="append", help="특정 케이스만 (여러 번 지정 가능)")
+    rp.add_argument("--out", default="bench_result.json")
+    rp.add_argument("--baseline", help="실행 후 이 결과 파일과 비교")
+    rp.add_argument("--threshold", type=float, default=0.2, help="허용 악화 비율 (0.2 = 20%%)")
+    rp.add_argument("--min-ms", type=float, default=1.0, help="이보다 작은 차이는 무시 (측정 잡음)")
+
+    cp = sub.add_parser("compare", help="두 결과 파일 비교")
+    cp.add_argument("baseline")
+    cp.add_argument("current")
+    cp.add_argument("--threshold", type=float, default=0.2)
+    cp.add_argument("--min-ms", type=float, default=1.0)
+
+    args = ap.parse_args(argv)
+
+    if args.cmd == "compare":
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            cur = json.load(f)
+        sys.exit(1 if print_compare(compare(base, cur, args.threshold, args.min_ms)) else 0)
+
+    src = dataset_path(args.classes, args.per_class, args.years, args.grades, args.seed)
+    ensure_dataset(src, args)
+    work = tempfile.NamedTemporaryFile(prefix="bench_", suffix=".db", delete=False).name
+    shutil.copyfile(src, work)
+    # 앱 모듈(database 등)을 import 하기 전에 지정해야 함
+    os.environ["DATABASE_URL"] = f"sqlite:///{work}"
+    os.environ.setdefault("AI_CACHE_PATH", os.path.join(tempfile.gettempdir(), "bench_ai_cache.db"))
+    try:
+        cases = build_cases(load_context(args.to_year), args.scale)
+        results = asyncio.run(run_cases(cases, args.case))
+    finally:
+        os.remove(work)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {"grades": args.grades, "classes": args.classes, "per_class": args.per_class,
+                        "years": args.years, "to_year": args.to_year, "seed": args.seed},
+            "scale": args.scale,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.out}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        sys.exit(1 if print_compare(compare(base, report, args.threshold, args.min_ms)) else 0)
+
+
+if __name__ == "__main__":
+    main()
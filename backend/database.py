@@ -1,11 +1,18 @@
 # database.py
 # SQLite 연결/세션 및 Declarative Base 정의
+# + SQL 계측: 요청 단위 쿼리 수/소요 시간 집계(contextvar), 느린 쿼리 로그
 
-from sqlalchemy import create_engine
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-# 로컬 SQLite 파일(DB 파일명은 필요 시 변경)
-SQLALCHEMY_DATABASE_URL = "sqlite:///./school.db"
+# 로컬 SQLite 파일 (DATABASE_URL 로 다른 파일 지정 가능: 대용량 테스트 데이터 등)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./school.db")
 
 # check_same_thread=False: SQLite에서 단일 스레드 제약 완화(FastAPI 개발환경 편의)
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
@@ -21,3 +28,69 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ---------- SQL 계측 ----------
+# 이 시간(ms) 이상 걸린 쿼리는 경고 로그
+SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "200"))
+slow_log = logging.getLogger("sql.slow")
+
+
+class SqlTrace:
+    """
+    요청 1건 동안 실행된 SQL 집계
+    - keep=True 면 (시작 오프셋초, 소요초, SQL) 목록도 보관 (프로파일링용)
+    """
+    __slots__ = ("count", "total", "slow", "keep", "started", "statements")
+
+    def __init__(self, keep: bool = False):
+        self.count = 0
+        self.total = 0.0
+        self.slow = 0
+        self.keep = keep
+        self.started = time.perf_counter()
+        self.statements: List[Tuple[float, float, str]] = []
+
+    def add(self, start: float, duration: float, statement: str) -> None:
+        self.count += 1
+        self.total += duration
+        if self.keep:
+            self.statements.append((start - self.started, duration, statement))
+
+
+_sql_trace: ContextVar[Optional[SqlTrace]] = ContextVar("sql_trace", default=None)
+
+
+def start_sql_trace(trace: Optional[SqlTrace] = None, keep: bool = False):
+    """
+    현재 컨텍스트(요청)에 SqlTrace 를 연결. 반환된 토큰은 end_sql_trace 에 전달
+    - trace 를 넘기면 그 객체(하위 클래스 포함)에 누적
+    """
+    trace = trace or SqlTrace(keep)
+    return trace, _sql_trace.set(trace)
+
+
+def end_sql_trace(token) -> None:
+    _sql_trace.reset(token)
+
+
+def current_sql_trace() -> Optional[SqlTrace]:
+    return _sql_trace.get()
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start"].pop()
+    duration = time.perf_counter() - start
+    trace = _sql_trace.get()
+    if trace is not None:
+        trace.add(start, duration, statement)
+        if duration * 1000 >= SQL_SLOW_MS:
+            trace.slow += 1
+    if duration * 1000 >= SQL_SLOW_MS:
+        slow_log.warning("slow query %.1fms: %s", duration * 1000, " ".join(statement.split())[:500])
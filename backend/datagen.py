@@ -0,0 +1,396 @@
+# datagen.py
+# 부하/성능 테스트용 가상 학교 데이터 생성
+#
+# 규모: 학년 수 × 학급 수 × 학급당 학생 수, years 개 학년도 (to_year 가 마지막 학년도)
+#  - 입학 연도별 코호트: to_year 기준 재학생(1~최고 학년) + 기간 안에 졸업한 코호트(grade = 최고학년+1, 계정 보관)
+#  - 학급(반)은 입학 때 정해져 졸업까지 유지 (rollover 와 같은 가정)
+# 생성 대상
+#  - 교사(담임 + 교과) / 사용자(t###, s<학생id>) / 학년도별 담임 배정 / 학생 담임 연결(마지막 학년도)
+#  - 수강 편성(학년별 과목, 1·2학기), 중간/기말 점수, 학기 성적(achievement 엔진으로 계산)
+#  - 출결: attendance 라우터 규칙 준수 (생리 결석은 여학생·월 1회, 교외체험 국내 연 7일/국외 연 30일,
+#    (학생, 날짜, 유형) 중복 없음). 결석/지각 등 '사건'만 기록 (출석은 기록하지 않는 운영 방식)
+#  - 상담일지: 본문 암호화(security.encrypt_text)
+#  - 모의고사 회차/과목 점수 + 회차별 변환표(mock_conversion.derive_tables)
+# - 모든 행은 id 를 미리 정해 executemany 일괄 INSERT, 한 트랜잭션으로 커밋
+# - 같은 --seed 면 같은 데이터
+#
+# 사용 예 (DATABASE_URL 로 별도 파일에 생성 권장)
+#   DATABASE_URL=sqlite:///./bench.db python datagen.py --reset --classes 10 --per-class 28 --years 5
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import achievement
+import mock_conversion
+from database import Base, engine, SessionLocal
+from jobs import chunks
+from security import encrypt_text, hash_password
+
+INSERT_CHUNK = 5000
+
+# ---------- 이름/주소 재료 ----------
+SURNAMES = ["김", "이", "박", "최", "정", "강", "조", "윤", "장", "임", "한", "오", "서", "신", "권",
+            "황", "안", "송", "류", "전", "홍", "고", "문", "양", "손", "배", "백", "허", "유", "남"]
+SURNAME_WEIGHTS = [21, 15, 8, 5, 4, 2.3, 2.1, 2, 2, 1.6, 1.5, 1.5, 1.5, 1.4, 1.2,
+                   1.2, 1.2, 1.2, 1.1, 1, 1, 0.9, 0.9, 0.9, 0.9, 0.8, 0.8, 0.6, 0.6, 0.5]
+GIVEN = {
+    "M": ["민준", "서준", "도윤", "예준", "시우", "하준", "주원", "지호", "지후", "준우",
+          "준서", "건우", "현우", "도현", "우진", "선우", "서진", "연우", "유준", "정우",
+          "승우", "승현", "시윤", "준혁", "은우", "지환", "승민", "지우", "유찬", "윤우"],
+    "F": ["서연", "서윤", "지우", "서현", "민서", "하은", "하윤", "윤서", "지유", "지민",
+          "채원", "수아", "지아", "지윤", "다은", "은서", "예은", "수빈", "소율", "예린",
+          "하린", "시은", "유나", "가은", "채은", "민지", "예서", "윤아", "다인", "수민"],
+}
+DISTRICTS = ["강남구 역삼동", "서초구 반포동", "송파구 잠실동", "마포구 합정동", "노원구 상계동",
+             "관악구 봉천동", "성북구 길음동", "은평구 불광동", "강서구 화곡동", "동작구 사당동"]
+
+# 학년별 교과 (최고 학년이 3을 넘으면 3학년 과목 재사용)
+SUBJECTS_BY_GRADE = {
+    1: ["국어", "수학", "영어", "한국사", "통합사회", "통합과학"],
+    2: ["문학", "수학Ⅰ", "영어Ⅰ", "생활과 윤리", "물리학Ⅰ", "화학Ⅰ"],
+    3: ["화법과 작문", "확률과 통계", "영어Ⅱ", "사회·문화", "생명과학Ⅰ", "지구과학Ⅰ"],
+}
+# 모의고사: 학년별 (회차, 라벨)
+MOCK_ROUNDS = {1: [(3, "학평"), (6, "학평"), (9, "학평"), (11, "학평")],
+               2: [(3, "학평"), (6, "학평"), (9, "학평"), (11, "학평")],
+               3: [(3, "학평"), (6, "모평"), (9, "모평"), (10, "학평")]}
+MOCK_TRACKS = (("SOC1", "SOC2"), ("SCI1", "SCI2"))
+
+COUNSEL_CHANNELS = ["대면", "전화", "문자", "온라인"]
+COUNSEL_TOPICS = [
+    ("진로 상담", "{name} 학생과 희망 진로와 관련 과목 선택에 대해 이야기함. 관심 분야 활동을 더 찾아보기로 함."),
+    ("학업 상담", "{name} 학생의 최근 성적 변화에 대해 상담. 수학 복습 시간을 늘리고 다음 주에 다시 확인하기로 함."),
+    ("교우 관계", "{name} 학생이 반 친구와의 갈등을 이야기함. 양쪽 이야기를 듣고 중재하기로 함."),
+    ("생활 태도", "{name} 학생의 지각이 잦아 원인을 확인함. 등교 시간을 지키도록 약속함."),
+    ("학부모 상담", "{name} 학생 보호자와 통화. 가정에서의 학습 습관과 건강 상태를 공유함."),
+    ("건강 상담", "{name} 학생이 잦은 두통을 호소함. 보건실 안내 후 경과를 지켜보기로 함."),
+]
+
+
+# ---------- 유틸 ----------
+def _bulk(db: Session, table: str, rows: List[dict]) -> int:
+    """
+    executemany 일괄 INSERT (첫 행의 키를 컬럼으로 사용)
+    """
+    if not rows:
+        return 0
+    cols = list(rows[0])
+    sql = text(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join(':' + c for c in cols)})")
+    for chunk in chunks(rows, INSERT_CHUNK):
+        db.execute(sql, chunk)
+    return len(rows)
+
+
+def _school_days(year: int) -> List[date]:
+    """
+    학기 중 평일 (1학기 3/2~7/20, 2학기 8/20~12/31)
+    """
+    days = []
+    for start, end in ((date(year, 3, 2), date(year, 7, 20)), (date(year, 8, 20), date(year, 12, 31))):
+        d = start
+        while d <= end:
+            if d.weekday() < 5:
+                days.append(d)
+            d += timedelta(days=1)
+    return days
+
+
+class _Names:
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def person(self, gender: str) -> str:
+        return self.rng.choices(SURNAMES, SURNAME_WEIGHTS)[0] + self.rng.choice(GIVEN[gender])
+
+    def phone(self) -> str:
+        return f"010-{self.rng.randint(1000, 9999)}-{self.rng.randint(1000, 9999)}"
+
+    def address(self) -> str:
+        return f"서울특별시 {self.rng.choice(DISTRICTS)} {self.rng.randint(1, 300)}"
+
+
+def _score(rng: random.Random, base: float, spread: float = 8) -> int:
+    return max(0, min(100, round(rng.gauss(base, spread))))
+
+
+# ---------- 단계별 생성 ----------
+def _attendance_for(rng: random.Random, sid: int, gender: str, days: List[date],
+                    next_id: int) -> List[dict]:
+    """
+    학생 1명 × 1학년도 출결 사건. 라우터(create_attendance)와 같은 규칙을 지킴
+    """
+    rows: List[dict] = []
+    used: set = set()   # (date, type)
+
+    def add(d: date, typ: str, reason: str = "NORMAL", periods: int = 0, note: Optional[str] = None):
+        if (d, typ) in used:
+            return
+        used.add((d, typ))
+        rows.append({"id": next_id + len(rows), "student_id": sid, "date": d, "type": typ,
+                     "reason": reason, "periods": periods, "note": note})
+
+    for _ in range(rng.choices((0, 1, 2, 3, 5, 8), (30, 25, 20, 12, 8, 5))[0]):
+        add(rng.choice(days), "late")
+    for _ in range(rng.choices((0, 1, 2, 4), (45, 30, 15, 10))[0]):
+        add(rng.choice(days), "early_leave", periods=rng.randint(1, 4))
+    for _ in range(rng.choices((0, 1, 2, 3), (50, 25, 15, 10))[0]):
+        add(rng.choice(days), "period_absence", periods=rng.randint(1, 3))
+    for _ in range(rng.choices((0, 1, 2, 4), (55, 25, 12, 8))[0]):
+        add(rng.choice(days), "absent", rng.choice(("NORMAL", "NORMAL", "NORMAL", "OFFICIAL")))
+
+    # 생리 결석: 여학생, 월 1회
+    if gender == "F":
+        months = sorted({d.month for d in days})
+        for m in rng.sample(months, k=min(len(months), rng.choice((0, 0, 1, 2, 3)))):
+            add(rng.choice([d for d in days if d.month == m]), "absent", "MENSTRUAL")
+
+    # 교외체험: 국내 연 7일, 국외 연 30일 한도 (연속 평일)
+    for reason, limit, chance in (("EXTERNAL_DOMESTIC", 7, 0.3), ("EXTERNAL_OVERSEAS", 30, 0.03)):
+        if rng.random() < chance:
+            n = rng.randint(1, min(limit, 5 if reason == "EXTERNAL_DOMESTIC" else 15))
+            i = rng.randrange(0, len(days) - n)
+            for d in days[i:i + n]:
+                add(d, "absent", reason, note="교외체험학습")
+    return rows
+
+
+def generate(db: Session, *, grades: int = 3, classes: int = 10, per_class: int = 30,
+             years: int = 5, to_year: int = 2025, counsels: int = 2, seed: int = 42,
+             password: str = "pass1234", mock: bool = True) -> dict:
+    """
+    빈 DB 에 가상 데이터 생성. 반환: 테이블별 생성 행 수/단계별 소요 시간
+    """
+    if db.execute(text("SELECT COUNT(*) FROM students")).scalar():
+        raise SystemExit("students 테이블이 비어 있지 않습니다. --reset 으로 새로 만드세요.")
+
+    rng = random.Random(seed)
+    names = _Names(rng)
+    first_year = to_year - years + 1
+    report: Dict = {"grades": grades, "classes": classes, "per_class": per_class,
+                    "years": [first_year, to_year], "rows": {}, "seconds": {}}
+    t0 = time.perf_counter()
+
+    def done(stage: str, **counts: int):
+        nonlocal t0
+        t = time.perf_counter()
+        report["seconds"][stage] = round(t - t0, 2)
+        report["rows"].update(counts)
+        t0 = t
+
+    if db.bind.dialect.name == "sqlite":
+        db.execute(text("PRAGMA synchronous = OFF"))
+
+    pw_hash = hash_password(password)   # bcrypt 는 느리므로 전 계정 공용 해시 1회
+    now = datetime.utcnow()
+    user_id = (db.execute(text("SELECT COALESCE(MAX(id), 0) FROM users")).scalar() or 0) + 1
+    teacher_id = (db.execute(text("SELECT COALESCE(MAX(id), 0) FROM teachers")).scalar() or 0) + 1
+
+    # --- 교사: 담임(학년×반) + 교과 교사(과목당 1명) ---
+    teachers, users = [], []
+    teacher_user: Dict[int, int] = {}   # teachers.id → users.id
+    taken = {n for (n,) in db.execute(text("SELECT name FROM teachers"))}
+    subject_names = [n for g in range(1, grades + 1) for n in SUBJECTS_BY_GRADE[min(g, 3)]]
+    subject_names = list(dict.fromkeys(subject_names))
+    n_teachers = grades * classes + len(subject_names)
+    for i in range(n_teachers):
+        name = names.person(rng.choice("MF"))
+        while name in taken:
+            name = names.person(rng.choice("MF"))
+        taken.add(name)
+        tid, uid = teacher_id + i, user_id + i
+        teachers.append({"id": tid, "name": name})
+        teacher_user[tid] = uid
+        users.append({"id": uid, "username": f"t{i + 1:03d}", "email": f"t{i + 1:03d}@example.com",
+                      "full_name": name, "hashed_password": pw_hash, "role": "teacher",
+                      "is_active": True, "teacher_id": tid, "student_id": None,
+                      "password_change_required": False, "archived_year": None})
+    homeroom_pool = teachers[:grades * classes]
+    subject_teachers = teachers[grades * classes:]
+    user_id += n_teachers
+    _bulk(db, "teachers", teachers)
+
+    # 같은 이름 과목이 이미 있으면 그대로 사용 (담당 교사만 새 교과 교사로)
+    subject_ids = {n: i for i, n in db.execute(text("SELECT id, name FROM subjects"))}
+    next_subject = max(subject_ids.values(), default=0) + 1
+    subjects = []
+    for i, n in enumerate(subject_names):
+        if n in subject_ids:
+            db.execute(text("UPDATE subjects SET default_teacher_id = :t WHERE id = :id"),
+                       {"t": subject_teachers[i]["id"], "id": subject_ids[n]})
+        else:
+            subject_ids[n] = next_subject
+            subjects.append({"id": next_subject, "name": n, "default_teacher_id": subject_teachers[i]["id"]})
+            next_subject += 1
+    _bulk(db, "subjects", subjects)
+    subject_teacher = {subject_ids[n]: subject_teachers[i]["id"] for i, n in enumerate(subject_names)}
+
+    # --- 학년도별 담임 배정 (교사가 해마다 다른 학반을 맡도록 순환) ---
+    hr_rows: List[dict] = []
+    homeroom_of: Dict[tuple, dict] = {}   # (학년도, 학년, 반) → 담임 교사 행
+    for y in range(first_year, to_year + 1):
+        for g in range(1, grades + 1):
+            for c in range(1, classes + 1):
+                t = homeroom_pool[((g - 1) * classes + (c - 1) + (y - first_year) * classes) % len(homeroom_pool)]
+                homeroom_of[(y, g, c)] = t
+                hr_rows.append({"school_year": y, "grade": g, "class_no": c,
+                                "teacher_user_id": teacher_user[t["id"]],
+                                "updated_at": now})
+    done("teachers", teachers=len(teachers), subjects=len(subject_names), homeroom_assignments=len(hr_rows))
+
+    # --- 학생/계정: 입학 연도별 코호트 ---
+    students, student_years = [], []   # student_years: (학생 행, 학년도, 그 해 학년)
+    for entry in range(first_year - grades + 1, to_year + 1):
+        grade_now = to_year - entry + 1
+        graduated = grade_now > grades
+        for c in range(1, classes + 1):
+            for n in range(1, per_class + 1):
+                gender = rng.choice("MF")
+                # 학생개인번호 = students.id (명단 업로드와 같은 규칙): 입학연도 + 반(3) + 번호(3)
+                sid = int(f"{entry}{c:03d}{n:03d}")
+                s = {"id": sid, "student_no": str(sid), "name": names.person(gender),
+                     "grade": grades + 1 if graduated else grade_now, "class_no": c, "number": n,
+                     "gender": gender, "phone": names.phone(), "parent1_phone": names.phone(),
+                     "parent2_phone": names.phone() if rng.random() < 0.6 else None,
+                     "address": names.address(),
+                     "birthdate": date(entry - 16, rng.randint(1, 12), rng.randint(1, 28)),
+                     "homeroom_teacher_id": None if graduated else homeroom_of[(to_year, grade_now, c)]["id"]}
+                students.append(s)
+                users.append({"id": user_id, "username": f"s{sid}", "email": f"s{sid}@example.com",
+                              "full_name": s["name"], "hashed_password": pw_hash, "role": "student",
+                              "is_active": not graduated, "teacher_id": None, "student_id": sid,
+                              "password_change_required": False,
+                              "archived_year": entry + grades - 1 if graduated else None})
+                for y in range(max(entry, first_year), min(entry + grades - 1, to_year) + 1):
+                    student_years.append((s, y, y - entry + 1))
+                user_id += 1
+    _bulk(db, "students", students)
+    _bulk(db, "users", users)
+    _bulk(db, "homeroom_assignments", hr_rows)
+    # 지난 학년도 학적 기록 (rollover 가 남기는 것과 같은 형태, 진행 중인 to_year 는 students 의 현재 값)
+    history = [{"student_id": s["id"], "school_year": y, "grade": g,
+                "class_no": s["class_no"], "number": s["number"]}
+               for s, y, g in student_years if y < to_year]
+    _bulk(db, "student_years", history)
+    done("students", students=len(students), users=len(users), student_years=len(history))
+
+    # --- 수강 편성 + 중간/기말 ---
+    enrollments, midterms, finals = [], [], []
+    ability = {s["id"]: rng.gauss(72, 12) for s in students}
+    for s, y, g in student_years:
+        for name in SUBJECTS_BY_GRADE[min(g, 3)]:
+            sub = subject_ids[name]
+            bias = ability[s["id"]] + rng.gauss(0, 6)
+            for term in (1, 2):
+                key = {"student_id": s["id"], "subject_id": sub, "year": y, "term": term}
+                enrollments.append({**key, "teacher_id": subject_teacher[sub]})
+                midterms.append({**key, "score": _score(rng, bias), "comment": None})
+                finals.append({**key, "score": _score(rng, bias), "comment": None})
+    _bulk(db, "enrollments", enrollments)
+    _bulk(db, "midterm_scores", midterms)
+    _bulk(db, "final_scores", finals)
+    semester = sum(achievement.refresh_semester_scores(db, y, term)
+                   for y in range(first_year, to_year + 1) for term in (1, 2))
+    done("scores", enrollments=len(enrollments), midterm_scores=len(midterms),
+         final_scores=len(finals), semester_scores=semester)
+
+    # --- 출결 ---
+    attendance: List[dict] = []
+    days_of = {y: _school_days(y) for y in range(first_year, to_year + 1)}
+    att_id = (db.execute(text("SELECT COALESCE(MAX(id), 0) FROM attendances")).scalar() or 0) + 1
+    for s, y, _ in student_years:
+        attendance += _attendance_for(rng, s["id"], s["gender"], days_of[y], att_id + len(attendance))
+    for r in attendance:
+        r["created_at"] = now
+    _bulk(db, "attendances", attendance)
+    done("attendance", attendances=len(attendance))
+
+    # --- 상담일지 (본문 암호화) ---
+    logs: List[dict] = []
+    for s, y, g in student_years:
+        for _ in range(counsels):
+            title, body = rng.choice(COUNSEL_TOPICS)
+            d = rng.choice(days_of[y])
+            ts = datetime.combine(d, datetime.min.time()) + timedelta(hours=rng.randint(9, 17))
+            logs.append({"student_id": s["id"], "teacher_id": homeroom_of[(y, g, s["class_no"])]["id"],
+                         "date": d, "channel": rng.choice(COUNSEL_CHANNELS), "title": title,
+                         "content": encrypt_text(body.format(name=s["name"])), "summary": None,
+                         "summarized_at": None, "created_at": ts, "updated_at": ts})
+    _bulk(db, "counsel_logs", logs)
+    done("counsels", counsel_logs=len(logs))
+
+    # --- 모의고사 ---
+    exams, exam_scores = [], []
+    if mock:
+        exam_id = (db.execute(text("SELECT COALESCE(MAX(id), 0) FROM mock_exams")).scalar() or 0) + 1
+        track = {s["id"]: rng.choice(MOCK_TRACKS) for s in students}
+        for s, y, g in student_years:
+            for rnd, label in MOCK_ROUNDS[min(g, 3)]:
+                exams.append({"id": exam_id, "student_id": s["id"], "year": y, "round": rnd,
+                              "name": label, "exam_date": date(y, rnd, 15)})
+                base = ability[s["id"]] - 5
+                for code in ("KOR", "ENG", "MATH", "HIST") + track[s["id"]]:
+                    exam_scores.append({"exam_id": exam_id, "subject_code": code,
+                                        "score": _score(rng, base, 12), "comment": None})
+                exam_id += 1
+        _bulk(db, "mock_exams", exams)
+        _bulk(db, "mock_exam_scores", exam_scores)
+        for y, rnd in sorted({(e["year"], e["round"]) for e in exams}):
+            mock_conversion.derive_tables(db, y, rnd)
+    done("mock", mock_exams=len(exams), mock_exam_scores=len(exam_scores))
+
+    db.commit()
+    report["seconds"]["total"] = round(sum(report["seconds"].values()), 2)
+    return report
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    import argparse
+
+    from main import (_ensure_users_add_pwdreq_column, _ensure_users_add_archived_year,
+                      _ensure_students_add_birthdate, _ensure_counsel_logs_add_summarized_at,
+                      _ensure_placeholder_teacher, _ensure_admin_user)
+    import homeroom_index
+
+    ap = argparse.ArgumentParser(description="가상 학교 데이터 생성 (DATABASE_URL 의 DB 에 기록)")
+    ap.add_argument("--grades", type=int, default=3)
+    ap.add_argument("--classes", type=int, default=10, help="학년당 학급 수")
+    ap.add_argument("--per-class", type=int, default=30, help="학급당 학생 수")
+    ap.add_argument("--years", type=int, default=5, help="생성할 학년도 수")
+    ap.add_argument("--to-year", type=int, default=date.today().year, help="마지막(현재) 학년도")
+    ap.add_argument("--counsels", type=int, default=2, help="학생 1명당 학년도별 상담일지 수")
+    ap.add_argument("--no-mock", action="store_true", help="모의고사 생략")
+    ap.add_argument("--password", default="pass1234", help="생성 계정 공통 비밀번호")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--reset", action="store_true", help="모든 테이블을 지우고 새로 생성")
+    args = ap.parse_args(list(argv) if argv is not None else None)
+    logging.getLogger("sql.slow").setLevel(logging.ERROR)   # 대량 INSERT…SELECT 는 느린 쿼리 로그 생략
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for ensure in (_ensure_users_add_pwdreq_column, _ensure_users_add_archived_year,
+                       _ensure_students_add_birthdate, _ensure_counsel_logs_add_summarized_at,
+                       _ensure_placeholder_teacher, _ensure_admin_user):
+            ensure(db)
+        report = generate(db, grades=args.grades, classes=args.classes, per_class=args.per_class,
+                          years=args.years, to_year=args.to_year, counsels=args.counsels,
+                          seed=args.seed, password=args.password, mock=not args.no_mock)
+    finally:
+        db.close()
+    homeroom_index.invalidate()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
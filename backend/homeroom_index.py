@@ -0,0 +1,87 @@
+# homeroom_index.py
+# 담임 권한 판정용 메모리 인덱스
+# - 교사(teacher_id) → 담임 학생 id 집합 (Student.homeroom_teacher_id 기준)
+# - (사용자 user_id, 학년도) → 담임 학반 (학년, 반) 집합 (HomeroomAssignment 기준)
+# - 권한 확인은 집합 조회만 (DB 접근 없음). 매핑이 바뀌는 곳에서 invalidate() → 다음 조회 때 재구축
+# - 단일 프로세스(uvicorn 1 worker) 기준. 다중 워커면 각 워커가 자기 인덱스를 따로 가짐
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import HomeroomAssignment, Student
+
+_EMPTY: FrozenSet = frozenset()
+
+_lock = threading.Lock()
+_generation = 0          # invalidate() 마다 증가
+_built: Optional[int] = None   # 현재 인덱스를 만든 시점의 generation
+_students: FrozenSet[int] = _EMPTY
+_by_teacher: Dict[int, FrozenSet[int]] = {}
+_by_user: Dict[Tuple[int, int], FrozenSet[Tuple[int, int]]] = {}
+
+
+def invalidate() -> None:
+    """
+    학생 담임 배정/학적(학년·반) 또는 HomeroomAssignment 변경 후 호출 (커밋 이후)
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+
+
+def _ensure(db: Session) -> None:
+    global _built, _students, _by_teacher, _by_user
+    with _lock:
+        if _built == _generation:
+            return
+        gen = _generation
+
+    students: Set[int] = set()
+    by_teacher: Dict[int, Set[int]] = {}
+    for sid, tid in db.execute(select(Student.id, Student.homeroom_teacher_id)):
+        students.add(sid)
+        if tid is not None:
+            by_teacher.setdefault(tid, set()).add(sid)
+    by_user: Dict[Tuple[int, int], Set[Tuple[int, int]]] = {}
+    for uid, year, grade, class_no in db.execute(
+        select(HomeroomAssignment.teacher_user_id, HomeroomAssignment.school_year,
+               HomeroomAssignment.grade, HomeroomAssignment.class_no)
+    ):
+        by_user.setdefault((uid, year), set()).add((grade, class_no))
+
+    with _lock:
+        # 재구축 중에 invalidate 됐으면 이번 결과는 쓰되 '최신'으로 표시하지 않음 → 다음 조회 때 다시 구축
+        _students = frozenset(students)
+        _by_teacher = {k: frozenset(v) for k, v in by_teacher.items()}
+        _by_user = {k: frozenset(v) for k, v in by_user.items()}
+        _built = gen
+
+
+def student_exists(db: Session, student_id: int) -> bool:
+    _ensure(db)
+    return student_id in _students
+
+
+def homeroom_students(db: Session, teacher_id: Optional[int]) -> FrozenSet[int]:
+    """
+    teacher_id 가 담임으로 지정된 학생 id 집합
+    """
+    if teacher_id is None:
+        return _EMPTY
+    _ensure(db)
+    return _by_teacher.get(teacher_id, _EMPTY)
+
+
+def homeroom_classes(db: Session, user_id: int, school_year: Optional[int] = None) -> FrozenSet[Tuple[int, int]]:
+    """
+    user_id 에게 school_year(기본: 올해) 학년도에 배정된 담임 학반 (학년, 반) 집합
+    - 지난 학년도 배정은 포함하지 않음 (예전 담임 학반 명단 열람/재배정 방지)
+    """
+    _ensure(db)
+    return _by_user.get((user_id, school_year or datetime.now().year), _EMPTY)
@@ -0,0 +1,213 @@
+# jobs.py
+# 프로세스 내 백그라운드 작업 실행기 (대용량 업로드용)
+# - 업로드 파일은 스풀 디렉터리에 저장 후 jobs 테이블에 queued 로 기록
+# - 워커 스레드 1개가 순서대로 처리 (SQLite 쓰기 잠금 경쟁 방지)
+# - 핸들러는 청크마다 커밋하고 progress()로 진행 상황을 남김 → 잠금을 오래 잡지 않음
+# - 서버 재기동 시 미완료 작업은 processed 이후 행부터 이어서 처리
+# - 실행 선점은 UPDATE ... WHERE status='queued' 한 문장으로 원자적으로 (다중 워커/중복 예약에도 한 번만 실행)
+# - running 작업은 청크마다 heartbeat_at 을 갱신, 오래 끊긴 것만 죽은 워커의 작업으로 보고 다시 예약
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from fastapi import UploadFile
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Job
+
+log = logging.getLogger(__name__)
+
+SPOOL_DIR = os.getenv("IMPORT_SPOOL_DIR", "./spool")
+CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "200"))
+# running 인데 이 시간(초) 넘게 heartbeat 가 없으면 처리하던 워커가 죽은 것으로 봄
+STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "600"))
+
+# 핸들러: (db, job, progress) -> None
+Handler = Callable[[Session, Job, "Progress"], None]
+_handlers: Dict[str, Handler] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+_stale_timer: Optional[threading.Timer] = None
+
+
+def register(kind: str) -> Callable[[Handler], Handler]:
+    """
+    작업 종류별 핸들러 등록 데코레이터
+    """
+    def _wrap(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+    return _wrap
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import-job")
+    return _executor
+
+
+class Progress:
+    """
+    핸들러가 청크 처리 후 호출: 누적 카운트 반영 + 커밋
+    """
+    def __init__(self, db: Session, job: Job):
+        self.db = db
+        self.job = job
+        self.reasons: dict[str, str] = json.loads(job.skipped_reasons or "{}")
+
+    def set_total(self, total: int) -> None:
+        self.job.total = total
+        self.job.heartbeat_at = datetime.utcnow()
+        self.db.commit()
+
+    def __call__(self, processed: int = 0, created: int = 0, updated: int = 0,
+                 skipped_reasons: Optional[dict[str, str]] = None) -> None:
+        job = self.job
+        job.processed += processed
+        job.created += created
+        job.updated += updated
+        if skipped_reasons:
+            self.reasons.update(skipped_reasons)
+            job.skipped = len(self.reasons)
+            job.skipped_reasons = json.dumps(self.reasons, ensure_ascii=False)
+        job.heartbeat_at = datetime.utcnow()
+        self.db.commit()
+
+
+# ---------- 제출 ----------
+def spool_upload(file: UploadFile, job_id: str) -> str:
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    path = os.path.join(SPOOL_DIR, f"{job_id}{ext}")
+    with open(path, "wb") as out:
+        shutil.copyfileobj(file.file, out, length=1024 * 1024)
+    return path
+
+
+def submit(db: Session, kind: str, user_id: int,
+           file: Optional[UploadFile] = None, params: Optional[dict] = None) -> Job:
+    """
+    작업 등록 + 실행 예약. 파일이 있으면 스풀 디렉터리에 저장
+    """
+    if kind not in _handlers:
+        raise ValueError(f"알 수 없는 작업 종류: {kind}")
+    job_id = uuid.uuid4().hex
+    job = Job(
+        id=job_id, kind=kind, status="queued", user_id=user_id,
+        filename=file.filename if file else None,
+        spool_path=spool_upload(file, job_id) if file else None,
+        params=json.dumps(params or {}, ensure_ascii=False),
+    )
+    db.add(job); db.commit(); db.refresh(job)
+    _get_executor().submit(run, job_id)
+    return job
+
+
+# ---------- 실행 ----------
+def run(job_id: str) -> None:
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        claimed = db.execute(
+            update(Job).where(Job.id == job_id, Job.status == "queued")
+            .values(status="running", started_at=func.coalesce(Job.started_at, now), heartbeat_at=now)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            return  # 없는 작업이거나 다른 워커/예약이 이미 선점·완료
+        job = db.get(Job, job_id)
+        try:
+            _handlers[job.kind](db, job, Progress(db, job))
+        except Exception as e:
+            db.rollback()
+            job = db.get(Job, job_id)
+            job.status = "failed"
+            job.error = getattr(e, "detail", None) or str(e) or e.__class__.__name__
+            log.exception("job %s (%s) failed", job_id, job.kind)
+        else:
+            job.status = "done"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        if job.spool_path and os.path.exists(job.spool_path):
+            os.remove(job.spool_path)
+    finally:
+        db.close()
+
+
+def resume_pending(db: Session) -> int:
+    """
+    기동 시 남은 작업을 다시 예약 (processed 이후부터 이어서). 반환: 예약한 작업 수
+    - queued: 그대로 예약 (다른 워커도 예약해도 run 의 선점에서 한쪽만 실행)
+    - running: 다른 워커가 처리 중일 수 있으므로 heartbeat 가 STALE_SECONDS 넘게 끊긴 것만 queued 로 되돌림,
+      아직 살아 있어 보이는 것은 STALE_SECONDS 뒤에 다시 확인
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=STALE_SECONDS)
+    db.execute(
+        update(Job)
+        .where(Job.status == "running",
+               func.coalesce(Job.heartbeat_at, Job.started_at, Job.created_at) < cutoff)
+        .values(status="queued")
+    )
+    db.commit()
+    pending = [job_id for (job_id,) in
+               db.query(Job.id).filter(Job.status == "queued").order_by(Job.created_at)]
+    for job_id in pending:
+        _get_executor().submit(run, job_id)
+    if db.query(Job.id).filter(Job.status == "running").first() is not None:
+        _schedule_stale_check()
+    return len(pending)
+
+
+def _schedule_stale_check() -> None:
+    global _stale_timer
+    if _stale_timer is not None and _stale_timer.is_alive():
+        return
+    _stale_timer = threading.Timer(STALE_SECONDS, _stale_check)
+    _stale_timer.daemon = True
+    _stale_timer.start()
+
+
+def _stale_check() -> None:
+    db = SessionLocal()
+    try:
+        resume_pending(db)
+    except Exception:
+        log.exception("stale job check failed")
+    finally:
+        db.close()
+
+
+def shutdown() -> None:
+    global _executor, _stale_timer
+    if _stale_timer is not None:
+        _stale_timer.cancel()
+        _stale_timer = None
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def job_params(job: Job) -> dict:
+    return json.loads(job.params or "{}")
+
+
+def chunks(iterable, size: int = CHUNK_SIZE):
+    buf = []
+    for item in iterable:
+        buf.append(item)
+        if len(buf) >= size:
+            yield buf
+            buf = []
+    if buf:
+        yield buf
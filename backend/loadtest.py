@@ -0,0 +1,205 @@
+# loadtest.py
+# 아침 조회 시간(8:30~8:50) 부하 재현: 실행 중인 서버에 가상 담임 교사 N명이 동시에 접속
+#
+# 가상 교사 1명의 시나리오 (단계별로 지연 시간/오류 집계)
+#  1) login        : POST /auth/token
+#  2) load_class   : GET /auth/me → GET /settings/me/homeroom → GET /core/students (프런트와 같은 호출)
+#  3) attendance   : 담임 학급 학생 중 일부(--rate)에 대해 POST /attendance (지각/결석/조퇴)
+#  - 교사들은 --ramp 초 동안 고르게 도착, 단계 사이에는 --think 초 범위의 임의 대기
+# 오류 분류: http_<코드>, locked(503 "database is locked"), conflict(같은 날 중복 출결 400),
+#           timeout, connect (서버에 닿지 못함)
+# 계정: datagen 으로 만든 t001~ (앞쪽 학년×학급 수만큼이 담임)
+#
+# 사용 예
+#   DATABASE_URL=sqlite:///./bench.db uvicorn main:app --workers 1 &
+#   python loadtest.py --url http://127.0.0.1:8000 --teachers 60 --ramp 30 --out load.json
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional
+
+import httpx
+
+from bench import summarize
+
+STAGES = ("login", "load_class", "attendance")
+ATTENDANCE_TYPES = (("late", 6), ("absent", 3), ("early_leave", 1))
+
+
+class Stats:
+    """
+    단계별 요청 지연 시간/오류 종류/처리 구간
+    """
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {s: [] for s in STAGES}
+        self.errors: Dict[str, Counter] = {s: Counter() for s in STAGES}
+        self.window: Dict[str, List[float]] = {}        # 단계 → [첫 시작, 마지막 종료]
+        self.sessions: List[float] = []                  # 교사 1명의 전체 소요 시간(성공한 경우)
+
+    def record(self, stage: str, started: float, elapsed: float, error: Optional[str]) -> None:
+        w = self.window.setdefault(stage, [started, started + elapsed])
+        w[0] = min(w[0], started)
+        w[1] = max(w[1], started + elapsed)
+        if error:
+            self.errors[stage][error] += 1
+        else:
+            self.latencies[stage].append(elapsed)
+
+    def report(self) -> dict:
+        out = {}
+        for s in STAGES:
+            w = self.window.get(s, [0.0, 0.0])
+            r = summarize(self.latencies[s], w[1] - w[0], [], sum(self.errors[s].values()))
+            r.pop("queries")
+            total = r["n"] + r["errors"]
+            r["error_rate"] = round(r["errors"] / total, 4) if total else 0.0
+            r["error_kinds"] = dict(self.errors[s])
+            out[s] = r
+        ses = summarize(self.sessions, 0.0, [], 0)
+        out["session"] = {k: ses[k] for k in ("n", "p50_ms", "p95_ms", "p99_ms", "mean_ms")}
+        return out
+
+
+def _classify(resp: httpx.Response) -> Optional[str]:
+    if resp.status_code < 400:
+        return None
+    if resp.status_code == 503 and "database is locked" in resp.text:
+        return "locked"
+    if resp.status_code == 400 and "이미 존재" in resp.text:
+        return "conflict"
+    if "database is locked" in resp.text:
+        return "locked"
+    return f"http_{resp.status_code}"
+
+
+async def _send(client: httpx.AsyncClient, method: str, url: str, **kw):
+    """
+    요청 1건. 반환: (응답 또는 None, 오류 종류 또는 None)
+    """
+    try:
+        resp = await client.request(method, url, **kw)
+    except httpx.TimeoutException:
+        return None, "timeout"
+    except httpx.TransportError:
+        return None, "connect"
+    error = _classify(resp)
+    return (None if error else resp), error
+
+
+async def _call(client: httpx.AsyncClient, stats: Stats, stage: str, method: str, url: str,
+                **kw) -> Optional[httpx.Response]:
+    started = time.perf_counter()
+    resp, error = await _send(client, method, url, **kw)
+    stats.record(stage, started, time.perf_counter() - started, error)
+    return resp
+
+
+async def teacher(client: httpx.AsyncClient, stats: Stats, username: str, args, delay: float,
+                  rng: random.Random) -> None:
+    async def think():
+        await asyncio.sleep(rng.uniform(*args.think))
+
+    await asyncio.sleep(delay)
+    t0 = time.perf_counter()
+
+    # 1) 로그인
+    r = await _call(client, stats, "login", "POST", "/auth/token",
+                    data={"username": username, "password": args.password})
+    if r is None:
+        return
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    await think()
+
+    # 2) 학급 불러오기 (단계 지연 = 세 호출 합, 하나라도 실패하면 그 오류로 기록)
+    started = time.perf_counter()
+    hr, students = None, []
+    for url, params in (("/auth/me", None), ("/settings/me/homeroom", {"year": args.year}),
+                        ("/core/students", None)):
+        r, error = await _send(client, "GET", url, headers=headers, params=params)
+        if error is None and url == "/settings/me/homeroom":
+            hr = r.json()
+            error = None if hr else "no_homeroom"
+        if error:
+            stats.record("load_class", started, time.perf_counter() - started, error)
+            return
+        if url == "/core/students":
+            students = [s for s in r.json()
+                        if s["grade"] == hr["grade"] and s["class_no"] == hr["class_no"]]
+    stats.record("load_class", started, time.perf_counter() - started, None)
+    await think()
+
+    # 3) 출결 입력
+    types, weights = zip(*ATTENDANCE_TYPES)
+    for s in students:
+        if rng.random() >= args.rate:
+            continue
+        await _call(client, stats, "attendance", "POST", "/attendance", headers=headers,
+                    json={"student_id": s["id"], "date": args.date.isoformat(),
+                          "type": rng.choices(types, weights)[0]})
+    stats.sessions.append(time.perf_counter() - t0)
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.teachers, max_keepalive_connections=args.teachers)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        tasks = [teacher(client, stats, f"t{i + 1:03d}", args,
+                         rng.uniform(0, args.ramp), random.Random(rng.random()))
+                 for i in range(args.teachers)]
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        wall = time.perf_counter() - started
+    report = {
+        "meta": {"url": args.url, "teachers": args.teachers, "ramp_s": args.ramp,
+                 "think_s": list(args.think), "rate": args.rate, "date": args.date.isoformat(),
+                 "wall_s": round(wall, 2)},
+        "stages": stats.report(),
+    }
+    return report
+
+
+def _print(report: dict) -> None:
+    print(f"teachers {report['meta']['teachers']}  wall {report['meta']['wall_s']}s")
+    for s in STAGES:
+        r = report["stages"][s]
+        kinds = ", ".join(f"{k} {v}" for k, v in r["error_kinds"].items()) or "-"
+        print(f"{s:12s} n {r['n']:5d}  p50 {r['p50_ms']:8.1f}  p95 {r['p95_ms']:8.1f}  p99 {r['p99_ms']:8.1f}ms"
+              f"  {r['throughput_rps']:7.1f} req/s  err {r['error_rate'] * 100:5.1f}% ({kinds})")
+    ses = report["stages"]["session"]
+    print(f"{'session':12s} n {ses['n']:5d}  p50 {ses['p50_ms'] / 1000:8.2f}s p95 {ses['p95_ms'] / 1000:8.2f}s")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="아침 조회 시간 동시 접속 부하 테스트")
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--teachers", type=int, default=30, help="가상 담임 교사 수 (t001부터)")
+    ap.add_argument("--password", default="pass1234")
+    ap.add_argument("--ramp", type=float, default=30, help="교사 도착을 분산할 시간(초)")
+    ap.add_argument("--think", type=float, nargs=2, default=(0.2, 1.0), metavar=("MIN", "MAX"),
+                    help="단계 사이 대기 시간 범위(초)")
+    ap.add_argument("--rate", type=float, default=0.15, help="출결을 입력할 학생 비율")
+    ap.add_argument("--year", type=int, default=date.today().year, help="담임 배정 학년도")
+    ap.add_argument("--date", type=date.fromisoformat, default=date.today(), help="출결 날짜 (YYYY-MM-DD)")
+    ap.add_argument("--timeout", type=float, default=30)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="결과 JSON 저장 경로")
+    args = ap.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    _print(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
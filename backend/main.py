@@ -2,11 +2,13 @@
 # - 서버 실행: uvicorn main:app --reload
 import uvicorn
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from sqlalchemy import text, inspect
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
-from models import Base, Teacher, User
+from models import Base, MockConversion, Teacher, User
 from security import hash_password
 from database import Base, engine, SessionLocal
 from security import hash_password
@@ -18,10 +20,17 @@ from routers.attendance import router as attendance_router
 from routers.midterm import router as midterm_router
 from routers.final import router as final_router
 from routers.mock_exam import router as mock_router
+from routers.semester import router as semester_router
 from routers.settings import router as settings_router
+from routers.jobs import router as jobs_router
 # main.py (상단)
 from fastapi.middleware.cors import CORSMiddleware
 from routers.homeroom_upload import router as homeroom_upload_router 
+import mock_conversion
+import metrics
+import profiling
+import jobs
+import ai_client
 
 def _ensure_users_add_pwdreq_column(db: Session):
     insp = inspect(db.bind)
@@ -64,7 +73,40 @@ def _ensure_users_add_archived_year(db: Session):
     if "archived_year" not in cols:
         db.execute(text("ALTER TABLE users ADD COLUMN archived_year INTEGER"))
         db.commit()
-        
+
+# --- 상담 AI 요약 시각 컬럼 보강: counsel_logs.summarized_at 없으면 추가 ---
+def _ensure_counsel_logs_add_summarized_at(db: Session):
+    insp = inspect(db.bind)
+    cols = [c["name"] for c in insp.get_columns("counsel_logs")]
+    if "summarized_at" not in cols:
+        db.execute(text("ALTER TABLE counsel_logs ADD COLUMN summarized_at DATETIME"))
+        db.commit()
+
+# --- 작업 heartbeat 컬럼 보강: jobs.heartbeat_at 없으면 추가 ---
+def _ensure_jobs_add_heartbeat_at(db: Session):
+    insp = inspect(db.bind)
+    cols = [c["name"] for c in insp.get_columns("jobs")]
+    if "heartbeat_at" not in cols:
+        db.execute(text("ALTER TABLE jobs ADD COLUMN heartbeat_at DATETIME"))
+        db.commit()
+
+# --- 모의고사 변환표 학년 구분: mock_conversions.school_grade 없으면 추가 ---
+# 후보키(유니크 제약)에 학년이 들어가야 해서 ALTER 로는 안 되고 테이블을 다시 만들어 옮김 (기존 표는 학년 공통 0)
+def _ensure_mock_conversions_add_school_grade(db: Session):
+    insp = inspect(db.bind)
+    cols = [c["name"] for c in insp.get_columns("mock_conversions")]
+    if "school_grade" not in cols:
+        db.execute(text("ALTER TABLE mock_conversions RENAME TO mock_conversions_old"))
+        MockConversion.__table__.create(bind=db.connection())
+        db.execute(text(
+            "INSERT INTO mock_conversions (year, round, school_grade, subject_code, raw_score,"
+            " standard_score, percentile, grade)"
+            " SELECT year, round, 0, subject_code, raw_score, standard_score, percentile, grade"
+            " FROM mock_conversions_old"
+        ))
+        db.execute(text("DROP TABLE mock_conversions_old"))
+        db.commit()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
@@ -74,12 +116,20 @@ async def lifespan(app: FastAPI):
         _ensure_users_add_pwdreq_column(db)
         _ensure_users_add_archived_year(db)         # (이미 있으시면 유지)
         _ensure_students_add_birthdate(db)          # ✅ 새로 추가
+        _ensure_counsel_logs_add_summarized_at(db)
+        _ensure_mock_conversions_add_school_grade(db)
+        _ensure_jobs_add_heartbeat_at(db)
         _ensure_placeholder_teacher(db)
         _ensure_admin_user(db)
+        mock_conversion.load_all(db)                # 모의고사 변환표 메모리 적재
+        jobs.resume_pending(db)                     # 재기동 전 미완료 작업 이어서 처리
     finally:
         db.close()
+    await ai_client.start()                         # AI 호출용 공용 HTTP 클라이언트
     yield
-    # shutdown 시 할 일 있으면 여기에…
+    # shutdown
+    await ai_client.aclose()
+    jobs.shutdown()
 
 
 app = FastAPI(title="담임 상담 프로그램 (FastAPI)", lifespan=lifespan)
@@ -94,6 +144,19 @@ app.add_middleware(
     allow_methods=["*"],   # OPTIONS 포함
     allow_headers=["*"],
 )
+# 관리자 요청/표본 프로파일링 (metrics 안쪽 → 같은 요청의 SQL 타임라인 사용)
+app.add_middleware(profiling.ProfilingMiddleware)
+# 지연 시간/SQL 계측 (가장 바깥 → CORS 처리까지 포함한 전체 시간)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# SQLite 쓰기 잠금 대기 초과("database is locked")는 일시적 과부하 → 503 + Retry-After 로 구분해 응답
+# 그 밖의 OperationalError(스키마/SQL 오류 등)는 다시 던져 기본 500 경로에서 traceback 이 로그에 남게 함
+@app.exception_handler(OperationalError)
+async def _sqlite_locked_handler(request: Request, exc: OperationalError):
+    if "database is locked" in str(exc.orig):
+        return JSONResponse(status_code=503, content={"detail": "database is locked"},
+                            headers={"Retry-After": "1"})
+    raise exc
 
 # Routers
 app.include_router(auth_router,       prefix="/auth",          tags=["auth"])
@@ -103,8 +166,13 @@ app.include_router(attendance_router, prefix="/attendance",    tags=["attendance
 app.include_router(midterm_router,    prefix="/grades/midterm",tags=["grades: midterm"])
 app.include_router(final_router,      prefix="/grades/final",  tags=["grades: final"])
 app.include_router(mock_router,       prefix="/grades/mock",   tags=["grades: mock"])
+app.include_router(semester_router,   prefix="/grades/semester", tags=["grades: semester"])
 app.include_router(settings_router,   prefix="/settings",      tags=["settings"])
+app.include_router(jobs_router,       prefix="/jobs",          tags=["jobs"])
 app.include_router(homeroom_upload_router, prefix="", tags=["homeroom"])
+app.include_router(metrics.router)
+app.include_router(profiling.router, prefix="/admin/profiles", tags=["profiling"])
+profiling.install(app)   # 라우터 등록 후 핸들러 감싸기
 
 if __name__ == "__main__":
     uvicorn.run("main:app", reload=True)
\ No newline at end of file
@@ -0,0 +1,164 @@
+# metrics.py
+# 요청 단위 지연 시간/SQL 계측 + Prometheus 텍스트 형식 /metrics
+# - MetricsMiddleware (순수 ASGI): 경로 템플릿(/students/{student_id}) 기준으로
+#   지연 시간 히스토그램, 처리 중 요청 수, 상태 코드별 건수, 요청당 SQL 수/시간 집계
+# - 응답 헤더 Server-Timing: app(전체), db(SQL 합계, 쿼리 수) → 브라우저 개발자도구에서 확인
+# - SQL 집계는 database.py 의 엔진 이벤트 훅이 현재 요청의 SqlTrace 에 누적
+#   (QUERY_CHECK 설정 시 querycheck 의 N+1 탐지용 trace 사용)
+# - 값은 프로세스 메모리에만 보관 (재기동 시 초기화, 워커별 별도)
+# - METRICS_TOKEN 환경변수가 있으면 /metrics 에 Authorization: Bearer <토큰> 필요
+
+from __future__ import annotations
+
+import os
+import secrets
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from database import start_sql_trace, end_sql_trace
+import querycheck
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# 지연 시간 버킷 상한(초)
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "<unmatched>"   # 라우트가 없는 경로(404 등)는 한 라벨로 묶어 라벨 폭증 방지
+
+_lock = threading.Lock()
+_in_flight = 0
+_requests: Dict[Tuple[str, str, int], int] = {}          # (method, route, status) → 건수
+_latency: Dict[Tuple[str, str], List] = {}                # (method, route) → [버킷별 건수..., 합계, 건수]
+_db: Dict[Tuple[str, str], List] = {}                     # (method, route) → [쿼리 수, SQL 시간 합계]
+_slow_queries = 0
+
+
+def _route_of(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED
+
+
+def _record(method: str, route: str, status: int, elapsed: float, trace) -> None:
+    global _slow_queries
+    key = (method, route)
+    with _lock:
+        _requests[(method, route, status)] = _requests.get((method, route, status), 0) + 1
+        h = _latency.get(key)
+        if h is None:
+            h = _latency[key] = [0] * (len(BUCKETS) + 1) + [0.0, 0]
+        h[bisect_left(BUCKETS, elapsed)] += 1
+        h[-2] += elapsed
+        h[-1] += 1
+        d = _db.setdefault(key, [0, 0.0])
+        d[0] += trace.count
+        d[1] += trace.total
+        _slow_queries += trace.slow
+
+
+def _server_timing(elapsed: float, trace) -> bytes:
+    return (f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={trace.total * 1000:.1f};desc="{trace.count} queries"').encode("latin-1")
+
+
+class MetricsMiddleware:
+    """
+    HTTP 요청마다 SqlTrace 를 열고, 응답 시작 시 Server-Timing 헤더를 붙이고, 끝나면 집계에 반영
+    - 스트리밍 응답은 헤더 시점까지의 값이 Server-Timing 에, 본문 전송까지 포함한 값이 집계에 들어감
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        trace, token = start_sql_trace(querycheck.new_trace())
+        if isinstance(trace, querycheck.QueryCheckTrace):
+            trace.endpoint = f"{scope['method']} {scope['path']}"
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(time.perf_counter() - started, trace)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        with _lock:
+            _in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            with _lock:
+                _in_flight -= 1
+            end_sql_trace(token)
+            route = _route_of(scope)
+            _record(scope["method"], route, status, time.perf_counter() - started, trace)
+            querycheck.finish(trace, f"{scope['method']} {route}")
+
+
+# ---------- Prometheus 출력 ----------
+def _label(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render() -> str:
+    with _lock:
+        requests = dict(_requests)
+        latency = {k: list(v) for k, v in _latency.items()}
+        db = {k: list(v) for k, v in _db.items()}
+        in_flight, slow = _in_flight, _slow_queries
+
+    out = [
+        "# HELP http_requests_in_flight 처리 중인 HTTP 요청 수",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {in_flight}",
+        "# HELP http_requests_total 완료된 HTTP 요청 수",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route, status), n in sorted(requests.items()):
+        out.append(f'http_requests_total{{method="{method}",route="{_label(route)}",status="{status}"}} {n}')
+
+    out += ["# HELP http_request_duration_seconds HTTP 요청 처리 시간",
+            "# TYPE http_request_duration_seconds histogram"]
+    for (method, route), h in sorted(latency.items()):
+        labels = f'method="{method}",route="{_label(route)}"'
+        acc = 0
+        for le, n in zip(BUCKETS, h):
+            acc += n
+            out.append(f'http_request_duration_seconds_bucket{{{labels},le="{le}"}} {acc}')
+        out.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {h[-1]}')
+        out.append(f"http_request_duration_seconds_sum{{{labels}}} {h[-2]:.6f}")
+        out.append(f"http_request_duration_seconds_count{{{labels}}} {h[-1]}")
+
+    out += ["# HELP db_queries_total 요청 처리 중 실행된 SQL 수",
+            "# TYPE db_queries_total counter"]
+    for (method, route), (n, _) in sorted(db.items()):
+        out.append(f'db_queries_total{{method="{method}",route="{_label(route)}"}} {n}')
+    out += ["# HELP db_query_duration_seconds_total 요청 처리 중 SQL 실행 시간 합계",
+            "# TYPE db_query_duration_seconds_total counter"]
+    for (method, route), (_, t) in sorted(db.items()):
+        out.append(f'db_query_duration_seconds_total{{method="{method}",route="{_label(route)}"}} {t:.6f}')
+    out += ["# HELP db_slow_queries_total 기준 시간(SQL_SLOW_MS) 이상 걸린 SQL 수",
+            "# TYPE db_slow_queries_total counter",
+            f"db_slow_queries_total {slow}"]
+    return "\n".join(out) + "\n"
+
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics(request: Request):
+    if METRICS_TOKEN:
+        auth = request.headers.get("authorization", "")
+        if not secrets.compare_digest(auth, f"Bearer {METRICS_TOKEN}"):
+            raise HTTPException(status_code=401, detail="메트릭 토큰이 올바르지 않습니다.")
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
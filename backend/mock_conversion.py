@@ -0,0 +1,204 @@
+# mock_conversion.py
+# 모의고사 원점수 → 표준점수/백분위/등급 변환표 (메모리 상주)
+# - 키: (year, round, school_grade, subject_code), 값: 원점수 0~100 인덱스 배열 → O(1) 조회
+#   school_grade 는 응시 학년(같은 회차라도 학년별로 분포가 다름), 0 은 학년 공통 표(학년 구분 없이 업로드한 표)
+# - 앱 기동 시 mock_conversions 테이블 전체를 읽어 적재, 업로드/산출 시 DB에서 해당 키를 교체한 뒤 다시 적재
+# - 다중 워커: 조회 전에 sync(db)로 DB 세대(행 수, 최대 id)를 확인해 다른 워커가 바꿨으면 다시 적재
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, delete, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from models import MockConversion, MockExam, MockExamSubjectScore, Student, StudentYear
+from score_stats import rank_stats
+
+MAX_RAW = 100
+
+# 표준점수 척도: 국어/수학 평균 100·표준편차 20, 탐구 평균 50·표준편차 10
+STANDARD_SCALE = {"KOR": (100, 20), "MATH": (100, 20),
+                  "SOC1": (50, 10), "SOC2": (50, 10), "SCI1": (50, 10), "SCI2": (50, 10)}
+# 절대평가 과목: (1등급 하한, 구간 폭) — 영어 90점↑ 1등급·10점 단위, 한국사 40점↑ 1등급·5점 단위
+ABSOLUTE_BAND = {"ENG": (90, 10), "HIST": (40, 5)}
+
+ALL_GRADES = 0  # 학년 공통 표
+
+Key = Tuple[int, int, int, str]  # (year, round, school_grade, subject_code)
+Entry = Optional[Tuple[Optional[int], Optional[int], Optional[int]]]  # (표준점수, 백분위, 등급)
+
+_tables: Dict[Key, List[Entry]] = {}
+_lock = threading.Lock()
+_generation: Optional[Tuple[int, Optional[int]]] = None  # 메모리 표가 반영한 DB 세대 (행 수, 최대 id)
+
+
+def _fill(points: Dict[int, Tuple[Optional[int], Optional[int], Optional[int]]]) -> List[Entry]:
+    """
+    {원점수: 값} → 길이 101 배열. 표에 없는 원점수는 바로 아래 원점수 값으로 채움
+    (가장 낮은 원점수보다 아래는 최저 원점수 값)
+    """
+    table: List[Entry] = [None] * (MAX_RAW + 1)
+    if not points:
+        return table
+    known = sorted(points)
+    cur = points[known[0]]
+    for raw in range(MAX_RAW + 1):
+        if raw in points:
+            cur = points[raw]
+        table[raw] = cur
+    return table
+
+
+# ---------- 적재 ----------
+def _db_generation(db: Session) -> Tuple[int, Optional[int]]:
+    # 교체 저장은 삭제 후 새 id(AUTOINCREMENT, 재사용 안 함)로 삽입하므로 (행 수, 최대 id)가 바뀜
+    count, max_id = db.execute(select(func.count(), func.max(MockConversion.id))).one()
+    return count, max_id
+
+
+def load_all(db: Session) -> int:
+    """
+    DB의 변환표 전체를 메모리에 적재 (기동 시, 다른 워커의 변경 감지 시). 반환: 표 개수
+    """
+    global _generation
+    generation = _db_generation(db)
+    rows = db.execute(
+        select(MockConversion.year, MockConversion.round, MockConversion.school_grade,
+               MockConversion.subject_code, MockConversion.raw_score,
+               MockConversion.standard_score, MockConversion.percentile, MockConversion.grade)
+    ).all()
+    grouped: Dict[Key, Dict[int, tuple]] = {}
+    for y, rnd, g, code, raw, std, pct, grade in rows:
+        grouped.setdefault((y, rnd, g, code), {})[raw] = (std, pct, grade)
+    tables = {key: _fill(points) for key, points in grouped.items()}
+    with _lock:
+        _tables.clear()
+        _tables.update(tables)
+        _generation = generation
+    return len(grouped)
+
+
+def sync(db: Session) -> None:
+    """
+    메모리 표가 DB와 다르면(다른 워커가 업로드/산출/초기화) 다시 적재. 조회 엔드포인트 앞에서 호출
+    """
+    if _db_generation(db) != _generation:
+        load_all(db)
+
+
+def save_tables(db: Session, rows: Iterable[dict]) -> List[Key]:
+    """
+    변환표 행들(year, round, school_grade, subject_code, raw_score, standard_score, percentile, grade)을
+    키 단위로 교체 저장하고 메모리도 다시 적재. 커밋 포함. 반환: 교체된 키 목록
+    - school_grade 가 없으면 학년 공통 표(ALL_GRADES)
+    """
+    grouped: Dict[Key, Dict[int, tuple]] = {}
+    for r in rows:
+        key = (r["year"], r["round"], r.get("school_grade") or ALL_GRADES, r["subject_code"])
+        grouped.setdefault(key, {})[r["raw_score"]] = (
+            r.get("standard_score"), r.get("percentile"), r.get("grade"))
+    if not grouped:
+        return []
+
+    keys = list(grouped)
+    db.execute(delete(MockConversion).where(
+        tuple_(MockConversion.year, MockConversion.round, MockConversion.school_grade,
+               MockConversion.subject_code).in_(keys)))
+    values = [{"year": y, "round": rnd, "school_grade": g, "subject_code": code, "raw_score": raw,
+               "standard_score": std, "percentile": pct, "grade": grade}
+              for (y, rnd, g, code), points in grouped.items()
+              for raw, (std, pct, grade) in points.items()]
+    db.execute(MockConversion.__table__.insert(), values)
+    db.commit()
+    # 해당 키만 바꾸면 그사이 다른 워커가 바꾼 표를 놓친 채 세대만 앞서게 되므로 전체 재적재 (표 수가 적어 가벼움)
+    load_all(db)
+    return keys
+
+
+# ---------- 산출 ----------
+def derive_points(code: str, raws: np.ndarray) -> Dict[int, tuple]:
+    """
+    저장된 원점수 분포로 변환값 산출
+    - 절대평가 과목(ENG/HIST): 구간 등급만
+    - 그 외: 표준점수(척도 변환), 백분위·등급(중간석차 기준, 누적 4/11/23/40/60/77/89/96%)
+    """
+    points: Dict[int, tuple] = {}
+    if raws.size == 0:
+        return points
+    if code in ABSOLUTE_BAND:
+        first_cut, band = ABSOLUTE_BAND[code]
+        for raw in range(MAX_RAW + 1):
+            grade = 1 if raw >= first_cut else min(9, (first_cut - 1 - raw) // band + 2)
+            points[raw] = (None, None, grade)
+        return points
+
+    mean, sd = STANDARD_SCALE.get(code, (50, 10))
+    vals = raws.astype(float)
+    st = rank_stats(vals)
+    std = vals.std()
+    z = (vals - vals.mean()) / std if std > 0 else np.zeros(vals.size)
+    for i, raw in enumerate(raws.tolist()):
+        if raw in points:
+            continue
+        points[int(raw)] = (int(round(mean + sd * z[i])),
+                            int(round(st["percentile"][i])),
+                            int(st["level"][i]))
+    return points
+
+
+def derive_tables(db: Session, year: int, round: int,
+                  subject_code: Optional[str] = None,
+                  school_grade: Optional[int] = None) -> List[Key]:
+    """
+    (year, round) 회차의 저장 점수로 학년·과목별 변환표를 산출해 저장. 반환: 저장된 키 목록
+    - 같은 회차라도 학년마다 시험/응시 집단이 다르므로 그 학년도 학년 기준으로 나눠 산출
+    """
+    grade_col = func.coalesce(StudentYear.grade, Student.grade)  # 그 학년도 학적 기록, 없으면 현재 학년
+    q = (select(grade_col, MockExamSubjectScore.subject_code, MockExamSubjectScore.score)
+         .join(MockExam, MockExam.id == MockExamSubjectScore.exam_id)
+         .join(Student, Student.id == MockExam.student_id)
+         .outerjoin(StudentYear, and_(StudentYear.student_id == Student.id,
+                                      StudentYear.school_year == MockExam.year))
+         .where(MockExam.year == year, MockExam.round == round))
+    if subject_code is not None:
+        q = q.where(MockExamSubjectScore.subject_code == subject_code)
+    if school_grade is not None:
+        q = q.where(grade_col == school_grade)
+    by_key: Dict[Tuple[int, str], List[int]] = {}
+    for g, code, score in db.execute(q):
+        by_key.setdefault((g, code), []).append(score)
+
+    rows: List[dict] = []
+    for (g, code), scores in by_key.items():
+        for raw, (std, pct, grade) in derive_points(code, np.asarray(scores, dtype=np.int64)).items():
+            rows.append({"year": year, "round": round, "school_grade": g, "subject_code": code,
+                         "raw_score": raw, "standard_score": std, "percentile": pct, "grade": grade})
+    return save_tables(db, rows)
+
+
+# ---------- 조회 ----------
+def lookup(year: int, round: int, school_grade: Optional[int], subject_code: str, raw: int) -> Optional[dict]:
+    """
+    응시 학년 표 우선, 없으면 학년 공통 표
+    """
+    table = _tables.get((year, round, school_grade, subject_code)) or _tables.get(
+        (year, round, ALL_GRADES, subject_code))
+    if table is None or not (0 <= raw <= MAX_RAW):
+        return None
+    entry = table[raw]
+    if entry is None:
+        return None
+    std, pct, grade = entry
+    return {"standard_score": std, "percentile": pct, "grade": grade}
+
+
+def get_table(year: int, round: int, school_grade: int, subject_code: str) -> Optional[List[Entry]]:
+    return _tables.get((year, round, school_grade, subject_code))
+
+
+def loaded_keys() -> List[Key]:
+    with _lock:
+        return sorted(_tables)
@@ -1,6 +1,6 @@
 # models.py
 from sqlalchemy import (
-    Integer, Boolean, String, ForeignKey, UniqueConstraint, Text, DateTime, Date, func, Index
+    Integer, Boolean, String, ForeignKey, UniqueConstraint, Text, DateTime, Date, Float, func, Index
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from database import Base
@@ -66,6 +66,8 @@ class CounselLog(Base):
     title: Mapped[str | None] = mapped_column(String(120), nullable=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # AI 요약 시각 (직접 입력한 요약이면 None). updated_at 이 이보다 뒤면 요약이 낡은 것
+    summarized_at: Mapped[DateTime | None] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
     updated_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
@@ -141,6 +143,57 @@ class FinalScore(Base):
 
 # models.py (추가)
 
+class SubjectWeight(Base):
+    """
+    과목별 학기 성적 반영 비율(%) 설정
+    - 후보키: (subject_id, year, term)
+    - midterm_ratio + final_ratio + performance_ratio = 100
+    """
+    __tablename__ = "subject_weights"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    subject_id: Mapped[int] = mapped_column(ForeignKey("subjects.id"), nullable=False, index=True)
+    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    term: Mapped[int] = mapped_column(Integer, nullable=False)  # 1 or 2
+    midterm_ratio: Mapped[int] = mapped_column(Integer, nullable=False, default=50)
+    final_ratio: Mapped[int] = mapped_column(Integer, nullable=False, default=50)
+    performance_ratio: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("subject_id", "year", "term", name="uq_subject_weight_unique"),
+    )
+
+    subject = relationship("Subject")
+
+
+class SemesterScore(Base):
+    """
+    학기 성적(파생 테이블): 중간/기말을 SubjectWeight 비율로 합산한 환산 점수와 성취도(A~E)
+    - 후보키: (student_id, subject_id, year, term)
+    - 중간/기말 업서트 시 해당 범위만 증분 갱신 (achievement.refresh_semester_scores)
+    """
+    __tablename__ = "semester_scores"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id"), nullable=False, index=True)
+    subject_id: Mapped[int] = mapped_column(ForeignKey("subjects.id"), nullable=False, index=True)
+    year: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    term: Mapped[int] = mapped_column(Integer, nullable=False)
+    midterm: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    final: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    score: Mapped[float | None] = mapped_column(Float, nullable=True)           # 0~100 환산
+    achievement: Mapped[str | None] = mapped_column(String(1), nullable=True)   # A/B/C/D/E
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("student_id", "subject_id", "year", "term", name="uq_semester_unique"),
+    )
+
+    student = relationship("Student")
+    subject = relationship("Subject")
+
+# models.py (추가)
+
 class MockExam(Base):
     """
     모의고사 '한 회차' 정보
@@ -185,6 +238,32 @@ class MockExamSubjectScore(Base):
 
     exam = relationship("MockExam", back_populates="scores")
 
+class MockConversion(Base):
+    """
+    모의고사 원점수 → 표준점수/백분위/등급 변환표
+    - 후보키: (year, round, school_grade, subject_code, raw_score)
+    - 평가원/교육청 공개 표를 업로드하거나, 저장된 점수 분포로 산출
+    - school_grade: 응시 학년(1~3), 0 = 학년 공통 표
+    - id 는 재사용하지 않음(AUTOINCREMENT): 워커 간 변경 감지에 최대 id 사용
+    """
+    __tablename__ = "mock_conversions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    year: Mapped[int] = mapped_column(Integer, nullable=False)
+    round: Mapped[int] = mapped_column(Integer, nullable=False)
+    school_grade: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    subject_code: Mapped[str] = mapped_column(String(10), nullable=False)
+    raw_score: Mapped[int] = mapped_column(Integer, nullable=False)
+    standard_score: Mapped[int | None] = mapped_column(Integer, nullable=True)  # 절대평가 과목은 없음
+    percentile: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    grade: Mapped[int | None] = mapped_column(Integer, nullable=True)           # 1~9
+
+    __table_args__ = (
+        UniqueConstraint("year", "round", "school_grade", "subject_code", "raw_score",
+                         name="uq_mock_conversion_unique"),
+        {"sqlite_autoincrement": True},
+    )
+
 class User(Base):
     """
     시스템 접근 계정
@@ -250,4 +329,54 @@ class HomeroomAssignment(Base):
 
     __table_args__ = (
         UniqueConstraint("school_year", "grade", "class_no", name="uq_homeroom_year_grade_class"),
-    )
\ No newline at end of file
+    )
+
+class StudentYear(Base):
+    """
+    학년도별 학적 기록 (학년/반/번호)
+    - 후보키: (student_id, school_year)
+    - students 의 학년/반은 '현재' 값이라 학년도 전환(rollover) 직전에 끝나는 학년도 값을 여기에 보존
+    - 기록이 없는 학년도(진행 중인 학년도 포함)는 students 의 현재 값을 사용
+    """
+    __tablename__ = "student_years"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id"), nullable=False, index=True)
+    school_year: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    grade: Mapped[int] = mapped_column(Integer, nullable=False)
+    class_no: Mapped[int] = mapped_column(Integer, nullable=False)
+    number: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("student_id", "school_year", name="uq_student_year_unique"),
+    )
+
+class Job(Base):
+    """
+    백그라운드 작업(대용량 업로드 등) 진행 상황
+    - status: queued | running | done | failed
+    - 청크 단위로 processed/created/updated/skipped 갱신 → GET /jobs/{id} 로 폴링
+    - heartbeat_at: 처리 중인 워커가 살아 있는지 판단 (오래 끊긴 running 만 재기동 시 다시 예약)
+    """
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(30), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued", index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+    filename: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    spool_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    params: Mapped[str | None] = mapped_column(Text, nullable=True)   # JSON
+
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    skipped: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    skipped_reasons: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON {행키: 사유}
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # running 중 마지막 진행 기록
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
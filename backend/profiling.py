@@ -0,0 +1,359 @@
+# profiling.py
+# 요청 단위 프로파일링 (관리자 전용 + 표본 추출)
+# - 켜는 방법
+#     관리자 토큰 + 헤더 X-Profile: 1 (또는 sample / cprofile) 또는 쿼리 ?_profile=1
+#     PROFILE_SAMPLE_RATE(0~1) 비율로 임의 요청을 표본 프로파일링 (기본 0 = 끔)
+#   관리자가 아닌 요청의 헤더/쿼리는 조용히 무시
+# - 방식
+#     sample  : 핸들러를 실행하는 스레드를 PROFILE_INTERVAL 초마다 들여다보는 표본 프로파일러 (기본)
+#               → 접힌 스택(.folded: flamegraph.pl / speedscope 에서 바로 열림)
+#     cprofile: 핸들러 호출을 cProfile 로 감쌈 → .pstats (python -m pstats, snakeviz 등)
+#   async 핸들러는 이벤트 루프 스레드를 보므로 동시에 돌던 다른 요청의 코루틴이 섞일 수 있음
+# - 결과: PROFILE_DIR 에 <id>.json(요청 정보 + SQL 타임라인 + 상위 함수) 과 .folded/.pstats 저장,
+#   최근 PROFILE_KEEP 건만 보관. 응답 헤더 X-Profile-Id 로 id 전달
+# - SQL 타임라인은 database.py 엔진 훅이 현재 요청의 SqlTrace 에 남긴 (시작, 소요, SQL)
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from fastapi.routing import APIRoute
+
+from database import current_sql_trace
+from routers.auth import role_required
+from security import decode_token
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
+SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.002"))
+MODES = ("sample", "cprofile")
+QUERY_FLAG = "_profile"
+TOP_N = 25
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_active: ContextVar[Optional["Profile"]] = ContextVar("profile", default=None)
+_write_lock = threading.Lock()
+
+
+# ---------- 표본 프로파일러 ----------
+def _short_path(fn: str) -> str:
+    if fn.startswith(_BASE_DIR):
+        return os.path.relpath(fn, _BASE_DIR)
+    if "site-packages" + os.sep in fn:
+        return fn.split("site-packages" + os.sep, 1)[1]
+    return os.path.basename(fn)
+
+
+def _frame_label(code) -> str:
+    # 접힌 스택 형식: 프레임 구분자 ';', 마지막 공백 뒤가 횟수 → 둘 다 프레임 이름에서 제거
+    return f"{_short_path(code.co_filename)}:{code.co_name}".replace(" ", "_").replace(";", ":")
+
+
+class Sampler(threading.Thread):
+    """
+    등록된 스레드들의 현재 스택을 interval 초마다 기록 (접힌 스택 → 횟수)
+    """
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.threads: Set[int] = set()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._halt = threading.Event()
+
+    def run(self) -> None:
+        while not self._halt.wait(self.interval):
+            frames = sys._current_frames()
+            for tid in list(self.threads):
+                f = frames.get(tid)
+                if f is None:
+                    continue
+                stack = []
+                while f is not None:
+                    stack.append(_frame_label(f.f_code))
+                    f = f.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def stop(self) -> None:
+        self._halt.set()
+        self.join()
+
+
+class Profile:
+    """
+    프로파일링 중인 요청 1건
+    """
+    def __init__(self, mode: str, trigger: str):
+        self.id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:8]
+        self.mode = mode
+        self.trigger = trigger
+        self.started = time.perf_counter()
+        self.sampler = Sampler(INTERVAL) if mode == "sample" else None
+        self.cprofile = cProfile.Profile() if mode == "cprofile" else None
+        if self.sampler:
+            self.sampler.start()
+
+    def enter(self) -> None:
+        # 핸들러를 실행하는 스레드에서 호출
+        if self.sampler:
+            self.sampler.threads.add(threading.get_ident())
+        elif self.cprofile:
+            self.cprofile.enable()
+
+    def exit(self) -> None:
+        # 핸들러가 끝난 스레드는 다른 요청을 처리할 수 있으므로 표본 대상에서 제외
+        if self.sampler:
+            self.sampler.threads.discard(threading.get_ident())
+        elif self.cprofile:
+            self.cprofile.disable()
+
+    def finish(self, method: str, path: str, route: str, status: int) -> dict:
+        duration = time.perf_counter() - self.started
+        if self.sampler:
+            self.sampler.stop()
+        trace = current_sql_trace()
+        meta = {
+            "id": self.id, "created_at": datetime.now().isoformat(timespec="seconds"),
+            "method": method, "path": path, "route": route, "status": status,
+            "duration_ms": round(duration * 1000, 2), "mode": self.mode, "trigger": self.trigger,
+            "sql": {
+                "count": trace.count if trace else 0,
+                "total_ms": round(trace.total * 1000, 2) if trace else 0.0,
+                # 시작 시각은 요청 시작 기준(ms)
+                "timeline": [{"start_ms": round(s * 1000, 2), "duration_ms": round(d * 1000, 3),
+                              "statement": " ".join(stmt.split())}
+                             for s, d, stmt in (trace.statements if trace else [])],
+            },
+        }
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, self.id)
+        if self.sampler:
+            meta.update(samples=self.sampler.samples, interval_ms=INTERVAL * 1000,
+                        top=_top_functions(self.sampler.stacks), files=["folded"])
+            with open(base + ".folded", "w", encoding="utf-8") as f:
+                for stack, n in self.sampler.stacks.most_common():
+                    f.write(f"{stack} {n}\n")
+        else:
+            self.cprofile.dump_stats(base + ".pstats")
+            meta.update(top=_top_pstats(self.cprofile), files=["pstats"])
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        _prune()
+        return meta
+
+
+def _top_functions(stacks: Counter) -> List[dict]:
+    """
+    접힌 스택에서 함수별 self(맨 위에 있던 횟수)/total(스택에 있던 횟수)
+    """
+    self_n, total_n = Counter(), Counter()
+    for stack, n in stacks.items():
+        frames = stack.split(";")
+        self_n[frames[-1]] += n
+        for fr in set(frames):
+            total_n[fr] += n
+    return [{"function": fr, "self": self_n[fr], "total": n} for fr, n in total_n.most_common(TOP_N)]
+
+
+def _top_pstats(prof: cProfile.Profile) -> List[dict]:
+    import pstats
+
+    st = pstats.Stats(prof)
+    rows = []
+    for (fn, line, name), (cc, nc, tt, ct, _) in st.stats.items():
+        rows.append({"function": f"{_short_path(fn)}:{line}:{name}",
+                     "calls": nc, "self_ms": round(tt * 1000, 3), "total_ms": round(ct * 1000, 3)})
+    rows.sort(key=lambda r: -r["total_ms"])
+    return rows[:TOP_N]
+
+
+def _prune() -> None:
+    """
+    최근 PROFILE_KEEP 건만 남기고 오래된 프로파일(같은 id 의 파일 전부) 삭제
+    """
+    with _write_lock:
+        metas = sorted(glob.glob(os.path.join(PROFILE_DIR, "*.json")), key=os.path.getmtime, reverse=True)
+        for old in metas[PROFILE_KEEP:]:
+            for fp in glob.glob(old[:-len(".json")] + ".*"):
+                try:
+                    os.remove(fp)
+                except OSError:
+                    pass
+
+
+# ---------- 요청 진입: 미들웨어 ----------
+def _requested_mode(scope) -> Optional[str]:
+    """
+    헤더/쿼리로 요청된 방식 (관리자 토큰일 때만). 없거나 권한 없으면 None
+    """
+    headers = dict(scope.get("headers") or [])
+    flag = headers.get(b"x-profile", b"").decode("latin-1").strip().lower()
+    if not flag:
+        qs = scope.get("query_string", b"").decode("latin-1")
+        for part in qs.split("&"):
+            k, _, v = part.partition("=")
+            if k == QUERY_FLAG:
+                flag = (v or "1").lower()
+                break
+    if not flag or flag in ("0", "false", "off"):
+        return None
+    auth = headers.get(b"authorization", b"").decode("latin-1")
+    if not auth.lower().startswith("bearer "):
+        return None
+    try:
+        if decode_token(auth[7:].strip()).get("role") != "admin":
+            return None
+    except Exception:
+        return None
+    return flag if flag in MODES else "sample"
+
+
+class ProfilingMiddleware:
+    """
+    프로파일링 대상 요청이면 Profile 을 열고(contextvar), 끝나면 결과 저장 + X-Profile-Id 헤더
+    - 실제 측정 범위는 install() 로 감싼 핸들러 호출 (의존성 해석/직렬화 제외)
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode, trigger = _requested_mode(scope), "request"
+        if mode is None and SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE:
+            mode, trigger = "sample", "sampled"
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace = current_sql_trace()
+        if trace is not None:
+            trace.keep = True
+        prof = Profile(mode, trigger)
+        token = _active.set(prof)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": list(message.get("headers", []))
+                           + [(b"x-profile-id", prof.id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active.reset(token)
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            await asyncio.to_thread(prof.finish, scope["method"], scope["path"], route, status)
+
+
+# ---------- 핸들러 감싸기 ----------
+def _wrap(call):
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def wrapper(*args, **kwargs):
+            prof = _active.get()
+            if prof is None:
+                return await call(*args, **kwargs)
+            prof.enter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                prof.exit()
+    else:
+        @functools.wraps(call)
+        def wrapper(*args, **kwargs):
+            prof = _active.get()
+            if prof is None:
+                return call(*args, **kwargs)
+            prof.enter()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                prof.exit()
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+def install(app) -> None:
+    """
+    모든 라우트 핸들러를 프로파일링 래퍼로 교체 (라우터 등록이 끝난 뒤 호출)
+    - 동기/비동기 구분(실행 방식)은 FastAPI 가 라우트 생성 때 정해 두므로 원래 함수와 같은 종류로 감쌈
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(route.dependant.call, "__profiled__", False):
+            route.dependant.call = _wrap(route.dependant.call)
+
+
+# ---------- 관리자 조회 ----------
+router = APIRouter()
+
+
+def _load_meta(profile_id: str) -> dict:
+    if not profile_id.replace("-", "").isalnum():
+        raise HTTPException(status_code=400, detail="잘못된 프로파일 id 입니다.")
+    fp = os.path.join(PROFILE_DIR, profile_id + ".json")
+    if not os.path.exists(fp):
+        raise HTTPException(status_code=404, detail="프로파일이 존재하지 않습니다.")
+    with open(fp, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@router.get("", dependencies=[Depends(role_required("admin"))])
+def list_profiles(limit: int = Query(50, ge=1, le=500)):
+    """
+    최근 프로파일 목록 (요약: SQL 타임라인/상위 함수 제외)
+    """
+    metas = sorted(glob.glob(os.path.join(PROFILE_DIR, "*.json")), key=os.path.getmtime, reverse=True)
+    out: List[Dict] = []
+    for fp in metas[:limit]:
+        try:
+            with open(fp, encoding="utf-8") as f:
+                m = json.load(f)
+        except (OSError, ValueError):
+            continue
+        out.append({k: m[k] for k in ("id", "created_at", "method", "path", "route", "status",
+                                      "duration_ms", "mode", "trigger") if k in m}
+                   | {"sql_count": m["sql"]["count"], "sql_ms": m["sql"]["total_ms"]})
+    return out
+
+
+@router.get("/{profile_id}", dependencies=[Depends(role_required("admin"))])
+def get_profile(profile_id: str):
+    """
+    프로파일 상세 (요청 정보, SQL 타임라인, 상위 함수)
+    """
+    return _load_meta(profile_id)
+
+
+@router.get("/{profile_id}/download", dependencies=[Depends(role_required("admin"))])
+def download_profile(profile_id: str):
+    """
+    원본 파일: sample → .folded (flamegraph), cprofile → .pstats
+    """
+    meta = _load_meta(profile_id)
+    ext = meta["files"][0]
+    return FileResponse(os.path.join(PROFILE_DIR, f"{profile_id}.{ext}"),
+                        media_type="text/plain" if ext == "folded" else "application/octet-stream",
+                        filename=f"{profile_id}.{ext}")
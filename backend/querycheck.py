@@ -0,0 +1,157 @@
+# querycheck.py
+# N+1 쿼리 탐지 (개발/테스트용)
+# - 요청 1건 동안 실행된 SQL 을 정규화 문장(리터럴/파라미터 자리 → ?) 기준으로 묶어 횟수와 호출 위치 집계
+# - 같은 문장이 QUERY_REPEAT_LIMIT 회를 넘으면
+#     QUERY_CHECK=warn  → 요청 종료 시 경고 로그 (엔드포인트, 문장, 호출 위치별 횟수)
+#     QUERY_CHECK=raise → 넘는 순간 QueryBudgetExceeded 예외 (테스트에서 바로 실패)
+#     QUERY_CHECK=off   → 집계 안 함 (기본, 운영)
+# - executemany(일괄 INSERT/UPDATE)는 1회로 셈
+# - 테스트에서 쿼리 예산 확인:
+#     with querycheck.capture() as reports:
+#         client.post("/core/enrollments", json=...)
+#     assert reports[-1].count <= 5 and reports[-1].max_repeat <= 1
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from database import SqlTrace
+
+MODE = os.getenv("QUERY_CHECK", "off").lower()          # off | warn | raise
+REPEAT_LIMIT = int(os.getenv("QUERY_REPEAT_LIMIT", "10"))
+
+log = logging.getLogger("sql.nplus1")
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_SKIP_FILES = {os.path.join(_BASE_DIR, "database.py"), os.path.abspath(__file__)}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+_COLUMNS = re.compile(r"^SELECT .+? FROM ", re.IGNORECASE)
+
+_captures: List[List["Report"]] = []
+_captures_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def normalize(statement: str) -> str:
+    """
+    값만 다른 문장을 같은 문장으로 묶기 위한 정규화
+    """
+    s = _STRING.sub("?", statement)
+    s = _NUMBER.sub("?", s)
+    s = _PARAM_LIST.sub("(?...)", s)
+    return _SPACE.sub(" ", s).strip()
+
+
+def _call_site() -> str:
+    """
+    SQL 을 일으킨 앱 코드 위치 (라이브러리/계측 코드를 건너뛴 첫 backend 프레임)
+    """
+    f = sys._getframe(2)
+    while f is not None:
+        fn = f.f_code.co_filename
+        if fn.startswith(_BASE_DIR) and fn not in _SKIP_FILES:
+            return f"{os.path.relpath(fn, _BASE_DIR)}:{f.f_lineno} in {f.f_code.co_name}"
+        f = f.f_back
+    return "?"
+
+
+class QueryCheckTrace(SqlTrace):
+    """
+    SqlTrace + 정규화 문장별 횟수/호출 위치
+    """
+    def __init__(self, keep: bool = False, limit: int = REPEAT_LIMIT, fail: bool = False):
+        super().__init__(keep)
+        self.limit = limit
+        self.fail = fail
+        self.endpoint = ""
+        self.groups: Dict[str, Counter] = {}
+
+    def add(self, start: float, duration: float, statement: str) -> None:
+        super().add(start, duration, statement)
+        key = normalize(statement)
+        sites = self.groups.setdefault(key, Counter())
+        sites[_call_site()] += 1
+        if self.fail and sum(sites.values()) == self.limit + 1:
+            raise QueryBudgetExceeded(_describe(self.endpoint, key, sites))
+
+
+@dataclass
+class Report:
+    endpoint: str
+    count: int
+    total: float
+    repeats: List[Tuple[str, int, Dict[str, int]]] = field(default_factory=list)   # (문장, 횟수, 위치별 횟수)
+
+    @property
+    def max_repeat(self) -> int:
+        return max((n for _, n, _ in self.repeats), default=0)
+
+
+def _describe(endpoint: str, statement: str, sites: Counter) -> str:
+    where = ", ".join(f"{site} ×{n}" for site, n in sites.most_common(3))
+    short = _COLUMNS.sub("SELECT … FROM ", statement)   # 긴 컬럼 목록은 생략
+    return f"N+1 의심 {endpoint}: 같은 쿼리 {sum(sites.values())}회 [{short[:200]}] ← {where}"
+
+
+def enabled() -> bool:
+    return MODE in ("warn", "raise") or bool(_captures)
+
+
+def new_trace() -> Optional[QueryCheckTrace]:
+    """
+    탐지가 켜져 있으면 요청용 trace, 아니면 None (기본 SqlTrace 사용)
+    """
+    if not enabled():
+        return None
+    return QueryCheckTrace(fail=(MODE == "raise"))
+
+
+def finish(trace: SqlTrace, endpoint: str) -> None:
+    """
+    요청 종료 시 호출: 한도 초과 문장 경고 로그 + capture() 중이면 보고서 추가
+    """
+    if not isinstance(trace, QueryCheckTrace):
+        return
+    repeats = sorted(
+        ((stmt, sum(sites.values()), dict(sites)) for stmt, sites in trace.groups.items()),
+        key=lambda r: -r[1],
+    )
+    if MODE == "warn":
+        for stmt, n, sites in repeats:
+            if n > trace.limit:
+                log.warning(_describe(endpoint, stmt, Counter(sites)))
+    with _captures_lock:
+        if _captures:
+            report = Report(endpoint, trace.count, trace.total, [r for r in repeats if r[1] > 1])
+            for reports in _captures:
+                reports.append(report)
+
+
+@contextmanager
+def capture() -> Iterator[List[Report]]:
+    """
+    블록 안에서 처리된 요청마다 Report 수집 (QUERY_CHECK=off 여도 동작)
+    """
+    reports: List[Report] = []
+    with _captures_lock:
+        _captures.append(reports)
+    try:
+        yield reports
+    finally:
+        with _captures_lock:
+            _captures.remove(reports)
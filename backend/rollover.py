@@ -0,0 +1,200 @@
+# rollover.py
+# 학년도 전환(진급/졸업) — 집합 단위 SQL, 단일 트랜잭션
+#
+# 순서 (from_year → from_year + 1)
+#  0) 학적 기록: 재학생의 from_year 학년/반/번호를 student_years 에 보존 (지난 학년도 통계/조회용)
+#  1) 수강 편성: from_year 에 (학년 g)가 들은 과목/학기를 to_year 의 (학년 g) 학생에게 복사
+#     → 진급 전 학년 기준으로 계산해야 하므로 맨 먼저 (대상: 진급 예정 학생 = 현재 g-1 학년)
+#  2) 졸업: 최고 학년 학생은 grade = 최고학년+1(졸업 표시), 담임 해제
+#  3) 졸업생 계정 보관: users.archived_year = from_year, 비활성화
+#  4) 진급: 나머지 재학생 grade + 1 (반/번호 유지, 새 반 편성은 명단 업로드로)
+#  5) 담임 배정: to_year 배정이 없는 학반에 from_year 배정을 복사 (mode: stay=같은 학년·반, follow=한 학년 위로)
+#  6) 학생 담임(homeroom_teacher_id)을 to_year 배정 기준으로 다시 연결
+#
+# - dry_run=True 면 전부 실행한 뒤 롤백 → 실제와 같은 건수/소요 시간 보고
+# - 완료 기록은 jobs 테이블(kind='rollover')에 남겨 같은 학년도 중복 실행 방지
+# - CLI: python rollover.py 2025 [--dry-run] [--mode stay|follow] [--max-grade 3] [--no-enrollments]
+
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import Job, User
+
+MAX_GRADE = 3
+KIND = "rollover"
+
+
+class RolloverError(Exception):
+    pass
+
+
+def _steps(mode: str, seed_enrollments: bool) -> list[tuple[str, str]]:
+    steps: list[tuple[str, str]] = [("student_years", """
+        INSERT INTO student_years (student_id, school_year, grade, class_no, number)
+        SELECT id, :from_year, grade, class_no, number
+        FROM students WHERE grade <= :max_grade
+        ON CONFLICT (student_id, school_year) DO UPDATE
+        SET grade = excluded.grade, class_no = excluded.class_no, number = excluded.number
+    """)]
+    if seed_enrollments:
+        steps.append(("enrollments", """
+            INSERT INTO enrollments (student_id, subject_id, year, term, teacher_id)
+            SELECT s.id, c.subject_id, :to_year, c.term, sub.default_teacher_id
+            FROM students s
+            JOIN (
+                SELECT DISTINCT st.grade AS grade, e.subject_id AS subject_id, e.term AS term
+                FROM enrollments e JOIN students st ON st.id = e.student_id
+                WHERE e.year = :from_year
+            ) AS c ON c.grade = s.grade + 1
+            JOIN subjects sub ON sub.id = c.subject_id
+            WHERE s.grade < :max_grade
+            ON CONFLICT (student_id, subject_id, year, term) DO NOTHING
+        """))
+    steps += [
+        ("graduate", """
+            UPDATE students SET grade = :max_grade + 1, homeroom_teacher_id = NULL
+            WHERE grade = :max_grade
+        """),
+        ("archive_users", """
+            UPDATE users SET archived_year = :from_year, is_active = 0
+            WHERE role = 'student' AND archived_year IS NULL
+              AND student_id IN (SELECT id FROM students WHERE grade = :max_grade + 1)
+        """),
+        ("promote", """
+            UPDATE students SET grade = grade + 1
+            WHERE grade < :max_grade
+        """),
+        ("homerooms", f"""
+            INSERT INTO homeroom_assignments (school_year, grade, class_no, teacher_user_id, updated_at)
+            SELECT :to_year, {"ha.grade + 1" if mode == "follow" else "ha.grade"}, ha.class_no,
+                   ha.teacher_user_id, CURRENT_TIMESTAMP
+            FROM homeroom_assignments ha
+            JOIN users u ON u.id = ha.teacher_user_id AND u.is_active = 1
+            WHERE ha.school_year = :from_year
+              {"AND ha.grade < :max_grade" if mode == "follow" else ""}
+              AND NOT EXISTS (SELECT 1 FROM homeroom_assignments x
+                              WHERE x.school_year = :to_year AND x.teacher_user_id = ha.teacher_user_id)
+            ON CONFLICT (school_year, grade, class_no) DO NOTHING
+        """),
+        ("link_homeroom", """
+            UPDATE students SET homeroom_teacher_id = (
+                SELECT u.teacher_id
+                FROM homeroom_assignments ha JOIN users u ON u.id = ha.teacher_user_id
+                WHERE ha.school_year = :to_year
+                  AND ha.grade = students.grade AND ha.class_no = students.class_no
+            )
+            WHERE grade <= :max_grade
+        """),
+    ]
+    return steps
+
+
+def _preview(db: Session, params: dict) -> dict:
+    """
+    전환 전 학년별 인원 (보고용)
+    """
+    rows = db.execute(text(
+        "SELECT grade, COUNT(*) FROM students WHERE grade <= :max_grade GROUP BY grade ORDER BY grade"
+    ), params).all()
+    return {int(g): int(n) for g, n in rows}
+
+
+def already_done(db: Session, from_year: int) -> bool:
+    for (p,) in db.query(Job.params).filter(Job.kind == KIND, Job.status == "done"):
+        if json.loads(p or "{}").get("from_year") == from_year:
+            return True
+    return False
+
+
+def run(db: Session, from_year: int, user_id: int, *, dry_run: bool = False,
+        mode: str = "stay", max_grade: int = MAX_GRADE, seed_enrollments: bool = True) -> dict:
+    """
+    학년도 전환 실행. 반환: 단계별 반영 행 수/소요 시간(ms) 보고
+    - 실제 실행은 커밋까지 수행, dry_run 은 롤백
+    """
+    if mode not in ("stay", "follow"):
+        raise RolloverError("mode 는 stay 또는 follow 여야 합니다.")
+    if not dry_run and already_done(db, from_year):
+        raise RolloverError(f"{from_year}학년도 전환은 이미 실행되었습니다.")
+
+    params = {"from_year": from_year, "to_year": from_year + 1, "max_grade": max_grade}
+    report: dict = {
+        "from_year": from_year, "to_year": from_year + 1, "mode": mode,
+        "max_grade": max_grade, "dry_run": dry_run,
+        "before": _preview(db, params), "steps": [],
+    }
+    started = time.perf_counter()
+    try:
+        for name, sql in _steps(mode, seed_enrollments):
+            t0 = time.perf_counter()
+            rows = db.execute(text(sql), params).rowcount
+            report["steps"].append({"name": name, "rows": rows,
+                                    "ms": round((time.perf_counter() - t0) * 1000, 2)})
+        report["after"] = _preview(db, params)
+        if dry_run:
+            db.rollback()
+        else:
+            now = datetime.utcnow()
+            counts = {s["name"]: s["rows"] for s in report["steps"]}
+            db.add(Job(
+                id=uuid.uuid4().hex, kind=KIND, status="done", user_id=user_id,
+                params=json.dumps({k: v for k, v in report.items() if k != "steps"} | {"steps": counts},
+                                  ensure_ascii=False),
+                total=counts.get("graduate", 0) + counts.get("promote", 0),
+                processed=counts.get("graduate", 0) + counts.get("promote", 0),
+                updated=counts.get("promote", 0),
+                created=counts.get("enrollments", 0),
+                started_at=now, finished_at=now,
+            ))
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    report["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return report
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    import argparse
+
+    from database import SessionLocal
+    import homeroom_index
+    import score_stats
+
+    ap = argparse.ArgumentParser(description="학년도 전환(진급/졸업)")
+    ap.add_argument("from_year", type=int, help="끝나는 학년도 (예: 2025 → 2026으로 전환)")
+    ap.add_argument("--dry-run", action="store_true", help="실행 후 롤백하고 보고만 출력")
+    ap.add_argument("--mode", choices=("stay", "follow"), default="stay",
+                    help="담임 배정 복사 방식 (stay: 같은 학년·반, follow: 학생 따라 한 학년 위)")
+    ap.add_argument("--max-grade", type=int, default=MAX_GRADE)
+    ap.add_argument("--no-enrollments", action="store_true", help="수강 편성 복사 생략")
+    ap.add_argument("--by", default="admin", help="실행 기록에 남길 관리자 username")
+    args = ap.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        admin = db.query(User).filter(User.username == args.by, User.role == "admin").first()
+        if not admin:
+            raise SystemExit(f"관리자 계정이 없습니다: {args.by}")
+        report = run(db, args.from_year, admin.id, dry_run=args.dry_run, mode=args.mode,
+                     max_grade=args.max_grade, seed_enrollments=not args.no_enrollments)
+        if not args.dry_run:
+            homeroom_index.invalidate()
+            score_stats.invalidate()
+    except RolloverError as e:
+        raise SystemExit(str(e))
+    finally:
+        db.close()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,13 +14,17 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, text
+from sqlalchemy import insert, or_, select, text
 from typing import Optional, Literal, Callable, List
-import csv, io
+import csv, io, itertools
 
 from database import get_db
 from models import User, Teacher, Student
 from security import hash_password, verify_password, create_access_token, decode_token
+import jobs
+import homeroom_index
+import rollover
+import score_stats
 
 router = APIRouter()
 
@@ -255,60 +259,67 @@ s1001,Std!234,홍학생,student
 - 교사 username이 't'로 시작하면 Teacher 레코드 자동 생성(없으면)
 - 학생 username이 's'로 시작하면 student_id를 username에서 s 제거 후 숫자 변환해 자동 매핑(해당 Student가 없으면 생략)
 """
-@router.post("/admin/bulk_users_simple", dependencies=[Depends(role_required("admin"))])
-def admin_bulk_users_simple(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    if not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="CSV 파일을 업로드하세요.")
-
-    content = file.file.read().decode("utf-8-sig")  # BOM 대응
-    reader = csv.DictReader(io.StringIO(content))
-
-    created: List[str] = []
-    updated: List[str] = []
-    skipped: List[str] = []
-    skipped_reasons: dict[str, str] = {}
-
-    for row in reader:
+def _upsert_simple_users(db: Session, rows: list[dict],
+                         seen: Optional[set[str]] = None) -> list[tuple[str, str, Optional[str]]]:
+    """
+    간단형 CSV 행 묶음 반영 → 행마다 (결과 'created'|'updated'|'skipped', 키, 스킵 사유)
+    - 기존 사용자/교사/학생은 묶음 전체에 대해 IN 조회 1회씩
+    - 새 교사/사용자는 executemany INSERT 1회씩 (ORM add 는 SQLite 에서 RETURNING 때문에 행마다 INSERT)
+    - 같은 파일 안에서 username 이 다시 나오면 뒤 행은 스킵 (앞 행만 반영)
+      seen: 이전 묶음까지 나온 username (백그라운드 작업의 청크 간 중복 판정용, 갱신됨)
+    커밋은 호출자가 수행
+    """
+    seen = set() if seen is None else seen
+    outcomes: list[Optional[tuple[str, str, Optional[str]]]] = [None] * len(rows)
+    valid: list[tuple[int, str, str, Optional[str], str]] = []   # (행 위치, username, password, full_name, role)
+    for i, row in enumerate(rows):
         username = (row.get("username") or "").strip()
         password = (row.get("password") or "").strip()
         full_name = (row.get("full_name") or "").strip() or None
         role = (row.get("role") or "").strip().lower()
-
         if not username or not password or role not in ("teacher", "student", "admin"):
-            key = username or "?"
-            skipped.append(key)
-            skipped_reasons[key] = "필수값 누락 또는 잘못된 role"
-            continue
-
-        # email 자동
-        email = f"{username}@local"
-
-        # teacher/student 연결 자동 추론
-        teacher_id: Optional[int] = None
-        student_id: Optional[int] = None
-
-        # 교사: username 이 t* 인 경우 Teacher 자동 생성/매핑
-        if username.startswith("t") and role == "teacher":
-            teacher = db.query(Teacher).filter(Teacher.name == (full_name or username)).first()
-            if not teacher:
-                teacher = Teacher(name=(full_name or username))
-                db.add(teacher)
-                db.flush()  # id 확보
-            teacher_id = teacher.id
-
-        # 학생: username 이 s* 인 경우 student_id 자동 추출 (s 접두어 제거 숫자)
-        if username.startswith("s") and role == "student":
-            try:
-                sid_num = int(username[1:])
-                stu = db.query(Student).filter(Student.id == sid_num).first()
-                # 업로드 데이터 정책에 따라: Student 테이블에 해당 id가 없으면 그냥 연결 생략
-                if stu:
-                    student_id = stu.id
-            except ValueError:
-                pass
-
-        # username 또는 email 충돌 시 업데이트
-        user = db.query(User).filter(or_(User.username == username, User.email == email)).first()
+            outcomes[i] = ("skipped", username or "?", "필수값 누락 또는 잘못된 role")
+        elif username in seen:
+            outcomes[i] = ("skipped", username, "파일 안에서 username 이 중복되었습니다.")
+        else:
+            seen.add(username)
+            valid.append((i, username, password, full_name, role))
+    if not valid:
+        return outcomes
+
+    # email 자동 (username 또는 email 충돌 시 업데이트)
+    emails = {f"{v[1]}@local": v[1] for v in valid}
+    existing: dict[str, User] = {}
+    for u in db.query(User).filter(or_(User.username.in_([v[1] for v in valid]),
+                                       User.email.in_(list(emails)))):
+        existing.setdefault(u.username, u)
+        if u.email in emails:
+            existing.setdefault(emails[u.email], u)
+
+    # 교사: username 이 t* 인 경우 Teacher 자동 생성/매핑 (이름 기준)
+    teacher_names = {(v[3] or v[1]) for v in valid if v[1].startswith("t") and v[4] == "teacher"}
+    teachers: dict[str, int] = {}
+    if teacher_names:
+        missing = teacher_names - set(db.scalars(select(Teacher.name).where(Teacher.name.in_(teacher_names))))
+        if missing:
+            db.execute(insert(Teacher), [{"name": n} for n in sorted(missing)])
+        teachers = dict(db.execute(select(Teacher.name, Teacher.id).where(Teacher.name.in_(teacher_names))).all())
+
+    # 학생: username 이 s* 인 경우 student_id 자동 추출 (s 접두어 제거 숫자)
+    # 업로드 데이터 정책에 따라: Student 테이블에 해당 id가 없으면 그냥 연결 생략
+    sid_of: dict[str, int] = {}
+    for _, username, _, _, role in valid:
+        if username.startswith("s") and role == "student" and username[1:].isdigit():
+            sid_of[username] = int(username[1:])
+    students = set(db.scalars(select(Student.id).where(Student.id.in_(set(sid_of.values()))))) \
+        if sid_of else set()
+
+    new_users: list[dict] = []
+    for i, username, password, full_name, role in valid:
+        teacher_id = teachers.get(full_name or username) if username.startswith("t") and role == "teacher" else None
+        student_id = sid_of.get(username) if sid_of.get(username) in students else None
+
+        user = existing.get(username)
         if user:
             user.hashed_password = hash_password(password)
             user.full_name = full_name
@@ -317,21 +328,50 @@ def admin_bulk_users_simple(file: UploadFile = File(...), db: Session = Depends(
             user.student_id = student_id
             user.is_active = True
             user.password_change_required = True
-            updated.append(username)
-        else:
-            user = User(
-                username=username,
-                email=email,
-                full_name=full_name,
-                role=role,
-                hashed_password=hash_password(password),
-                teacher_id=teacher_id,
-                student_id=student_id,
-                is_active=True,
-                password_change_required=True,
-            )
-            db.add(user)
-            created.append(username)
+            outcomes[i] = ("updated", username, None)
+            continue
+
+        new_users.append(dict(
+            username=username,
+            email=f"{username}@local",
+            full_name=full_name,
+            role=role,
+            hashed_password=hash_password(password),
+            teacher_id=teacher_id,
+            student_id=student_id,
+            is_active=True,
+            password_change_required=True,
+        ))
+        outcomes[i] = ("created", username, None)
+    if new_users:
+        db.execute(insert(User), new_users)
+    return outcomes
+
+
+@router.post("/admin/bulk_users_simple", dependencies=[Depends(role_required("admin"))])
+def admin_bulk_users_simple(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    if not file.filename.lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="CSV 파일을 업로드하세요.")
+
+    content = file.file.read().decode("utf-8-sig")  # BOM 대응
+    reader = csv.DictReader(io.StringIO(content))
+
+    created: List[str] = []
+    updated: List[str] = []
+    skipped: List[str] = []
+    skipped_reasons: dict[str, str] = {}
+
+    # IN 조회 크기를 제한하려고 CHUNK_SIZE 행씩 묶어 반영 (커밋은 마지막에 1회)
+    seen: set[str] = set()
+    for chunk in jobs.chunks(reader):
+        for outcome, key, reason in _upsert_simple_users(db, chunk, seen):
+            if outcome == "created":
+                created.append(key)
+            elif outcome == "updated":
+                updated.append(key)
+            else:
+                skipped.append(key)
+                skipped_reasons[key] = reason
 
     db.commit()
     return {
@@ -342,6 +382,33 @@ def admin_bulk_users_simple(file: UploadFile = File(...), db: Session = Depends(
     }
 
 
+@jobs.register("users_bulk")
+def _users_bulk_job(db: Session, job, progress: jobs.Progress) -> None:
+    """
+    admin_bulk_users_simple 의 백그라운드 버전: CHUNK_SIZE 행씩 반영 후 청크마다 커밋
+    """
+    def _reader(fp):
+        return csv.DictReader(io.TextIOWrapper(fp, encoding="utf-8-sig", newline=""))
+
+    if not job.total:
+        with open(job.spool_path, "rb") as fp:
+            progress.set_total(sum(1 for _ in _reader(fp)))
+
+    seen: set[str] = set()   # 청크 간 username 중복 판정 (재개 시에는 이어서 처리한 행부터)
+    with open(job.spool_path, "rb") as fp:
+        for chunk in jobs.chunks(itertools.islice(_reader(fp), job.processed, None)):
+            created = updated = 0
+            reasons: dict[str, str] = {}
+            for i, (outcome, key, reason) in enumerate(_upsert_simple_users(db, chunk, seen)):
+                if outcome == "created":
+                    created += 1
+                elif outcome == "updated":
+                    updated += 1
+                else:
+                    reasons[f"{key}#{job.processed + i + 2}"] = reason   # 행번호로 구분
+            progress(processed=len(chunk), created=created, updated=updated, skipped_reasons=reasons)
+
+
 @router.get("/admin/csv_template", dependencies=[Depends(role_required("admin"))])
 def admin_csv_template(kind: str = Query("simple", pattern="^(simple)$")):
     """
@@ -462,12 +529,13 @@ def admin_db_wipe_all(payload: WipeAllIn, db: Session = Depends(get_db)):
     db.execute(text("PRAGMA foreign_keys=OFF;"))
     # User-defined 테이블 삭제
     tables = [
-        "mock_exam_scores", "mock_exams",
+        "mock_exam_scores", "mock_exams", "mock_conversions",
+        "semester_scores", "subject_weights",
         "final_scores", "midterm_scores",
         "attendances", "counsel_logs",
         "enrollments", "subjects", "teachers",
-        "user_settings", "homeroom_assignments",
-        "students", "users",
+        "user_settings", "homeroom_assignments", "jobs",
+        "student_years", "students", "users",
     ]
     for t in tables:
         try:
@@ -476,11 +544,39 @@ def admin_db_wipe_all(payload: WipeAllIn, db: Session = Depends(get_db)):
             pass
     db.execute(text("PRAGMA foreign_keys=ON;"))
     db.commit()
+    homeroom_index.invalidate()
+    score_stats.invalidate()
     return {"ok": True, "msg": "DB 스키마 삭제 완료. 앱 재기동 시 create_all 로 재생성됩니다."}
 
 
+# ==================== 관리자: 학년도 전환 ====================
+class RolloverIn(BaseModel):
+    from_year: int = Field(..., ge=2000, le=2100)
+    dry_run: bool = True
+    mode: Literal["stay", "follow"] = "stay"
+    max_grade: int = Field(rollover.MAX_GRADE, ge=1, le=6)
+    seed_enrollments: bool = True
+
+
+@router.post("/admin/rollover", dependencies=[Depends(role_required("admin"))])
+def admin_rollover(payload: RolloverIn, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    학년도 전환(진급/졸업/졸업생 계정 보관/담임 배정/수강 편성) — 단일 트랜잭션
+    - 기본은 dry_run(보고만, 롤백). 실제 반영은 dry_run=false
+    """
+    try:
+        report = rollover.run(db, payload.from_year, current.id, dry_run=payload.dry_run,
+                              mode=payload.mode, max_grade=payload.max_grade,
+                              seed_enrollments=payload.seed_enrollments)
+    except rollover.RolloverError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not payload.dry_run:
+        homeroom_index.invalidate()
+        score_stats.invalidate()
+    return report
+
+
 # ==================== 다른 라우터에서 쓰는 권한 헬퍼 ====================
-from typing import Optional as _Optional  # 이름 충돌 방지용
 
 def assert_can_view_student(
     student_id: int,
@@ -507,13 +603,13 @@ def assert_homeroom_or_admin(
     상담 열람/수정 권한:
     - 관리자
     - 담임(학생.homeroom_teacher_id == current.teacher_id)
+    - 판정은 homeroom_index 의 메모리 집합 조회 (DB 조회 없음)
     """
     if current.role == "admin":
         return
     if current.role != "teacher":
         raise HTTPException(status_code=403, detail="담임 교사만 접근할 수 있습니다.")
-    stu: _Optional[Student] = db.get(Student, student_id)
-    if not stu:
+    if not homeroom_index.student_exists(db, student_id):
         raise HTTPException(status_code=404, detail="학생이 존재하지 않습니다.")
-    if not stu.homeroom_teacher_id or current.teacher_id != stu.homeroom_teacher_id:
+    if student_id not in homeroom_index.homeroom_students(db, current.teacher_id):
         raise HTTPException(status_code=403, detail="담임 교사만 접근할 수 있습니다.")
@@ -5,6 +5,8 @@ from pydantic import BaseModel, Field, ConfigDict
 from database import get_db
 from models import Student, Teacher, Subject, Enrollment
 from routers.auth import role_required, get_current_user, assert_can_view_student
+import homeroom_index
+import score_stats
 
 router = APIRouter()
 
@@ -63,7 +65,10 @@ def create_student(payload: StudentCreate, db: Session = Depends(get_db)):
     if db.query(Student).filter_by(student_no=payload.student_no).first():
         raise HTTPException(status_code=400, detail="이미 존재하는 학번입니다.")
     s = Student(**payload.model_dump())
-    db.add(s); db.commit(); db.refresh(s); return s
+    db.add(s); db.commit(); db.refresh(s)
+    homeroom_index.invalidate()
+    score_stats.invalidate()
+    return s
 
 @router.get("/students", response_model=List[StudentRead],
             dependencies=[Depends(role_required("teacher","admin"))])
@@ -90,7 +95,10 @@ def update_student(student_id: int, payload: StudentUpdate, db: Session = Depend
     s = db.get(Student, student_id)
     if not s: raise HTTPException(status_code=404, detail="학생이 존재하지 않습니다.")
     for k, v in payload.model_dump(exclude_unset=True).items(): setattr(s, k, v)
-    db.commit(); db.refresh(s); return s
+    db.commit(); db.refresh(s)
+    homeroom_index.invalidate()
+    score_stats.invalidate()
+    return s
 
 @router.post("/teachers", response_model=TeacherRead, dependencies=[Depends(role_required("teacher","admin"))])
 def create_teacher(payload: TeacherCreate, db: Session = Depends(get_db)):
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, select, update, or_, and_, bindparam
 from typing import Optional, List
 from pydantic import BaseModel, Field, ConfigDict
-from datetime import date
+from datetime import date, datetime
+import asyncio
 from database import get_db
 from models import Student, Teacher, CounselLog
 from routers.auth import role_required, get_current_user, assert_homeroom_or_admin
 from security import encrypt_text, decrypt_text
+import ai_client
+import jobs
 
 router = APIRouter()
 
@@ -81,9 +84,114 @@ def update_counsel(counsel_id: int, payload: CounselUpdate, db: Session = Depend
     # 권한: 담임/관리자
     assert_homeroom_or_admin(rec.student_id, current, db)
     data = payload.model_dump(exclude_unset=True)
-    if "content" in data: data["content"] = encrypt_text(data["content"])
-    if "summary" in data: data["summary"] = encrypt_text(data["summary"])
+    if "content" in data:
+        data["content"] = encrypt_text(data["content"])
+        # summarized_at 과 같은 정밀도로 기록 (DB now()는 초 단위라 같은 초 안의 수정이 '낡은 요약'으로 안 잡힘)
+        data["updated_at"] = datetime.utcnow()
+    if "summary" in data:
+        data["summary"] = encrypt_text(data["summary"])
+        data["summarized_at"] = None   # 직접 고친 요약은 AI 일괄 요약 대상에서 제외
     for k,v in data.items(): setattr(rec, k, v)
     db.commit(); db.refresh(rec)
     rec.content = decrypt_text(rec.content); rec.summary = decrypt_text(rec.summary)
     return rec
+
+
+# ------------------------- AI 일괄 요약 (백그라운드 작업) -------------------------
+SUMMARY_PROMPT = (
+    "다음은 담임교사의 학생 상담 기록입니다. 핵심 내용(상담 계기, 학생 상황, 합의·조치 사항)을 "
+    "3문장 이내의 한국어로 요약하세요. 기록에 없는 내용은 추측하지 마세요.\n\n"
+    "[날짜] {date}\n[제목] {title}\n[내용]\n{content}"
+)
+# 한 번에 읽어 요약/저장하는 상담일지 수 (이 단위로 커밋 → 중단돼도 여기까지는 보존)
+SUMMARY_BATCH = 20
+
+
+class CounselSummaryIn(BaseModel):
+    grade: int = Field(..., ge=1)
+    class_no: int = Field(..., ge=1)
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    provider: str = Field("gemini", pattern="^(gemini|openai)$")
+    model: Optional[str] = None
+    include_stale: bool = True                      # 요약 이후 내용이 바뀐 일지도 다시 요약
+    concurrency: int = Field(4, ge=1, le=16)        # 동시 호출 수
+    rate_per_sec: float = Field(2.0, gt=0, le=50)   # 초당 호출 시작 수
+
+
+def _summary_targets(db: Session, p: dict) -> list[int]:
+    """
+    요약 대상 상담일지 id (요약 없음, 또는 AI 요약 후 내용이 바뀐 것)
+    - 직접 입력한 요약(summarized_at 없음)은 건드리지 않음
+    """
+    need = [CounselLog.summary.is_(None)]
+    if p.get("include_stale", True):
+        need.append(and_(CounselLog.summarized_at.is_not(None),
+                         CounselLog.updated_at > CounselLog.summarized_at))
+    q = (select(CounselLog.id)
+         .join(Student, Student.id == CounselLog.student_id)
+         .where(Student.grade == p["grade"], Student.class_no == p["class_no"], or_(*need))
+         .order_by(CounselLog.id))
+    if p.get("date_from"):
+        q = q.where(CounselLog.date >= date.fromisoformat(p["date_from"]))
+    if p.get("date_to"):
+        q = q.where(CounselLog.date <= date.fromisoformat(p["date_to"]))
+    return list(db.scalars(q))
+
+
+async def _summarize_batch(rows: list, p: dict, key: str,
+                           client, sem: asyncio.Semaphore, limiter: ai_client.RateLimiter):
+    async def one(log_id: int, prompt: str):
+        async with sem:
+            await limiter.acquire()
+            try:
+                _, text = await ai_client.generate(p["provider"], key, prompt, p.get("model"), client=client)
+            except HTTPException as he:
+                return log_id, None, str(he.detail)
+            return log_id, (text or "").strip() or None, "빈 응답"
+
+    return await asyncio.gather(*[
+        one(r.id, SUMMARY_PROMPT.format(date=r.date, title=r.title or "",
+                                        content=decrypt_text(r.content)))
+        for r in rows
+    ])
+
+
+@jobs.register("counsel_summary")
+def _counsel_summary_job(db: Session, job, progress: jobs.Progress) -> None:
+    """
+    학반 상담일지 AI 일괄 요약
+    - SUMMARY_BATCH 건씩 복호화 → 동시성/속도 제한 하에 제공자 호출 → 암호화해 일괄 저장 + 커밋
+    - 재시작 시 대상 목록을 다시 계산하므로 이미 요약된 일지는 자동으로 건너뜀
+    """
+    from routers.settings import _load_user_ai_key   # settings → counsels 순환 import 방지
+
+    p = jobs.job_params(job)
+    key = _load_user_ai_key(db, job.user_id, p["provider"])
+    ids = _summary_targets(db, p)
+    # 재개 시에는 남은 대상 수만큼으로 전체 수를 다시 맞춤
+    progress.set_total(job.processed + len(ids))
+
+    async def _run():
+        sem = asyncio.Semaphore(p.get("concurrency", 4))
+        limiter = ai_client.RateLimiter(p.get("rate_per_sec", 2.0), burst=p.get("concurrency", 4))
+        async with ai_client.new_client() as client:
+            for chunk in jobs.chunks(ids, SUMMARY_BATCH):
+                rows = db.query(CounselLog).filter(CounselLog.id.in_(chunk)).all()
+                results = await _summarize_batch(rows, p, key, client, sem, limiter)
+                now = datetime.utcnow()
+                values = [{"b_id": log_id, "summary": encrypt_text(text)}
+                          for log_id, text, _ in results if text]
+                if values:
+                    # updated_at 도 요약 시각으로 맞춰야 다음 실행에서 '낡은 요약'으로 보이지 않음
+                    db.execute(
+                        update(CounselLog.__table__)
+                        .where(CounselLog.__table__.c.id == bindparam("b_id"))
+                        .values(summary=bindparam("summary"), summarized_at=now, updated_at=now),
+                        values,
+                    )
+                progress(processed=len(chunk), updated=len(values),
+                         skipped_reasons={f"LOG{log_id}": reason
+                                          for log_id, text, reason in results if not text})
+
+    asyncio.run(_run())
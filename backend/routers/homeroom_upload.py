@@ -1,18 +1,26 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
-from typing import Optional, Any
-from io import BytesIO
+from sqlalchemy import select, func, tuple_
+from typing import Optional, Any, Callable, Iterator
+from io import BytesIO, StringIO
 from datetime import datetime, date, timedelta
 from urllib.parse import quote
+import codecs, csv, os, secrets, tempfile, threading, time
 
-from database import get_db
-from models import Student, User, HomeroomAssignment
+from database import get_db, SessionLocal
+from models import Student, User
 from routers.auth import get_current_user, role_required
 
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
+from tabular import read_table, open_table
+import itertools
+import jobs
+import homeroom_index
+import score_stats
 
 router = APIRouter()
 
@@ -81,7 +89,7 @@ def _parse_birthdate(s: str | None) -> Optional[date]:
         return None
     s = str(s).strip().replace(" ", "")
     # 예: 2008.12.20. -> 2008-12-20
-    s = s.strip(".").replace(".", "-")
+    s = s.strip(".").replace(".", "-").replace("/", "-")
     # 2008-12-20 / 2008-12 / 2008 등 다양한 경우가 있을 수 있어 보수적으로 처리
     fmts = ("%Y-%m-%d", "%Y-%m-%d.", "%Y-%m", "%Y.%m.%d", "%Y.%m")
     for fmt in fmts:
@@ -107,28 +115,6 @@ def _parse_gender(s: str | None) -> Optional[str]:
         return s.upper()
     return None
 
-def _must_be_homeroom_of(current: User, db: Session, grade: int, class_no: int) -> None:
-    if current.role == "admin":
-        return
-    if current.role != "teacher":
-        raise HTTPException(status_code=403, detail="교사만 업로드할 수 있습니다.")
-    ha = (
-        db.query(HomeroomAssignment)
-        .filter(
-            HomeroomAssignment.teacher_user_id == current.id,
-            HomeroomAssignment.grade == grade,
-            HomeroomAssignment.class_no == class_no,
-        )
-        .first()
-    )
-    if not ha:
-        raise HTTPException(
-            status_code=403,
-            detail=f"담임 매핑이 없습니다: {grade}학년 {class_no}반 (관리자에게 문의)",
-        )
-    if not current.teacher_id:
-        raise HTTPException(status_code=400, detail="교사 프로필(teacher_id)이 연결되지 않았습니다.")
-
 
 # ------------------------- 템플릿 다운로드 -------------------------
 @router.get("/homeroom/students/template.xlsx", dependencies=[Depends(role_required("teacher","admin"))])
@@ -155,124 +141,447 @@ def download_template():
     )
 
 
-# ------------------------- 업로드/업서트 -------------------------
-@router.post("/homeroom/students/upload-xlsx", dependencies=[Depends(role_required("teacher","admin"))])
-def upload_students_xlsx(
-    file: UploadFile = File(...),
+@router.get("/homeroom/students/template.csv", dependencies=[Depends(role_required("teacher","admin"))])
+def download_template_csv():
+    stream = StringIO()
+    writer = csv.writer(stream)
+    writer.writerow(EXPECTED_HEADERS)
+    writer.writerow([
+        1, 9, 1, "홍길동", 2025000130, "여성", "2008.12.20.",
+        "서울특별시 중구 세종대로 110", "특수학생", "010-0000-0000",
+        "010-1111-1111", "010-2222-2222", "s2025000130",
+    ])
+    # 엑셀에서 바로 열 수 있도록 BOM 포함 utf-8
+    data = BytesIO(stream.getvalue().encode("utf-8-sig"))
+    real_name = "학생업로드_템플릿.csv"
+    fallback = "student_template.csv"
+    disposition = f"attachment; filename={fallback}; filename*=UTF-8''{quote(real_name)}"
+    return StreamingResponse(data, media_type="text/csv; charset=utf-8",
+                             headers={"Content-Disposition": disposition})
+
+
+# ------------------------- 명단 내보내기 -------------------------
+# 내보내기 시 한 번에 가져올 행 수 (yield_per)
+EXPORT_BATCH = 1000
+_GENDER_LABEL = {"M": "남", "F": "여"}
+
+
+def _export_scope(current: User, db: Session, grade: Optional[int], class_no: Optional[int]) -> list:
+    """
+    내보내기 대상 조건 (관리자: 학교/학년/학반 자유, 교사: 올해 담임 학반만)
+    """
+    conds = []
+    if grade is not None:
+        conds.append(Student.grade == grade)
+    if class_no is not None:
+        if grade is None:
+            raise HTTPException(status_code=400, detail="반을 지정하려면 학년도 지정하세요.")
+        conds.append(Student.class_no == class_no)
+    if current.role == "admin":
+        return conds
+
+    mine = homeroom_index.homeroom_classes(db, current.id)
+    if grade is not None and class_no is not None:
+        if (grade, class_no) not in mine:
+            raise HTTPException(status_code=403, detail=f"담임 매핑이 없습니다: {grade}학년 {class_no}반")
+        return conds
+    mine = sorted((g, c) for g, c in mine if grade is None or g == grade)
+    if not mine:
+        raise HTTPException(status_code=403, detail="내보낼 담임 학반이 없습니다.")
+    conds.append(tuple_(Student.grade, Student.class_no).in_(mine))
+    return conds
+
+
+def _export_rows(db: Session, conds: list) -> Iterator[list]:
+    """
+    EXPECTED_HEADERS 순서의 행을 yield_per 로 나눠 읽으며 생성 (업로드 파일로 그대로 재사용 가능)
+    """
+    username = (
+        select(func.min(User.username))
+        .where(User.student_id == Student.id)
+        .correlate(Student)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(Student.grade, Student.class_no, Student.number, Student.name, Student.id,
+               Student.gender, Student.address, Student.phone,
+               Student.parent1_phone, Student.parent2_phone, username)
+        .where(*conds)
+        .order_by(Student.grade, Student.class_no, Student.number, Student.id)
+        .execution_options(yield_per=EXPORT_BATCH)
+    )
+    for g, c, no, name, sid, gender, addr, phone, p1, p2, uname in db.execute(stmt):
+        yield [g, c, no, name, sid, _GENDER_LABEL.get(gender, gender or None), None,
+               addr, None, phone, p1, p2, uname]
+
+
+def _export_filename(ext: str, grade: Optional[int], class_no: Optional[int]) -> str:
+    if grade is None:
+        return f"학생명단_전체.{ext}"
+    if class_no is None:
+        return f"학생명단_{grade}학년.{ext}"
+    return f"학생명단_{grade}학년_{class_no}반.{ext}"
+
+
+def _iter_file(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    with open(path, "rb") as fp:
+        while chunk := fp.read(chunk_size):
+            yield chunk
+
+
+@router.get("/homeroom/students/export.xlsx", dependencies=[Depends(role_required("teacher","admin"))])
+def export_students_xlsx(
+    grade: Optional[int] = Query(None),
+    class_no: Optional[int] = Query(None),
     db: Session = Depends(get_db),
     current: User = Depends(get_current_user),
 ):
-    if not file.filename.lower().endswith(".xlsx"):
-        raise HTTPException(status_code=400, detail="xlsx 파일을 업로드하세요.")
+    """
+    현재 학생 명단을 업로드 템플릿 형식으로 내보내기 (학교/학년/학반)
+    - write_only 워크북 + yield_per 로 행을 흘려 쓰므로 학교 규모와 무관하게 메모리 일정
+    - 생년월일/비고는 저장하지 않는 항목이라 빈칸
+    """
+    conds = _export_scope(current, db, grade, class_no)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("학생정보")
+    ws.append(EXPECTED_HEADERS)
+    for row in _export_rows(db, conds):
+        ws.append(row)
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
     try:
-        wb = load_workbook(file.file, data_only=True)
+        wb.save(path)
     except Exception:
-        raise HTTPException(status_code=400, detail="엑셀을 읽을 수 없습니다.")
+        os.remove(path)
+        raise
 
-    ws = wb.active
-    # 헤더 검증 (왼쪽에서 EXPECTED_HEADERS 길이만큼 확인)
-    header = [
-        str((ws.cell(row=1, column=i + 1).value or "")).strip()
-        for i in range(len(EXPECTED_HEADERS))
-    ]
-    if header != EXPECTED_HEADERS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"헤더가 일치하지 않습니다. 기대 순서: {', '.join(EXPECTED_HEADERS)}",
-        )
-
-    created, updated, skipped = [], [], []
-    skipped_reasons: dict[str, str] = {}
+    real_name = _export_filename("xlsx", grade, class_no)
+    disposition = f"attachment; filename=students_export.xlsx; filename*=UTF-8''{quote(real_name)}"
+    return StreamingResponse(
+        _iter_file(path),
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": disposition},
+        background=BackgroundTask(os.remove, path),  # 전송을 마친 뒤 임시 파일 삭제
+    )
 
-    # values_only=True 로 바로 값만 받기, max_col로 과잉컬럼 방지
-    for r, row in enumerate(ws.iter_rows(min_row=2, max_col=len(EXPECTED_HEADERS), values_only=True), start=2):
-        # 완전 빈 행이면 스킵
-        if not any(cell not in (None, "", " ") for cell in row):
-            continue
 
-        key = f"ROW{r}"
+@router.get("/homeroom/students/export.csv", dependencies=[Depends(role_required("teacher","admin"))])
+def export_students_csv(
+    grade: Optional[int] = Query(None),
+    class_no: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    """
+    export.xlsx 의 CSV 판 (utf-8 BOM). 응답 전송 중에 행을 읽어 바로 내보냄
+    """
+    conds = _export_scope(current, db, grade, class_no)
+
+    def _generate() -> Iterator[bytes]:
+        # 요청 세션은 응답 전에 닫히므로 전송용 세션을 따로 엶
+        yield codecs.BOM_UTF8
+        session = SessionLocal()
         try:
-            grade = _safe_int(row[0])
-            class_no = _safe_int(row[1])
-            number = _safe_int(row[2])
-            name = _safe_str(row[3])
-            sid_raw = row[4]
-
-            # 필수값 점검
-            if grade is None:
-                raise ValueError("학년 누락/숫자 아님")
-            if class_no is None:
-                raise ValueError("반 누락/숫자 아님")
-            if number is None:
-                raise ValueError("번호 누락/숫자 아님")
-            if not name:
-                raise ValueError("성명 누락")
-            student_id = _safe_int(sid_raw)
-            if student_id is None:
-                raise ValueError("학생개인번호 누락/숫자 아님")
-
-            # 담임 권한 확인
-            try:
-                _must_be_homeroom_of(current, db, grade, class_no)
-            except HTTPException as he:
-                raise ValueError(he.detail)
-
-            gender = _parse_gender(_safe_str(row[5]))
-            birthdate = _excel_date_to_date(row[6])
-            address = _safe_str(row[7])
-            # 비고 = row[8] (현재 미사용)
-            phone = _safe_str(row[9])
-            parent1 = _safe_str(row[10])
-            parent2 = _safe_str(row[11])
-            # username = _safe_str(row[12])  # 참고용, 저장/검증 안 함
-
-            stu = db.get(Student, student_id)
-            if stu is None:
-                stu = Student(
-                    id=student_id,
-                    student_no=str(student_id),
-                    name=name,
-                    grade=grade,
-                    class_no=class_no,
-                    number=number,
-                    gender=gender or "",
-                    phone=phone,
-                    parent1_phone=parent1,
-                    parent2_phone=parent2,
-                    address=address,
-                    homeroom_teacher_id=current.teacher_id,
-                )
-                if hasattr(Student, "birthdate"):
-                    setattr(stu, "birthdate", birthdate)
-                db.add(stu)
-                created.append(str(student_id))
+            buf = StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(EXPECTED_HEADERS)
+            pending = 0
+            for row in _export_rows(session, conds):
+                writer.writerow(row)
+                pending += 1
+                if pending >= EXPORT_BATCH:
+                    yield buf.getvalue().encode("utf-8")
+                    buf.seek(0); buf.truncate()
+                    pending = 0
+            yield buf.getvalue().encode("utf-8")
+        finally:
+            session.close()
+
+    real_name = _export_filename("csv", grade, class_no)
+    disposition = f"attachment; filename=students_export.csv; filename*=UTF-8''{quote(real_name)}"
+    return StreamingResponse(_generate(), media_type="text/csv; charset=utf-8",
+                             headers={"Content-Disposition": disposition})
+
+
+# ------------------------- 업로드/업서트 -------------------------
+# 존재 학생 조회 시 IN 목록 크기 (SQLite 바인드 변수 한도 고려)
+_IN_CHUNK = 500
+
+def _homeroom_checker(current: User, db: Session) -> Callable[[int, int], None]:
+    """
+    업로드 행의 담임 권한 판정기 (학년, 반)
+    - 교사의 (올해) 담임 학반은 homeroom_index 에서 한 번 가져오고, (학년, 반)별 판정 결과를 캐시
+    - 권한이 없으면 ValueError(사유)
+    """
+    if current.role == "admin":
+        return lambda grade, class_no: None
+    if current.role != "teacher":
+        raise HTTPException(status_code=403, detail="교사만 업로드할 수 있습니다.")
+    mine = homeroom_index.homeroom_classes(db, current.id)
+    verdict: dict[tuple[int, int], str | None] = {}
+
+    def _check(grade: int, class_no: int) -> None:
+        key = (grade, class_no)
+        if key not in verdict:
+            if key not in mine:
+                verdict[key] = f"담임 매핑이 없습니다: {grade}학년 {class_no}반 (관리자에게 문의)"
+            elif not current.teacher_id:
+                verdict[key] = "교사 프로필(teacher_id)이 연결되지 않았습니다."
             else:
-                stu.name = name
-                stu.grade = grade
-                stu.class_no = class_no
-                stu.number = number
-                if gender:
-                    stu.gender = gender
-                stu.phone = phone
-                stu.parent1_phone = parent1
-                stu.parent2_phone = parent2
-                stu.address = address
-                if hasattr(Student, "birthdate"):
-                    setattr(stu, "birthdate", birthdate)
-                stu.homeroom_teacher_id = current.teacher_id
-                updated.append(str(student_id))
+                verdict[key] = None
+        if verdict[key]:
+            raise ValueError(verdict[key])
+
+    return _check
+
 
+def _parse_roster_row(row: tuple) -> dict:
+    """
+    EXPECTED_HEADERS 순서의 한 행 → Student 필드 dict (필수값 누락 시 ValueError)
+    """
+    row = tuple(row) + (None,) * (len(EXPECTED_HEADERS) - len(row))
+    grade = _safe_int(row[0])
+    class_no = _safe_int(row[1])
+    number = _safe_int(row[2])
+    name = _safe_str(row[3])
+
+    # 필수값 점검
+    if grade is None:
+        raise ValueError("학년 누락/숫자 아님")
+    if class_no is None:
+        raise ValueError("반 누락/숫자 아님")
+    if number is None:
+        raise ValueError("번호 누락/숫자 아님")
+    if not name:
+        raise ValueError("성명 누락")
+    student_id = _safe_int(row[4])
+    if student_id is None:
+        raise ValueError("학생개인번호 누락/숫자 아님")
+
+    return {
+        "id": student_id,
+        "name": name,
+        "grade": grade,
+        "class_no": class_no,
+        "number": number,
+        "gender": _parse_gender(_safe_str(row[5])),
+        "birthdate": _excel_date_to_date(row[6]),
+        "address": _safe_str(row[7]),
+        # 비고 = row[8] (현재 미사용)
+        "phone": _safe_str(row[9]),
+        "parent1_phone": _safe_str(row[10]),
+        "parent2_phone": _safe_str(row[11]),
+        # username = row[12]  # 참고용, 저장/검증 안 함
+    }
+
+
+def _parse_roster(rows, check: Callable[[int, int], None]) -> tuple[dict[int, tuple[str, dict]], dict[str, str]]:
+    """
+    (행번호, 값튜플) 스트림 → {학생개인번호: (행키, 레코드)}, 스킵 사유
+    - 같은 학생개인번호가 여러 번 나오면 마지막 행 기준
+    """
+    records: dict[int, tuple[str, dict]] = {}
+    skipped_reasons: dict[str, str] = {}
+    for r, row in rows:
+        key = f"ROW{r}"
+        try:
+            rec = _parse_roster_row(row)
+            check(rec["grade"], rec["class_no"])   # 담임 권한 확인
         except ValueError as ve:
-            skipped.append(key)
             skipped_reasons[key] = str(ve)
+            continue
         except Exception:
-            skipped.append(key)
             skipped_reasons[key] = "예상치 못한 형식 오류"
+            continue
+        if rec["id"] in records:
+            skipped_reasons[records[rec["id"]][0]] = f"학생개인번호 중복({key}에서 덮어씀)"
+        records[rec["id"]] = (key, rec)
+    return records, skipped_reasons
 
-    db.commit()
+
+# 비교/갱신 대상 필드 (birthdate는 모델에 매핑돼 있을 때만)
+_ROSTER_FIELDS = ["name", "grade", "class_no", "number", "gender",
+                  "phone", "parent1_phone", "parent2_phone", "address", "homeroom_teacher_id"]
+if hasattr(Student, "birthdate"):
+    _ROSTER_FIELDS.append("birthdate")
+
+# dry_run 결과 보관 (토큰 → 계획). 단일 프로세스 메모리, 일정 시간 후 만료
+PLAN_TTL_SECONDS = 15 * 60
+_plans: dict[str, dict] = {}
+_plans_lock = threading.Lock()
+
+
+def _existing_ids(db: Session, ids: list[int]) -> set[int]:
+    found: set[int] = set()
+    for i in range(0, len(ids), _IN_CHUNK):
+        found.update(db.scalars(select(Student.id).where(Student.id.in_(ids[i:i + _IN_CHUNK]))))
+    return found
+
+
+def _existing_rows(db: Session, ids: list[int]) -> dict[int, dict]:
+    cols = [getattr(Student, f) for f in _ROSTER_FIELDS]
+    found: dict[int, dict] = {}
+    for i in range(0, len(ids), _IN_CHUNK):
+        for row in db.execute(select(Student.id, *cols).where(Student.id.in_(ids[i:i + _IN_CHUNK]))):
+            found[row[0]] = dict(zip(_ROSTER_FIELDS, row[1:]))
+    return found
+
+
+def _plan_roster(db: Session, records: list[dict], teacher_id: int | None) -> dict:
+    """
+    검증된 레코드와 현재 Student 행을 필드 단위로 비교해 반영 계획 생성 (쓰기 없음)
+    - inserts: 신규 매핑 (성별 미상이면 "")
+    - updates: 바뀐 필드만 담은 매핑 (성별 미상이면 기존 값 유지)
+    - changes: {id: {필드: [기존, 새 값]}}
+    """
+    existing = _existing_rows(db, [rec["id"] for rec in records])
+    inserts, updates, unchanged = [], [], []
+    changes: dict[int, dict[str, list]] = {}
+    for rec in records:
+        new = {f: rec.get(f) for f in _ROSTER_FIELDS}
+        new["homeroom_teacher_id"] = teacher_id
+        cur = existing.get(rec["id"])
+        if cur is None:
+            m = dict(new, id=rec["id"], student_no=str(rec["id"]))
+            m["gender"] = m["gender"] or ""
+            inserts.append(m)
+            continue
+        if not new["gender"]:
+            new["gender"] = cur["gender"]
+        diff = {f: [cur[f], new[f]] for f in _ROSTER_FIELDS if cur[f] != new[f]}
+        if diff:
+            changes[rec["id"]] = diff
+            updates.append(dict({f: new[f] for f in diff}, id=rec["id"]))
+        else:
+            unchanged.append(rec["id"])
+    return {"inserts": inserts, "updates": updates, "unchanged": unchanged, "changes": changes}
+
+
+def _write_plan(db: Session, plan: dict) -> None:
+    """
+    계획을 bulk insert/update 매핑으로 반영 (커밋은 호출자)
+    """
+    if plan["inserts"]:
+        db.bulk_insert_mappings(Student, plan["inserts"])
+    if plan["updates"]:
+        db.bulk_update_mappings(Student, plan["updates"])
+
+
+def _plan_result(plan: dict, skipped_reasons: dict[str, str]) -> dict:
     return {
-        "created": created,
-        "updated": updated,
-        "skipped": skipped,
+        "created": [str(m["id"]) for m in plan["inserts"]],
+        "updated": [str(m["id"]) for m in plan["updates"]],
+        "unchanged": [str(i) for i in plan["unchanged"]],
+        "skipped": list(skipped_reasons.keys()),
         "skipped_reasons": skipped_reasons,
     }
+
+
+def _jsonable(v: Any) -> Any:
+    return v.isoformat() if isinstance(v, date) else v
+
+
+@router.post("/homeroom/students/upload-xlsx", dependencies=[Depends(role_required("teacher","admin"))])
+@router.post("/homeroom/students/upload-csv", dependencies=[Depends(role_required("teacher","admin"))])
+def upload_students_xlsx(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False, description="true면 저장하지 않고 변경 내역(diff)과 커밋 토큰만 반환"),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    """
+    학생 명단 업로드 (xlsx 또는 csv, 확장자로 판별)
+    - csv: 템플릿과 같은 헤더 순서, utf-8(BOM 포함)/cp949 자동 판별. 엑셀 파싱이 없어 대용량에 유리
+    """
+    # 행 스트리밍 + 헤더 검증 (왼쪽에서 EXPECTED_HEADERS 길이만큼 확인)
+    _, rows = read_table(file, expected=EXPECTED_HEADERS)
+
+    check = _homeroom_checker(current, db)
+    records, skipped_reasons = _parse_roster(rows, check)
+    plan = _plan_roster(db, [rec for _, rec in records.values()], current.teacher_id)
+    result = _plan_result(plan, skipped_reasons)
+
+    if dry_run:
+        token = secrets.token_urlsafe(16)
+        now = time.time()
+        with _plans_lock:
+            for t in [t for t, p in _plans.items() if p["expires_at"] < now]:
+                del _plans[t]
+            _plans[token] = {"user_id": current.id, "expires_at": now + PLAN_TTL_SECONDS,
+                             "plan": plan, "skipped_reasons": skipped_reasons}
+        result["changes"] = {
+            str(sid): {f: [_jsonable(a), _jsonable(b)] for f, (a, b) in diff.items()}
+            for sid, diff in plan["changes"].items()
+        }
+        result["token"] = token
+        result["expires_in"] = PLAN_TTL_SECONDS
+        return result
+
+    _write_plan(db, plan)
+    db.commit()
+    homeroom_index.invalidate()
+    score_stats.invalidate()
+    return result
+
+
+@router.post("/homeroom/students/upload/commit/{token}", dependencies=[Depends(role_required("teacher","admin"))])
+def commit_students_upload(
+    token: str,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    """
+    dry_run 으로 검증/비교가 끝난 계획을 파일 재파싱 없이 반영
+    - 토큰은 발급한 사용자만, 1회만 사용 가능
+    - 미리보기 이후 다른 경로로 생긴 학생은 신규 대신 갱신으로 전환
+    """
+    with _plans_lock:
+        entry = _plans.get(token)
+        if not entry or entry["expires_at"] < time.time():
+            _plans.pop(token, None)
+            raise HTTPException(status_code=404, detail="미리보기 토큰이 없거나 만료되었습니다. 다시 업로드하세요.")
+        if entry["user_id"] != current.id:
+            raise HTTPException(status_code=403, detail="본인이 만든 미리보기만 반영할 수 있습니다.")
+        del _plans[token]
+
+    plan = entry["plan"]
+    raced = _existing_ids(db, [m["id"] for m in plan["inserts"]])
+    if raced:
+        plan = dict(plan,
+                    inserts=[m for m in plan["inserts"] if m["id"] not in raced],
+                    updates=plan["updates"] + [{k: v for k, v in m.items() if k != "student_no"}
+                                               for m in plan["inserts"] if m["id"] in raced])
+    _write_plan(db, plan)
+    db.commit()
+    homeroom_index.invalidate()
+    score_stats.invalidate()
+    return _plan_result(plan, entry["skipped_reasons"])
+
+
+# ------------------------- 백그라운드 작업 -------------------------
+@jobs.register("students_upload")
+def _students_upload_job(db: Session, job, progress: jobs.Progress) -> None:
+    """
+    upload_students_xlsx 의 백그라운드 버전: CHUNK_SIZE 행씩 파싱/반영 후 청크마다 커밋
+    """
+    current = db.get(User, job.user_id)
+    if current is None:
+        raise ValueError("작업 요청 사용자가 없습니다.")
+    check = _homeroom_checker(current, db)
+
+    if not job.total:
+        with open(job.spool_path, "rb") as fp:
+            _, rows = open_table(fp, job.filename, expected=EXPECTED_HEADERS)
+            progress.set_total(sum(1 for _ in rows))
+
+    with open(job.spool_path, "rb") as fp:
+        _, rows = open_table(fp, job.filename, expected=EXPECTED_HEADERS)
+        # 재개 시 이미 반영한 행은 건너뜀
+        for chunk in jobs.chunks(itertools.islice(rows, job.processed, None)):
+            records, reasons = _parse_roster(chunk, check)
+            plan = _plan_roster(db, [rec for _, rec in records.values()], current.teacher_id)
+            _write_plan(db, plan)
+            progress(processed=len(chunk), created=len(plan["inserts"]),
+                     updated=len(plan["updates"]), skipped_reasons=reasons)
+            homeroom_index.invalidate()
+            score_stats.invalidate()
@@ -0,0 +1,177 @@
+# routers/jobs.py
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Optional, List, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, Query
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from database import get_db, SessionLocal
+from models import Job, User
+from routers.auth import get_current_user, role_required
+from security import decode_token
+from tabular import table_kind
+from routers.counsels import CounselSummaryIn
+from routers.homeroom_upload import _homeroom_checker
+from routers.settings import _load_user_ai_key
+import jobs
+
+router = APIRouter()
+
+# WebSocket 진행 상황 전송 주기(초)
+WS_POLL_SECONDS = 1.0
+
+# ---------- Pydantic ----------
+class JobRead(BaseModel):
+    id: str
+    kind: str
+    status: str
+    filename: Optional[str]
+    total: int
+    processed: int
+    created: int
+    updated: int
+    skipped: int
+    percent: float
+    skipped_reasons: Dict[str, str]
+    error: Optional[str]
+    created_at: Optional[datetime]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+def _to_read(job: Job) -> JobRead:
+    return JobRead(
+        id=job.id, kind=job.kind, status=job.status, filename=job.filename,
+        total=job.total, processed=job.processed, created=job.created,
+        updated=job.updated, skipped=job.skipped,
+        percent=round(job.processed / job.total * 100, 1) if job.total else (100.0 if job.status == "done" else 0.0),
+        skipped_reasons=json.loads(job.skipped_reasons or "{}"),
+        error=job.error, created_at=job.created_at,
+        started_at=job.started_at, finished_at=job.finished_at,
+    )
+
+def _get_visible_job(db: Session, job_id: str, current: User) -> Job:
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="작업이 존재하지 않습니다.")
+    if current.role != "admin" and job.user_id != current.id:
+        raise HTTPException(status_code=403, detail="본인 작업만 조회할 수 있습니다.")
+    return job
+
+# ---------- 제출 ----------
+@router.post("/students-upload", response_model=JobRead,
+             dependencies=[Depends(role_required("teacher","admin"))])
+def submit_students_upload(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    """
+    학생 명단 업로드(xlsx/csv)를 백그라운드 작업으로 실행 (형식은 /homeroom/students/upload-xlsx 와 동일)
+    """
+    table_kind(file.filename)
+    return _to_read(jobs.submit(db, "students_upload", current.id, file))
+
+@router.post("/users-bulk", response_model=JobRead,
+             dependencies=[Depends(role_required("admin"))])
+def submit_users_bulk(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    """
+    사용자 일괄 등록(간단형 CSV)을 백그라운드 작업으로 실행
+    """
+    if not file.filename.lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="CSV 파일을 업로드하세요.")
+    return _to_read(jobs.submit(db, "users_bulk", current.id, file))
+
+@router.post("/counsel-summary", response_model=JobRead,
+             dependencies=[Depends(role_required("teacher","admin"))])
+def submit_counsel_summary(
+    payload: CounselSummaryIn,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    """
+    학반 상담일지 AI 일괄 요약 작업 등록 (교사는 담임 학반만)
+    - 요청자의 저장된 API 키로 호출
+    """
+    try:
+        _homeroom_checker(current, db)(payload.grade, payload.class_no)
+    except ValueError as ve:
+        raise HTTPException(status_code=403, detail=str(ve))
+    _load_user_ai_key(db, current.id, payload.provider)   # 키가 없으면 여기서 400
+    return _to_read(jobs.submit(db, "counsel_summary", current.id,
+                                params=payload.model_dump(mode="json")))
+
+# ---------- 조회 ----------
+@router.get("", response_model=List[JobRead])
+def list_jobs(limit: int = Query(20, ge=1, le=100),
+              db: Session = Depends(get_db),
+              current: User = Depends(get_current_user)):
+    q = db.query(Job)
+    if current.role != "admin":
+        q = q.filter(Job.user_id == current.id)
+    return [_to_read(j) for j in q.order_by(Job.created_at.desc()).limit(limit).all()]
+
+@router.get("/{job_id}", response_model=JobRead)
+def get_job(job_id: str,
+            db: Session = Depends(get_db),
+            current: User = Depends(get_current_user)):
+    return _to_read(_get_visible_job(db, job_id, current))
+
+def _ws_authorize(db: Session, token: str, job_id: str) -> Optional[int]:
+    """
+    WebSocket 인증/권한 확인. 거부 시 close code, 통과 시 None
+    """
+    try:
+        username = decode_token(token).get("sub")
+    except Exception:
+        username = None
+    current = db.query(User).filter(User.username == username).first() if username else None
+    if not current or not current.is_active:
+        return 4401
+    try:
+        _get_visible_job(db, job_id, current)
+    except HTTPException as he:
+        return 4403 if he.status_code == 403 else 4404
+    return None
+
+def _ws_poll(db: Session, job_id: str) -> dict:
+    db.expire_all()
+    return _to_read(db.get(Job, job_id)).model_dump(mode="json")
+
+@router.websocket("/{job_id}/ws")
+async def watch_job(websocket: WebSocket, job_id: str, token: str = Query(...)):
+    """
+    진행 상황 구독: 상태가 바뀔 때마다 JobRead JSON 전송, 완료/실패 시 종료
+    - 브라우저 WebSocket은 헤더를 못 넣으므로 ?token=<JWT> 로 인증
+    - DB 조회는 동기 I/O 라 스레드에서 실행 (이벤트 루프를 막지 않도록)
+    """
+    await websocket.accept()
+    db = SessionLocal()
+    try:
+        code = await asyncio.to_thread(_ws_authorize, db, token, job_id)
+        if code is not None:
+            await websocket.close(code=code)
+            return
+
+        last = None
+        while True:
+            payload = await asyncio.to_thread(_ws_poll, db, job_id)
+            if payload != last:
+                await websocket.send_json(payload)
+                last = payload
+            if payload["status"] in ("done", "failed"):
+                break
+            await asyncio.sleep(WS_POLL_SECONDS)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        db.close()
@@ -1,5 +1,5 @@
 # routers/midterm.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import Optional, List, Dict
@@ -7,6 +7,10 @@ from pydantic import BaseModel, Field, ConfigDict
 
 from database import get_db
 from models import Student, Subject, MidtermScore
+from routers.auth import role_required
+from score_bulk import parse_score_file, bulk_upsert_scores
+from score_stats import ScoreStatsRead, score_statistics, invalidate as invalidate_stats
+from achievement import refresh_semester_scores
 
 router = APIRouter()
 
@@ -58,7 +62,11 @@ def upsert_midterm(payload: MidtermUpsert, db: Session = Depends(get_db)):
         rec = MidtermScore(**payload.model_dump())
         db.add(rec)
 
+    db.flush()
+    refresh_semester_scores(db, payload.year, payload.term,
+                            student_ids=[payload.student_id], subject_ids=[payload.subject_id])
     db.commit(); db.refresh(rec)
+    invalidate_stats(MidtermScore.__tablename__)
     return rec
 
 @router.get("", response_model=List[MidtermRead])
@@ -81,12 +89,55 @@ def summary_midterm(student_id: int, year: int, term: int, db: Session = Depends
                       MidtermScore.term == term)
               .all())
 
-    subjects = [{"subject_id": r.MidtermScore.subject_id,
+    subjects = [{"subject_id": r.subject_id,
                  "subject_name": name,
-                 "score": r.MidtermScore.score} for r, name in rows]
+                 "score": r.score} for r, name in rows]
 
     total = sum(item["score"] for item in subjects) if subjects else 0
     average = round(total / len(subjects), 2) if subjects else 0.0
 
     return MidtermSummary(student_id=student_id, year=year, term=term,
                           subjects=subjects, total=total, average=average)
+
+@router.get("/stats", response_model=ScoreStatsRead,
+            dependencies=[Depends(role_required("teacher","admin"))])
+def stats_midterm(year: int, term: int,
+                  subject_id: Optional[int] = None,
+                  grade: Optional[int] = None,
+                  class_no: Optional[int] = None,
+                  db: Session = Depends(get_db)):
+    """
+    학급/학년 통계: 평균, 표준편차, 석차(동석차), 백분위, Z점수, 9등급 및 등급 컷
+    - subject_id 없으면 학생별 전 과목 총점 기준
+    """
+    return score_statistics(db, MidtermScore, year, term, subject_id=subject_id,
+                            grade=grade, class_no=class_no)
+
+# ---------- 일괄 업서트 ----------
+class MidtermBulkResult(BaseModel):
+    upserted: int
+    skipped: List[str]
+    skipped_reasons: Dict[str, str]
+
+@router.post("/bulk", response_model=MidtermBulkResult,
+             dependencies=[Depends(role_required("teacher","admin"))])
+def bulk_upsert_midterm(payload: List[MidtermUpsert], db: Session = Depends(get_db)):
+    items = [(f"#{i}", p.model_dump()) for i, p in enumerate(payload)]
+    return bulk_upsert_scores(db, MidtermScore, items)
+
+@router.post("/bulk-upload", response_model=MidtermBulkResult,
+             dependencies=[Depends(role_required("teacher","admin"))])
+def bulk_upload_midterm(file: UploadFile = File(...),
+                    subject_id: Optional[int] = Form(None),
+                    year: Optional[int] = Form(None),
+                    term: Optional[int] = Form(None),
+                    db: Session = Depends(get_db)):
+    """
+    xlsx/CSV 일괄 업로드 (헤더: student_id, subject_id, year, term, score, comment)
+    - subject_id/year/term 컬럼이 없으면 폼 값으로 채움 (한 과목 성적 입력용)
+    """
+    try:
+        items, skipped_reasons = parse_score_file(file, subject_id=subject_id, year=year, term=term)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return bulk_upsert_scores(db, MidtermScore, items, skipped_reasons)
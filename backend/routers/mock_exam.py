@@ -1,16 +1,24 @@
 # routers/mock_exam.py
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from typing import Optional, List, Dict
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import date
 
 from database import get_db
-from models import Student, MockExam, MockExamSubjectScore
+from models import Student, StudentYear, MockExam, MockExamSubjectScore
+from routers.auth import role_required
+from routers.homeroom_upload import _safe_int, _safe_str
+from tabular import read_table, cell
+import mock_conversion
 
 router = APIRouter()
 
 VALID_SUBJECTS = {"KOR","ENG","MATH","HIST","SOC1","SOC2","SCI1","SCI2"}
+SUBJECT_ORDER = ["KOR","ENG","MATH","HIST","SOC1","SOC2","SCI1","SCI2"]  # 표시 순서
+MOVING_WINDOW = 3  # 이동평균 기본 구간(회차 수)
 
 # ---------- Pydantic ----------
 class ExamCreate(BaseModel):
@@ -47,11 +55,142 @@ class ExamWithScores(BaseModel):
     exam: ExamRead
     scores: List[ScoreRead]
 
+class ConvertedScore(BaseModel):
+    standard_score: Optional[int]
+    percentile: Optional[int]
+    grade: Optional[int]
+
 class ExamSummary(BaseModel):
     exam: ExamRead
     scores: Dict[str, int]     # {"KOR": 92, "ENG": 88, ...}
     total: int
     average: float
+    converted: Dict[str, ConvertedScore] = {}  # 변환표가 있는 과목만
+
+class HistoryRound(BaseModel):
+    exam_id: int
+    year: int
+    round: int
+    name: Optional[str]
+    exam_date: Optional[date]
+    total: int
+    average: float
+
+class MockHistory(BaseModel):
+    student_id: int
+    name: Optional[str] = None          # 학급 조회 시 학생 이름/번호
+    number: Optional[int] = None
+    rounds: List[HistoryRound]          # 시간순 회차
+    subjects: List[str]                 # 행 순서
+    matrix: Dict[str, List[Optional[int]]]              # 과목 × 회차 점수
+    deltas: Dict[str, List[Optional[int]]]              # 직전 회차 대비 증감
+    moving_averages: Dict[str, List[Optional[float]]]   # 최근 window 회차 이동평균
+    subject_averages: Dict[str, float]
+    best_subject: Optional[str]
+    worst_subject: Optional[str]
+    converted: Dict[str, List[Optional[ConvertedScore]]] = {}  # matrix와 같은 모양, 변환표 없으면 None
+
+class ConversionRow(BaseModel):
+    raw_score: int
+    standard_score: Optional[int]
+    percentile: Optional[int]
+    grade: Optional[int]
+
+class ConversionTable(BaseModel):
+    year: int
+    round: int
+    school_grade: int          # 응시 학년, 0 = 학년 공통
+    subject_code: str
+    rows: List[ConversionRow]
+
+class ConversionLoadResult(BaseModel):
+    tables: List[str]          # "2025-6-3-KOR" 형식 (연도-회차-학년-과목, 학년 공통 표는 0)
+    rows: int
+    skipped: List[str]
+    skipped_reasons: Dict[str, str]
+
+class ImportResult(BaseModel):
+    exams_created: int
+    scores_upserted: int
+    skipped: List[str]
+    skipped_reasons: Dict[str, str]
+
+# ---------- 이력/추이 ----------
+# 응시 학년: 그 학년도 학적 기록, 없으면 현재 학년 (Student + StudentYear 조인 필요)
+_EXAM_GRADE = func.coalesce(StudentYear.grade, Student.grade)
+
+def _history_query():
+    # 회차 + 과목 점수 + 응시 학년을 한 번에 (점수 없는 회차도 포함)
+    return (select(MockExam.student_id, MockExam.id, MockExam.year, MockExam.round,
+                   MockExam.name, MockExam.exam_date,
+                   MockExamSubjectScore.subject_code, MockExamSubjectScore.score, _EXAM_GRADE)
+            .join(Student, Student.id == MockExam.student_id)
+            .outerjoin(StudentYear, and_(StudentYear.student_id == MockExam.student_id,
+                                         StudentYear.school_year == MockExam.year))
+            .outerjoin(MockExamSubjectScore, MockExamSubjectScore.exam_id == MockExam.id))
+
+def _build_history(student_id: int, rows, window: int = MOVING_WINDOW) -> dict:
+    """
+    (student_id, exam_id, year, round, name, exam_date, subject_code, score, 응시 학년) 행들을
+    과목 × 회차 행렬과 추이 지표로 변환. rows는 회차 시간순으로 정렬돼 있어야 함
+    """
+    rounds: List[dict] = []
+    col: Dict[int, int] = {}              # exam_id -> 열 번호
+    cells: Dict[str, Dict[int, int]] = {} # 과목 -> {열: 점수}
+    grades: List[int] = []                # 열 번호 -> 응시 학년 (변환표 조회용)
+    for _, exam_id, year, rnd, name, exam_date, code, score, exam_grade in rows:
+        if exam_id not in col:
+            col[exam_id] = len(rounds)
+            rounds.append({"exam_id": exam_id, "year": year, "round": rnd, "name": name,
+                           "exam_date": exam_date, "total": 0, "average": 0.0, "_n": 0})
+            grades.append(exam_grade)
+        if code is not None:
+            j = col[exam_id]
+            cells.setdefault(code, {})[j] = score
+            rounds[j]["total"] += score
+            rounds[j]["_n"] += 1
+    for rd in rounds:
+        n = rd.pop("_n")
+        rd["average"] = round(rd["total"] / n, 2) if n else 0.0
+
+    order = {c: i for i, c in enumerate(SUBJECT_ORDER)}
+    subjects = sorted(cells, key=lambda c: (order.get(c, len(order)), c))
+    matrix, deltas, moving, averages, converted = {}, {}, {}, {}, {}
+    for code in subjects:
+        row = [cells[code].get(j) for j in range(len(rounds))]
+        matrix[code] = row
+        converted[code] = [
+            mock_conversion.lookup(rounds[j]["year"], rounds[j]["round"], grades[j], code, v)
+            if v is not None else None
+            for j, v in enumerate(row)
+        ]
+        prev = None
+        d_row, m_row, recent = [], [], []
+        for v in row:
+            d_row.append(v - prev if v is not None and prev is not None else None)
+            if v is not None:
+                prev = v
+                recent = (recent + [v])[-window:]
+            m_row.append(round(sum(recent) / len(recent), 2) if v is not None else None)
+        deltas[code] = d_row
+        moving[code] = m_row
+        present = [v for v in row if v is not None]
+        averages[code] = round(sum(present) / len(present), 2)
+
+    return {
+        "student_id": student_id,
+        "rounds": rounds,
+        "subjects": subjects,
+        "matrix": matrix,
+        "deltas": deltas,
+        "moving_averages": moving,
+        "subject_averages": averages,
+        "best_subject": max(averages, key=averages.get) if averages else None,
+        "worst_subject": min(averages, key=averages.get) if averages else None,
+        "converted": converted,
+    }
+
+_HISTORY_ORDER = (MockExam.year, MockExam.round, MockExam.exam_date, MockExam.id)
 
 # ---------- 엔드포인트 ----------
 @router.post("/exams", response_model=ExamRead)
@@ -127,4 +266,244 @@ def exam_summary(exam_id: int, db: Session = Depends(get_db)):
     scores_map = {r.subject_code: r.score for r in rows}
     total = sum(scores_map.values()) if scores_map else 0
     avg = round(total / len(scores_map), 2) if scores_map else 0.0
-    return ExamSummary(exam=exam, scores=scores_map, total=total, average=avg)
+    mock_conversion.sync(db)
+    exam_grade = db.execute(
+        select(_EXAM_GRADE).select_from(Student)
+        .outerjoin(StudentYear, and_(StudentYear.student_id == Student.id,
+                                     StudentYear.school_year == exam.year))
+        .where(Student.id == exam.student_id)
+    ).scalar()
+    converted = {}
+    for code, v in scores_map.items():
+        c = mock_conversion.lookup(exam.year, exam.round, exam_grade, code, v)
+        if c is not None:
+            converted[code] = c
+    return ExamSummary(exam=exam, scores=scores_map, total=total, average=avg, converted=converted)
+
+@router.get("/history", response_model=MockHistory)
+def student_history(student_id: int,
+                    year: Optional[int] = None,
+                    window: int = Query(MOVING_WINDOW, ge=1, le=12),
+                    db: Session = Depends(get_db)):
+    """
+    학생 한 명의 전체 모의고사 이력 (조인 쿼리 1회)
+    - 과목 × 회차 행렬, 직전 대비 증감, 이동평균, 강/약 과목
+    """
+    mock_conversion.sync(db)
+    q = _history_query().where(MockExam.student_id == student_id)
+    if year is not None:
+        q = q.where(MockExam.year == year)
+    rows = db.execute(q.order_by(*_HISTORY_ORDER)).all()
+    return _build_history(student_id, rows, window)
+
+@router.get("/history/class", response_model=List[MockHistory])
+def class_history(grade: int, class_no: int,
+                  year: Optional[int] = None,
+                  window: int = Query(MOVING_WINDOW, ge=1, le=12),
+                  db: Session = Depends(get_db)):
+    """
+    학급 전체 학생의 이력 행렬 (조인 쿼리 1회, 번호순)
+    """
+    mock_conversion.sync(db)
+    q = (_history_query()
+         .add_columns(Student.name, Student.number)
+         .where(Student.grade == grade, Student.class_no == class_no))
+    if year is not None:
+        q = q.where(MockExam.year == year)
+    rows = db.execute(q.order_by(Student.number, Student.id, *_HISTORY_ORDER)).all()
+
+    out: List[dict] = []
+    start = 0
+    for i in range(1, len(rows) + 1):
+        if i == len(rows) or rows[i][0] != rows[start][0]:
+            chunk = rows[start:i]
+            item = _build_history(chunk[0][0], [r[:9] for r in chunk], window)
+            item["name"], item["number"] = chunk[0][9], chunk[0][10]
+            out.append(item)
+            start = i
+    return out
+
+# ---------- 학년 단위 일괄 가져오기 ----------
+@router.post("/import", response_model=ImportResult,
+             dependencies=[Depends(role_required("teacher","admin"))])
+def import_exam(file: UploadFile = File(...),
+                year: int = Form(...),
+                round: int = Form(..., ge=1, le=12),
+                name: str = Form("모의고사"),
+                exam_date: Optional[date] = Form(None),
+                db: Session = Depends(get_db)):
+    """
+    한 회차 성적표(xlsx/CSV)를 한 번에 반영
+    - 헤더: student_no, KOR, ENG, MATH, HIST, SOC1, SOC2, SCI1, SCI2 (과목 열은 일부만 있어도 됨)
+    - 학생별 MockExam(연도/회차/이름)이 없으면 생성, 과목 점수는 업서트
+    - 빈 칸 과목은 건너뜀, 문제 있는 행은 skipped_reasons 로 보고
+    """
+    header, rows = read_table(file)
+    if "student_no" not in header:
+        raise HTTPException(status_code=400, detail="헤더에 student_no 컬럼이 필요합니다.")
+    sno_idx = header.index("student_no")
+    subj_idx = {h: i for i, h in enumerate(header) if h in VALID_SUBJECTS}
+    if not subj_idx:
+        raise HTTPException(status_code=400, detail=f"과목 컬럼이 없습니다. 가능: {sorted(VALID_SUBJECTS)}")
+
+    skipped_reasons: dict[str, str] = {}
+    parsed: dict[str, tuple[str, dict[str, int]]] = {}   # student_no -> (행키, {과목: 점수})
+    for r, row in rows:
+        key = f"ROW{r}"
+        sno = _safe_str(cell(row, sno_idx))
+        if sno and sno.endswith(".0"):  # 엑셀 숫자 셀
+            sno = sno[:-2]
+        if not sno:
+            skipped_reasons[key] = "student_no 누락"
+            continue
+        scores: dict[str, int] = {}
+        bad = None
+        for code, i in subj_idx.items():
+            raw = cell(row, i)
+            if _safe_str(raw) is None:
+                continue
+            v = _safe_int(raw)
+            if v is None or not (0 <= v <= 100):
+                bad = f"{code} 점수 오류"
+                break
+            scores[code] = v
+        if bad:
+            skipped_reasons[key] = bad
+            continue
+        if not scores:
+            skipped_reasons[key] = "입력된 과목 점수 없음"
+            continue
+        if sno in parsed:
+            skipped_reasons[parsed[sno][0]] = f"student_no 중복({key}에서 덮어씀)"
+        parsed[sno] = (key, scores)
+
+    # student_no → id (IN 1회)
+    sid_by_no = dict(db.execute(
+        select(Student.student_no, Student.id).where(Student.student_no.in_(list(parsed)))
+    ).all()) if parsed else {}
+    for sno, (key, _) in list(parsed.items()):
+        if sno not in sid_by_no:
+            skipped_reasons[key] = "학생이 존재하지 않습니다."
+            del parsed[sno]
+
+    student_ids = [sid_by_no[sno] for sno in parsed]
+    exam_filter = (MockExam.year == year, MockExam.round == round, MockExam.name == name)
+
+    def _exam_ids() -> dict[int, int]:
+        return dict(db.execute(
+            select(MockExam.student_id, MockExam.id)
+            .where(*exam_filter, MockExam.student_id.in_(student_ids))
+        ).all()) if student_ids else {}
+
+    # 1) 회차(MockExam) 없는 학생만 생성
+    existing = _exam_ids()
+    missing = [{"student_id": sid, "year": year, "round": round, "name": name, "exam_date": exam_date}
+               for sid in student_ids if sid not in existing]
+    if missing:
+        db.execute(sqlite_insert(MockExam).on_conflict_do_nothing(
+            index_elements=[MockExam.student_id, MockExam.year, MockExam.round, MockExam.name]
+        ), missing)
+    exam_by_sid = _exam_ids() if missing else existing
+
+    # 2) 과목 점수 업서트 (한 문장 executemany)
+    values = [{"exam_id": exam_by_sid[sid_by_no[sno]], "subject_code": code, "score": v}
+              for sno, (_, scores) in parsed.items() for code, v in scores.items()]
+    if values:
+        stmt = sqlite_insert(MockExamSubjectScore)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MockExamSubjectScore.exam_id, MockExamSubjectScore.subject_code],
+            set_={"score": stmt.excluded.score},
+        )
+        db.execute(stmt, values)
+    db.commit()
+
+    return ImportResult(
+        exams_created=len(missing),
+        scores_upserted=len(values),
+        skipped=list(skipped_reasons.keys()),
+        skipped_reasons=skipped_reasons,
+    )
+
+# ---------- 변환표(표준점수/백분위/등급) ----------
+CONVERSION_HEADERS = ["year", "round", "subject_code", "raw_score", "standard_score", "percentile", "grade",
+                      "school_grade"]
+
+@router.get("/conversions", response_model=List[ConversionTable])
+def list_conversions(year: Optional[int] = None,
+                     round: Optional[int] = None,
+                     school_grade: Optional[int] = None,
+                     subject_code: Optional[str] = None,
+                     db: Session = Depends(get_db)):
+    """
+    메모리에 적재된 변환표 조회 (원점수별 대표값만, 빈 원점수는 아래 점수 값으로 채워짐)
+    """
+    mock_conversion.sync(db)
+    out = []
+    for y, rnd, g, code in mock_conversion.loaded_keys():
+        if (year is not None and y != year) or (round is not None and rnd != round) \
+                or (school_grade is not None and g != school_grade) \
+                or (subject_code is not None and code != subject_code):
+            continue
+        table = mock_conversion.get_table(y, rnd, g, code) or []
+        rows = [ConversionRow(raw_score=raw, standard_score=e[0], percentile=e[1], grade=e[2])
+                for raw, e in enumerate(table) if e is not None]
+        out.append(ConversionTable(year=y, round=rnd, school_grade=g, subject_code=code, rows=rows))
+    return out
+
+@router.post("/conversions/upload", response_model=ConversionLoadResult,
+             dependencies=[Depends(role_required("teacher","admin"))])
+def upload_conversions(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """
+    변환표 일괄 적재 (xlsx/CSV)
+    - 헤더: year, round, subject_code, raw_score, standard_score, percentile, grade[, school_grade]
+    - school_grade(응시 학년) 열이 없거나 비면 학년 공통 표(0)
+    - 파일에 포함된 (year, round, school_grade, subject_code) 표는 통째로 교체
+    """
+    header, rows = read_table(file, expected=CONVERSION_HEADERS[:4])
+    idx = {h: i for i, h in enumerate(header) if h in CONVERSION_HEADERS}
+    items: List[dict] = []
+    skipped_reasons: dict[str, str] = {}
+    for r, row in rows:
+        key = f"ROW{r}"
+        data = {h: _safe_int(cell(row, idx.get(h))) for h in CONVERSION_HEADERS if h != "subject_code"}
+        data["subject_code"] = (_safe_str(cell(row, idx["subject_code"])) or "").upper()
+        if data["subject_code"] not in VALID_SUBJECTS:
+            skipped_reasons[key] = "subject_code 오류"
+            continue
+        if data["year"] is None or data["round"] is None:
+            skipped_reasons[key] = "year/round 누락"
+            continue
+        if data["raw_score"] is None or not (0 <= data["raw_score"] <= mock_conversion.MAX_RAW):
+            skipped_reasons[key] = "raw_score 오류"
+            continue
+        if data["school_grade"] is not None and not (0 <= data["school_grade"] <= 3):
+            skipped_reasons[key] = "school_grade 오류"
+            continue
+        items.append(data)
+
+    keys = mock_conversion.save_tables(db, items)
+    return ConversionLoadResult(
+        tables=[f"{y}-{rnd}-{g}-{code}" for y, rnd, g, code in keys],
+        rows=len(items),
+        skipped=list(skipped_reasons.keys()),
+        skipped_reasons=skipped_reasons,
+    )
+
+@router.post("/conversions/derive", response_model=ConversionLoadResult,
+             dependencies=[Depends(role_required("teacher","admin"))])
+def derive_conversions(year: int, round: int,
+                       subject_code: Optional[str] = None,
+                       school_grade: Optional[int] = None,
+                       db: Session = Depends(get_db)):
+    """
+    공개 변환표가 없을 때: 저장된 해당 회차 점수 분포로 변환표 산출/저장
+    - 응시 학년별로 따로 산출 (school_grade 를 주면 그 학년만)
+    """
+    if subject_code is not None and subject_code not in VALID_SUBJECTS:
+        raise HTTPException(status_code=400, detail=f"subject_code는 {sorted(VALID_SUBJECTS)} 중 하나여야 합니다.")
+    keys = mock_conversion.derive_tables(db, year, round, subject_code, school_grade)
+    return ConversionLoadResult(
+        tables=[f"{y}-{rnd}-{g}-{code}" for y, rnd, g, code in keys],
+        rows=sum(1 for k in keys for e in (mock_conversion.get_table(*k) or []) if e is not None),
+        skipped=[], skipped_reasons={},
+    )
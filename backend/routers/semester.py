@@ -0,0 +1,120 @@
+# routers/semester.py
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Optional, List
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+
+from database import get_db
+from models import Student, StudentYear, Subject, SubjectWeight, SemesterScore
+from routers.auth import role_required
+from achievement import refresh_semester_scores
+
+router = APIRouter()
+
+# ---------- Pydantic ----------
+class WeightUpsert(BaseModel):
+    subject_id: int
+    year: int
+    term: int = Field(ge=1, le=2)
+    midterm_ratio: int = Field(ge=0, le=100)
+    final_ratio: int = Field(ge=0, le=100)
+    performance_ratio: int = Field(default=0, ge=0, le=100)
+
+    @model_validator(mode="after")
+    def _sum_100(self):
+        if self.midterm_ratio + self.final_ratio + self.performance_ratio != 100:
+            raise ValueError("반영 비율의 합은 100이어야 합니다.")
+        return self
+
+class WeightRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    subject_id: int
+    year: int
+    term: int
+    midterm_ratio: int
+    final_ratio: int
+    performance_ratio: int
+
+class SemesterRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    student_id: int
+    subject_id: int
+    year: int
+    term: int
+    midterm: Optional[int]
+    final: Optional[int]
+    score: Optional[float]
+    achievement: Optional[str]
+
+class ComputeResult(BaseModel):
+    year: int
+    term: int
+    grade: Optional[int]
+    refreshed: int
+
+# ---------- 반영 비율 ----------
+@router.get("/weights", response_model=List[WeightRead])
+def list_weights(year: int, term: int, db: Session = Depends(get_db)):
+    return (db.query(SubjectWeight)
+              .filter(SubjectWeight.year == year, SubjectWeight.term == term)
+              .order_by(SubjectWeight.subject_id).all())
+
+@router.put("/weights", response_model=WeightRead,
+            dependencies=[Depends(role_required("teacher","admin"))])
+def upsert_weight(payload: WeightUpsert, db: Session = Depends(get_db)):
+    """
+    과목 반영 비율 업서트 → 해당 과목의 학기 성적 즉시 재계산
+    """
+    if not db.get(Subject, payload.subject_id):
+        raise HTTPException(status_code=404, detail="과목이 존재하지 않습니다.")
+    stmt = sqlite_insert(SubjectWeight).values(**payload.model_dump())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SubjectWeight.subject_id, SubjectWeight.year, SubjectWeight.term],
+        set_={
+            "midterm_ratio": stmt.excluded.midterm_ratio,
+            "final_ratio": stmt.excluded.final_ratio,
+            "performance_ratio": stmt.excluded.performance_ratio,
+        },
+    )
+    db.execute(stmt)
+    refresh_semester_scores(db, payload.year, payload.term, subject_ids=[payload.subject_id])
+    db.commit()
+    return (db.query(SubjectWeight)
+              .filter_by(subject_id=payload.subject_id, year=payload.year, term=payload.term)
+              .one())
+
+# ---------- 학기 성적 ----------
+@router.post("/compute", response_model=ComputeResult,
+             dependencies=[Depends(role_required("teacher","admin"))])
+def compute_semester(year: int, term: int, grade: Optional[int] = None,
+                     db: Session = Depends(get_db)):
+    """
+    학년(또는 전체) 학기 성적을 한 번의 SQL로 재계산
+    - 평소에는 중간/기말 업서트 시 증분 갱신되므로, 비율 일괄 변경 후 재계산 용도
+    """
+    n = refresh_semester_scores(db, year, term, grade=grade)
+    db.commit()
+    return ComputeResult(year=year, term=term, grade=grade, refreshed=n)
+
+@router.get("", response_model=List[SemesterRead])
+def list_semester(year: int, term: int,
+                  grade: Optional[int] = None,
+                  class_no: Optional[int] = None,
+                  student_id: Optional[int] = None,
+                  subject_id: Optional[int] = None,
+                  db: Session = Depends(get_db)):
+    q = (db.query(SemesterScore)
+           .filter(SemesterScore.year == year, SemesterScore.term == term))
+    if grade is not None or class_no is not None:
+        # 그 학년도의 학년/반 (전환 전 기록이 있으면 student_years, 없으면 현재 값)
+        q = (q.join(Student, Student.id == SemesterScore.student_id)
+              .outerjoin(StudentYear, and_(StudentYear.student_id == Student.id,
+                                           StudentYear.school_year == year)))
+        if grade is not None: q = q.filter(func.coalesce(StudentYear.grade, Student.grade) == grade)
+        if class_no is not None: q = q.filter(func.coalesce(StudentYear.class_no, Student.class_no) == class_no)
+    if student_id is not None: q = q.filter(SemesterScore.student_id == student_id)
+    if subject_id is not None: q = q.filter(SemesterScore.subject_id == subject_id)
+    return q.order_by(SemesterScore.student_id, SemesterScore.subject_id).all()
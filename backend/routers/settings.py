@@ -1,25 +1,34 @@
 # routers/settings.py
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Query
+from pydantic import BaseModel, Field, ValidationError
 from sqlalchemy.orm import Session
-import os, requests
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+import asyncio, json, os, threading, time
 from datetime import datetime
 
 from database import get_db
 from models import UserSetting
 from routers.auth import get_current_user, User
 from security import encrypt_secret, decrypt_secret
+import ai_client
+import ai_cache
+import homeroom_index
+from tabular import read_table, cell
 
 from pydantic import BaseModel, Field
 from fastapi import Depends, HTTPException, APIRouter
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 from database import get_db
 from models import HomeroomAssignment
 from routers.auth import get_current_user, role_required
 from models import User
+from routers.homeroom_upload import _safe_int, _safe_str
 
 router = APIRouter()
 
@@ -38,7 +47,39 @@ def _mask_key(k: str) -> str:
     return f"****{k[-4:]}"
 
 # ---------------- DB 접근 ----------------
+# 복호화한 키 캐시: (user_id, provider) → (만료 시각, 키). 저장/삭제 시 즉시 무효화
+AI_KEY_CACHE_SECONDS = int(os.getenv("AI_KEY_CACHE_SECONDS", "300"))
+_key_cache: dict[tuple[int, str], tuple[float, str]] = {}
+_key_cache_lock = threading.Lock()
+
+def _invalidate_ai_key(user_id: int, provider: str) -> None:
+    with _key_cache_lock:
+        _key_cache.pop((user_id, provider), None)
+
+def _cached_ai_key(user_id: int, provider: str) -> str | None:
+    with _key_cache_lock:
+        hit = _key_cache.get((user_id, provider))
+    if hit and hit[0] > time.monotonic():
+        return hit[1]
+    return None
+
 def _load_user_ai_key(db: Session, user_id: int, provider: str) -> str:
+    key = _cached_ai_key(user_id, provider)
+    if key is not None:
+        return key
+    key = _read_user_ai_key(db, user_id, provider)
+    with _key_cache_lock:
+        _key_cache[(user_id, provider)] = (time.monotonic() + AI_KEY_CACHE_SECONDS, key)
+    return key
+
+async def _load_user_ai_key_async(db: Session, user_id: int, provider: str) -> str:
+    # 캐시 적중이면 스레드풀을 거치지 않음
+    key = _cached_ai_key(user_id, provider)
+    if key is not None:
+        return key
+    return await run_in_threadpool(_load_user_ai_key, db, user_id, provider)
+
+def _read_user_ai_key(db: Session, user_id: int, provider: str) -> str:
     setting = db.query(UserSetting).filter(UserSetting.user_id == user_id).first()
     if not setting:
         raise HTTPException(status_code=400, detail="AI 설정 없음")
@@ -78,6 +119,7 @@ def set_my_ai_key(payload: ApiKeyIn, current: User = Depends(get_current_user),
         setting.openai_api_key_encrypted = encrypt_secret(payload.api_key)
     setting.updated_at = datetime.utcnow()
     db.commit()
+    _invalidate_ai_key(current.id, payload.provider)
     return ApiKeyOut(provider=payload.provider, has_key=True, masked=_mask_key(payload.api_key))
 
 @router.delete("/me/ai-key/{provider}")
@@ -92,6 +134,7 @@ def delete_my_ai_key(provider: str, current: User = Depends(get_current_user), d
         setting.openai_api_key_encrypted = None
     setting.updated_at = datetime.utcnow()
     db.commit()
+    _invalidate_ai_key(current.id, provider)
     return {"ok":True}
 
 # ---------------- 테스트 호출 ----------------
@@ -99,49 +142,91 @@ class AiTestIn(BaseModel):
     provider: str = Field(..., pattern="^(gemini|openai)$")
     prompt: str
     model: str | None = None
+    no_cache: bool = False   # true면 캐시를 무시하고 새로 생성
 
-DEFAULT_MODELS = {
-    "gemini": "gemini-2.5-flash",
-    "openai": "gpt-5-mini",
-}
+DEFAULT_MODELS = ai_client.DEFAULT_MODELS
 
 class AiTestOut(BaseModel):
     provider: str
     model: str
     output_text: str
+    cached: bool = False
 
 @router.post("/ai/test", response_model=AiTestOut)
-def test_ai(payload: AiTestIn, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    key = _load_user_ai_key(db, current.id, payload.provider)
+async def test_ai(payload: AiTestIn, current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    # 키 조회(DB/복호화)는 캐시 또는 스레드풀에서, 제공자 호출은 공용 비동기 클라이언트로
+    key = await _load_user_ai_key_async(db, current.id, payload.provider)
+    model, text, cached = await ai_client.generate_cached(
+        payload.provider, key, payload.prompt, payload.model, no_cache=payload.no_cache)
     if payload.provider == "gemini":
-        model = payload.model or DEFAULT_MODELS["gemini"]
-        base = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
-        url = f"{base}/v1beta/models/{model}:generateContent?key={key}"
-        body = {"contents":[{"parts":[{"text":payload.prompt}]}]}
-        r = requests.post(url, json=body, timeout=20)
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"Gemini 오류: {r.text}")
-        data = r.json()
-        text = ""
-        try:
-            cands = data.get("candidates") or []
-            if cands:
-                parts = (cands[0].get("content") or {}).get("parts") or []
-                text = "".join(p.get("text", "") for p in parts)
-        except:  # noqa
-            text = ""
-        return AiTestOut(provider="gemini", model=model, output_text=text or "(빈 응답)")
+        text = text or "(빈 응답)"
+    return AiTestOut(provider=payload.provider, model=model, output_text=text, cached=cached)
+
+def _sse(data: dict, event: str | None = None) -> bytes:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+@router.post("/ai/stream")
+async def stream_ai(payload: AiTestIn, request: Request,
+                    current: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    /ai/test 의 스트리밍판 (Server-Sent Events)
+    - event: meta  → {provider, model, cached}
+    - data         → {"delta": "..."} 텍스트 조각
+    - event: done / error → 종료
+    - 조각을 하나 보낼 때마다 전송이 끝나야 다음 조각을 읽으므로 느린 클라이언트에 맞춰 업스트림도 멈춤
+    - 클라이언트가 끊으면 업스트림 요청도 닫고 중단 (부분 응답은 캐시하지 않음)
+    """
+    key = await _load_user_ai_key_async(db, current.id, payload.provider)
+    model = payload.model or DEFAULT_MODELS[payload.provider]
+    ckey = ai_cache.make_key(payload.provider, model, payload.prompt)
+    if payload.no_cache:
+        ai_cache.note_bypass()
+        hit = None
     else:
-        model = payload.model or DEFAULT_MODELS["openai"]
-        url = "https://api.openai.com/v1/chat/completions"
-        body = {"model": model, "messages": [{"role": "user", "content": payload.prompt}]}
-        r = requests.post(url, json=body, headers={"Authorization": f"Bearer {key}"}, timeout=20)
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"OpenAI 오류: {r.text}")
-        data = r.json()
-        text = data["choices"][0]["message"]["content"]
-        return AiTestOut(provider="openai", model=model, output_text=text)
-    
+        hit = await asyncio.to_thread(ai_cache.get, ckey)
+
+    async def _events():
+        yield _sse({"provider": payload.provider, "model": model, "cached": hit is not None}, "meta")
+        if hit is not None:
+            yield _sse({"delta": hit})
+            yield _sse({}, "done")
+            return
+        parts: list[str] = []
+        chunks = ai_client.stream(payload.provider, key, payload.prompt, model)
+        try:
+            async for chunk in chunks:
+                if await request.is_disconnected():
+                    return
+                parts.append(chunk)
+                yield _sse({"delta": chunk})
+        except HTTPException as he:
+            yield _sse({"detail": he.detail}, "error")
+            return
+        finally:
+            await chunks.aclose()
+        text = "".join(parts)
+        if text:
+            await asyncio.to_thread(ai_cache.put, ckey, payload.provider, model, text)
+        yield _sse({}, "done")
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/ai/cache/stats", dependencies=[Depends(role_required("admin"))])
+def ai_cache_stats():
+    """
+    AI 응답 캐시 현황 (적중/미스/우회 횟수, 적중률, 항목 수/디스크 사용량)
+    """
+    return ai_cache.stats()
+
+@router.delete("/ai/cache", dependencies=[Depends(role_required("admin"))])
+def clear_ai_cache():
+    return {"ok": True, "deleted": ai_cache.clear()}
+
 
 # ---------------- 담임반 선택 ----------------
 class HomeroomIn(BaseModel):
@@ -216,6 +301,7 @@ def set_my_homeroom(
         mine.grade = payload.grade
         mine.class_no = payload.class_no
         db.commit(); db.refresh(mine)
+        homeroom_index.invalidate()
         return mine
 
     # 새 배정
@@ -226,4 +312,168 @@ def set_my_homeroom(
         teacher_user_id=current.id,
     )
     db.add(new_row); db.commit(); db.refresh(new_row)
-    return new_row
\ No newline at end of file
+    homeroom_index.invalidate()
+    return new_row
+
+# ---------------- 담임 일괄 배정 (관리자) ----------------
+HOMEROOM_HEADERS = ["학년도", "학년", "반", "교사아이디"]
+
+class HomeroomAssignIn(BaseModel):
+    school_year: int = Field(..., ge=2000, le=2100)
+    grade: int = Field(..., ge=1, le=3)
+    class_no: int = Field(..., ge=1, le=30)
+    username: str = Field(..., min_length=1)
+
+class HomeroomAssignRead(BaseModel):
+    school_year: int
+    grade: int
+    class_no: int
+    teacher_user_id: int
+    username: str
+    full_name: Optional[str]
+
+def _assign_homerooms(db: Session, items: list[HomeroomAssignIn], overwrite: bool,
+                      skipped_reasons: dict[str, str]) -> dict:
+    """
+    (학년도, 학년, 반) → 교사 일괄 배정
+    - 교사 조회 1회, 기존 배정 조회 1회로 충돌 판정 (uq_homeroom_year_grade_class 기준)
+    - 다른 교사가 가진 학반: overwrite=False 면 스킵 (단, 그 교사의 다른 반 이동도 이번에 반영되면 허용)
+    - 교사는 학년도당 한 학반: 기존 다른 학반 배정은 삭제(이동)
+    - 반영은 삭제 1문 + ON CONFLICT 업서트 1문
+    """
+    key_of = lambda y, g, c: f"{y}-{g}-{c}"
+    usernames = {it.username.strip() for it in items}
+    teachers = {
+        u.username: u.id
+        for u in db.query(User.username, User.id)
+                   .filter(User.username.in_(usernames),
+                           User.role.in_(("teacher", "admin")),
+                           User.is_active.is_(True))
+    }
+
+    # 요청 내부 검증: 학반 중복/교사 중복 (뒤 행은 스킵)
+    wanted: dict[tuple[int, int, int], int] = {}
+    teacher_year: dict[tuple[int, int], tuple[int, int, int]] = {}
+    for it in items:
+        cls = (it.school_year, it.grade, it.class_no)
+        key = key_of(*cls)
+        uid = teachers.get(it.username.strip())
+        if uid is None:
+            skipped_reasons[key] = f"교사 계정 없음/비활성: {it.username}"
+        elif cls in wanted:
+            skipped_reasons[key] = "같은 학반이 중복되었습니다."
+        elif (it.school_year, uid) in teacher_year:
+            skipped_reasons[key] = f"{it.username} 교사가 같은 학년도에 이미 {key_of(*teacher_year[(it.school_year, uid)])} 으로 지정되었습니다."
+        else:
+            wanted[cls] = uid
+            teacher_year[(it.school_year, uid)] = cls
+
+    years = {cls[0] for cls in wanted}
+    existing = {
+        (r.school_year, r.grade, r.class_no): r.teacher_user_id
+        for r in db.query(HomeroomAssignment.school_year, HomeroomAssignment.grade,
+                          HomeroomAssignment.class_no, HomeroomAssignment.teacher_user_id)
+                   .filter(HomeroomAssignment.school_year.in_(years))
+    } if years else {}
+
+    # 다른 교사가 가진 학반은 그 교사의 이동이 '승인'될 때만 허용 → 스킵이 생기면 그 교사에 기대던 행도 다시 판정
+    # (행 순서와 무관하게 밀려난 교사가 담임 없이 남지 않도록 더 바뀌지 않을 때까지 반복)
+    requested = set(teacher_year)
+    changed = True
+    while changed:
+        changed = False
+        for cls, uid in list(wanted.items()):
+            cur = existing.get(cls)
+            if cur is None or cur == uid or overwrite or (cls[0], cur) in teacher_year:
+                continue
+            if (cls[0], cur) in requested:
+                skipped_reasons[key_of(*cls)] = "기존 담임 교사의 학반 이동이 스킵되어 배정할 수 없습니다."
+            else:
+                skipped_reasons[key_of(*cls)] = "이미 다른 교사가 배정한 학반입니다. (덮어쓰려면 overwrite=true)"
+            del teacher_year[(cls[0], uid)]
+            del wanted[cls]
+            changed = True
+
+    created, updated, unchanged = [], [], []
+    for cls, uid in wanted.items():
+        cur = existing.get(cls)
+        if cur is None:
+            created.append(cls)
+        elif cur == uid:
+            unchanged.append(cls)
+        else:
+            updated.append(cls)
+
+    # 이번에 배정되는 교사의 같은 학년도 다른 학반 배정 / 덮어써서 밀려난 교사의 배정은 삭제
+    moved = [(y, g, c) for (y, g, c), uid in existing.items()
+             if (y, g, c) not in wanted and (y, uid) in teacher_year]
+    if moved:
+        db.execute(delete(HomeroomAssignment).where(
+            tuple_(HomeroomAssignment.school_year, HomeroomAssignment.grade,
+                   HomeroomAssignment.class_no).in_(moved)))
+    rows = [{"school_year": y, "grade": g, "class_no": c, "teacher_user_id": uid,
+             "updated_at": datetime.utcnow()}
+            for (y, g, c), uid in wanted.items() if (y, g, c) not in unchanged]
+    if rows:
+        stmt = sqlite_insert(HomeroomAssignment)
+        db.execute(stmt.values(rows).on_conflict_do_update(
+            index_elements=["school_year", "grade", "class_no"],
+            set_={"teacher_user_id": stmt.excluded.teacher_user_id,
+                  "updated_at": stmt.excluded.updated_at},
+        ))
+    db.commit()
+    homeroom_index.invalidate()
+    return {
+        "created": [key_of(*k) for k in created],
+        "updated": [key_of(*k) for k in updated],
+        "unchanged": [key_of(*k) for k in unchanged],
+        "released": [key_of(*k) for k in moved],
+        "skipped": list(skipped_reasons.keys()),
+        "skipped_reasons": skipped_reasons,
+    }
+
+@router.get("/admin/homerooms", response_model=List[HomeroomAssignRead], dependencies=[Depends(role_required("admin"))])
+def list_homerooms(school_year: Optional[int] = None, db: Session = Depends(get_db)):
+    y = school_year or _this_year()
+    rows = (
+        db.query(HomeroomAssignment.school_year, HomeroomAssignment.grade, HomeroomAssignment.class_no,
+                 HomeroomAssignment.teacher_user_id, User.username, User.full_name)
+        .join(User, User.id == HomeroomAssignment.teacher_user_id)
+        .filter(HomeroomAssignment.school_year == y)
+        .order_by(HomeroomAssignment.grade, HomeroomAssignment.class_no)
+        .all()
+    )
+    return [HomeroomAssignRead(**r._mapping) for r in rows]
+
+@router.put("/admin/homerooms", dependencies=[Depends(role_required("admin"))])
+def bulk_assign_homerooms(
+    payload: List[HomeroomAssignIn],
+    overwrite: bool = Query(False, description="다른 교사가 가진 학반도 덮어쓰기"),
+    db: Session = Depends(get_db),
+):
+    """
+    담임 일괄 배정 (JSON)
+    """
+    return _assign_homerooms(db, payload, overwrite, {})
+
+@router.post("/admin/homerooms/upload", dependencies=[Depends(role_required("admin"))])
+def upload_homerooms(
+    file: UploadFile = File(...),
+    overwrite: bool = Query(False, description="다른 교사가 가진 학반도 덮어쓰기"),
+    db: Session = Depends(get_db),
+):
+    """
+    담임 일괄 배정 (xlsx/csv). 헤더: 학년도, 학년, 반, 교사아이디
+    """
+    _, rows = read_table(file, expected=HOMEROOM_HEADERS)
+    items: list[HomeroomAssignIn] = []
+    skipped_reasons: dict[str, str] = {}
+    for r, row in rows:
+        try:
+            items.append(HomeroomAssignIn(
+                school_year=_safe_int(cell(row, 0)), grade=_safe_int(cell(row, 1)),
+                class_no=_safe_int(cell(row, 2)), username=_safe_str(cell(row, 3)) or "",
+            ))
+        except ValidationError:
+            skipped_reasons[f"ROW{r}"] = "학년도/학년/반/교사아이디 누락 또는 범위 오류"
+    return _assign_homerooms(db, items, overwrite, skipped_reasons)
@@ -0,0 +1,130 @@
+# score_bulk.py
+# 중간/기말 성적 일괄 업서트 공용 로직
+# - 학생/과목 존재성은 IN 쿼리 1회씩으로 검증
+# - 쓰기는 INSERT ... ON CONFLICT(student_id, subject_id, year, term) DO UPDATE 한 문장(executemany)
+# - 같은 트랜잭션에서 학기 성적(semester_scores) 증분 갱신
+
+from __future__ import annotations
+
+from typing import Any, Iterable, List, Optional, Tuple, Type
+
+from fastapi import UploadFile
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models import Student, Subject
+from score_stats import invalidate as invalidate_stats
+from achievement import refresh_semester_scores
+from routers.homeroom_upload import _safe_int, _safe_str
+from tabular import read_table, cell
+
+# 파일 업로드 헤더(영문 컬럼명). student_id, score 외에는 폼 기본값으로 대체 가능
+SCORE_HEADERS = ["student_id", "subject_id", "year", "term", "score", "comment"]
+
+
+def _validate_row(data: dict) -> None:
+    for k in ("student_id", "subject_id", "year", "term", "score"):
+        if data.get(k) is None:
+            raise ValueError(f"{k} 누락/숫자 아님")
+    if data["term"] not in (1, 2):
+        raise ValueError("term은 1 또는 2")
+    if not (0 <= data["score"] <= 100):
+        raise ValueError("score는 0~100")
+
+
+def parse_score_file(
+    file: UploadFile,
+    subject_id: Optional[int] = None,
+    year: Optional[int] = None,
+    term: Optional[int] = None,
+) -> Tuple[List[Tuple[str, dict]], dict[str, str]]:
+    """
+    xlsx/CSV → [(행키, 레코드)] 와 스킵 사유
+    - 헤더는 이름으로 찾음(순서 무관). 없는 컬럼은 폼 기본값(subject_id/year/term) 사용
+    """
+    header, rows = read_table(file)
+    idx = {h: i for i, h in enumerate(header) if h in SCORE_HEADERS}
+    if "student_id" not in idx or "score" not in idx:
+        raise ValueError("헤더에 student_id, score 컬럼이 필요합니다.")
+
+    parsed: List[Tuple[str, dict]] = []
+    skipped_reasons: dict[str, str] = {}
+    for r, row in rows:
+        key = f"ROW{r}"
+        try:
+            data = {
+                "student_id": _safe_int(cell(row, idx.get("student_id"))),
+                "subject_id": _safe_int(cell(row, idx.get("subject_id"))) or subject_id,
+                "year": _safe_int(cell(row, idx.get("year"))) or year,
+                "term": _safe_int(cell(row, idx.get("term"))) or term,
+                "score": _safe_int(cell(row, idx.get("score"))),
+                "comment": _safe_str(cell(row, idx.get("comment"))),
+            }
+            _validate_row(data)
+            parsed.append((key, data))
+        except ValueError as ve:
+            skipped_reasons[key] = str(ve)
+    return parsed, skipped_reasons
+
+
+def bulk_upsert_scores(
+    db: Session,
+    model: Type[Any],
+    items: Iterable[Tuple[str, dict]],
+    skipped_reasons: Optional[dict[str, str]] = None,
+) -> dict:
+    """
+    (행키, 레코드) 목록을 score 모델(MidtermScore/FinalScore)에 일괄 업서트
+    - 존재하지 않는 학생/과목 행은 스킵 사유와 함께 제외
+    - 반환: {"upserted": n, "skipped": [...], "skipped_reasons": {...}}
+    """
+    items = list(items)
+    skipped_reasons = dict(skipped_reasons or {})
+
+    student_ids = {d["student_id"] for _, d in items}
+    subject_ids = {d["subject_id"] for _, d in items}
+    known_students = set(db.scalars(select(Student.id).where(Student.id.in_(student_ids)))) if student_ids else set()
+    known_subjects = set(db.scalars(select(Subject.id).where(Subject.id.in_(subject_ids)))) if subject_ids else set()
+
+    values: List[dict] = []
+    for key, d in items:
+        if d["student_id"] not in known_students:
+            skipped_reasons[key] = "학생이 존재하지 않습니다."
+            continue
+        if d["subject_id"] not in known_subjects:
+            skipped_reasons[key] = "과목이 존재하지 않습니다."
+            continue
+        values.append({
+            "student_id": d["student_id"],
+            "subject_id": d["subject_id"],
+            "year": d["year"],
+            "term": d["term"],
+            "score": d["score"],
+            "comment": d.get("comment"),
+        })
+
+    if values:
+        stmt = sqlite_insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[model.student_id, model.subject_id, model.year, model.term],
+            set_={"score": stmt.excluded.score, "comment": stmt.excluded.comment},
+        )
+        db.execute(stmt, values)
+
+        # 학기 성적(파생 테이블) 증분 갱신: (연도, 학기)별로 닿은 학생/과목만
+        scopes: dict[tuple, tuple[set, set]] = {}
+        for v in values:
+            st, sj = scopes.setdefault((v["year"], v["term"]), (set(), set()))
+            st.add(v["student_id"]); sj.add(v["subject_id"])
+        for (year, term), (st, sj) in scopes.items():
+            refresh_semester_scores(db, year, term, student_ids=st, subject_ids=sj)
+    db.commit()
+    if values:
+        invalidate_stats(model.__tablename__)
+
+    return {
+        "upserted": len(values),
+        "skipped": list(skipped_reasons.keys()),
+        "skipped_reasons": skipped_reasons,
+    }
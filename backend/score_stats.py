@@ -0,0 +1,204 @@
+# score_stats.py
+# 중간/기말 성적 통계 엔진 (학급/학년 단위)
+# - 점수 컬럼을 한 번만 읽어 NumPy로 평균/표준편차/석차(동석차)/백분위/Z점수/9등급 계산
+# - 학년/반은 그 학년도의 학적(student_years) 기준, 기록이 없으면 students 의 현재 값
+# - 결과는 (시험종류, 조건) 키로 메모리 캐시
+#     해당 시험 성적 업서트 → 그 시험 캐시만 무효화
+#     학생 등록/수정, 명단 업로드, 학년도 전환 → 전체 무효화 (invalidate())
+#   무효화할 때마다 세대 번호를 올리고, 계산 도중 세대가 바뀌었으면 (옛 데이터일 수 있으므로) 캐시에 넣지 않음
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Type
+
+import numpy as np
+from pydantic import BaseModel
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from models import Student, StudentYear
+
+# 9등급 누적 비율(%) 기준: 1등급 4%, 2등급 11%, ... 9등급 100%
+GRADE_CUTOFFS = np.array([4, 11, 23, 40, 60, 77, 89, 96, 100], dtype=float)
+
+_cache: Dict[tuple, dict] = {}
+_lock = threading.Lock()
+_generation: Dict[Optional[str], int] = {}  # 무효화 세대: 시험 종류별, None = 전체 무효화
+
+
+# ---------- Pydantic ----------
+class LevelCutoff(BaseModel):
+    level: int                  # 1~9
+    count: int
+    min_score: Optional[float]  # 해당 등급 최저점(인원 없으면 None)
+
+class StudentStat(BaseModel):
+    student_id: int
+    name: str
+    class_no: int
+    number: int
+    score: float        # 단일 과목: 점수 / 전체 과목: 총점
+    subjects: int       # 반영 과목 수
+    rank: int           # 동점자는 같은 석차(최상위 석차)
+    percentile: float   # 100 - 석차백분율(중간석차 기준)
+    z_score: float
+    level: int          # 9등급
+
+class ScoreStatsRead(BaseModel):
+    year: int
+    term: int
+    subject_id: Optional[int]
+    grade: Optional[int]
+    class_no: Optional[int]
+    count: int
+    mean: float
+    stdev: float
+    max: Optional[float]
+    min: Optional[float]
+    cutoffs: List[LevelCutoff]
+    students: List[StudentStat]
+
+
+# ---------- 캐시 ----------
+def invalidate(kind: Optional[str] = None) -> None:
+    """
+    kind(=성적 테이블명)에 해당하는 통계 캐시 삭제. kind 없으면 전부 (학적 변경 시, 커밋 이후)
+    """
+    with _lock:
+        _generation[kind] = _generation.get(kind, 0) + 1
+        if kind is None:
+            _cache.clear()
+            return
+        for k in [k for k in _cache if k[0] == kind]:
+            del _cache[k]
+
+
+def _current_generation(kind: str) -> tuple:
+    return _generation.get(None, 0), _generation.get(kind, 0)
+
+
+# ---------- 계산 ----------
+def rank_stats(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    values(높을수록 상위)에 대해 석차/백분위/Z점수/등급을 벡터 연산으로 계산
+    - rank: 나보다 높은 점수 인원 + 1
+    - 등급/백분위는 동석차 인원을 반영한 중간석차 기준 (rank + (동점자수-1)/2)
+    """
+    n = values.size
+    asc = np.sort(values)
+    left = np.searchsorted(asc, values, side="left")
+    right = np.searchsorted(asc, values, side="right")
+    rank = n - right + 1
+    ties = right - left
+    mid_rank = rank + (ties - 1) / 2.0
+    rank_pct = mid_rank / n * 100.0
+
+    std = values.std()
+    z = (values - values.mean()) / std if std > 0 else np.zeros(n)
+    level = np.searchsorted(GRADE_CUTOFFS, rank_pct, side="left") + 1
+    return {
+        "rank": rank,
+        "percentile": np.round(100.0 - rank_pct, 2),
+        "z": np.round(z, 3),
+        "level": np.minimum(level, 9),
+    }
+
+
+def score_statistics(
+    db: Session,
+    model: Type[Any],
+    year: int,
+    term: int,
+    subject_id: Optional[int] = None,
+    grade: Optional[int] = None,
+    class_no: Optional[int] = None,
+) -> dict:
+    """
+    model(MidtermScore/FinalScore)의 통계
+    - subject_id 지정: 해당 과목 점수 기준
+    - subject_id 없음: 학생별 전 과목 총점 기준
+    """
+    key = (model.__tablename__, year, term, subject_id, grade, class_no)
+    with _lock:
+        hit = _cache.get(key)
+        generation = _current_generation(key[0])
+    if hit is not None:
+        return hit
+
+    # 그 학년도의 학년/반/번호 (전환 전 기록이 있으면 기록, 없으면 현재 값)
+    grade_col = func.coalesce(StudentYear.grade, Student.grade)
+    class_col = func.coalesce(StudentYear.class_no, Student.class_no)
+    number_col = func.coalesce(StudentYear.number, Student.number)
+    q = (select(model.student_id, model.score, Student.name, class_col, number_col)
+         .join(Student, Student.id == model.student_id)
+         .outerjoin(StudentYear, and_(StudentYear.student_id == model.student_id,
+                                      StudentYear.school_year == year))
+         .where(model.year == year, model.term == term))
+    if subject_id is not None:
+        q = q.where(model.subject_id == subject_id)
+    if grade is not None:
+        q = q.where(grade_col == grade)
+    if class_no is not None:
+        q = q.where(class_col == class_no)
+    rows = db.execute(q).all()
+
+    result: dict = {
+        "year": year, "term": term, "subject_id": subject_id,
+        "grade": grade, "class_no": class_no,
+        "count": 0, "mean": 0.0, "stdev": 0.0, "max": None, "min": None,
+        "cutoffs": [{"level": i + 1, "count": 0, "min_score": None} for i in range(9)],
+        "students": [],
+    }
+    if rows:
+        sids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        scores = np.fromiter((r[1] for r in rows), dtype=float, count=len(rows))
+        # 학생별 합산 (단일 과목이면 학생당 1행이라 그대로)
+        uniq, inv = np.unique(sids, return_inverse=True)
+        totals = np.bincount(inv, weights=scores)
+        counts = np.bincount(inv)
+        first = np.zeros(uniq.size, dtype=np.int64)
+        first[inv[::-1]] = np.arange(len(rows))[::-1]
+
+        st = rank_stats(totals)
+        levels = st["level"]
+        cutoffs = []
+        for lv in range(1, 10):
+            mask = levels == lv
+            cutoffs.append({
+                "level": lv,
+                "count": int(mask.sum()),
+                "min_score": float(totals[mask].min()) if mask.any() else None,
+            })
+
+        order = np.lexsort((uniq, st["rank"]))
+        students = []
+        for i in order:
+            r = rows[first[i]]
+            students.append({
+                "student_id": int(uniq[i]),
+                "name": r[2],
+                "class_no": r[3],
+                "number": r[4],
+                "score": float(totals[i]),
+                "subjects": int(counts[i]),
+                "rank": int(st["rank"][i]),
+                "percentile": float(st["percentile"][i]),
+                "z_score": float(st["z"][i]),
+                "level": int(levels[i]),
+            })
+
+        result.update({
+            "count": int(uniq.size),
+            "mean": round(float(totals.mean()), 2),
+            "stdev": round(float(totals.std()), 2),
+            "max": float(totals.max()),
+            "min": float(totals.min()),
+            "cutoffs": cutoffs,
+            "students": students,
+        })
+
+    with _lock:
+        if _current_generation(key[0]) == generation:
+            _cache[key] = result
+    return result
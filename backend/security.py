@@ -64,11 +64,18 @@ def decrypt_text(cipher: Optional[str]) -> Optional[str]:
         # 과거 평문 데이터가 섞여있을 수 있으니 안전 복호화
         return cipher
 
+# (키 문자열, Fernet) — 같은 키면 인스턴스 재사용 (키 파싱/서명키 분리 비용 절약)
+_secret_fernet: Optional[tuple[str, Fernet]] = None
+
 def _get_fernet() -> Fernet:
+    global _secret_fernet
     key = os.environ.get("ENCRYPTION_KEY")
     if not key:
         raise RuntimeError("ENCRYPTION_KEY 가 .env에 설정되어 있어야 합니다 (Fernet base64 key).")
-    return Fernet(key)
+    cached = _secret_fernet
+    if cached is None or cached[0] != key:
+        cached = _secret_fernet = (key, Fernet(key))
+    return cached[1]
 
 def encrypt_secret(plain: str) -> str:
     if plain is None or plain == "":
@@ -0,0 +1,150 @@
+# tabular.py
+# 업로드된 xlsx/CSV 파일을 "헤더 + 값 튜플 스트림" 형태로 읽는 공용 유틸
+# - xlsx: openpyxl read_only 모드 (행 단위 스트리밍)
+# - csv : csv 모듈 스트리밍, utf-8-sig → cp949 순으로 인코딩 판별
+
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import re
+from typing import Any, Iterator, Tuple, List
+
+from fastapi import HTTPException, UploadFile
+from openpyxl import load_workbook
+
+XLSX_EXTS = (".xlsx",)
+CSV_EXTS = (".csv",)
+
+# 인코딩 판별: 첫 비ASCII 바이트부터 이만큼만 utf-8 로 디코딩해 봄 (파일 전체를 디코딩하지 않음)
+_SNIFF_BYTES = 64 * 1024
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+
+
+def table_kind(filename: str | None) -> str:
+    """
+    파일명 확장자로 'xlsx' | 'csv' 판별 (그 외는 400)
+    """
+    name = (filename or "").lower()
+    if name.endswith(XLSX_EXTS):
+        return "xlsx"
+    if name.endswith(CSV_EXTS):
+        return "csv"
+    raise HTTPException(status_code=400, detail="xlsx 또는 csv 파일을 업로드하세요.")
+
+
+def _detect_csv_encoding(fp) -> str:
+    """
+    utf-8(BOM 포함) / cp949 판별
+    - 앞부분이 전부 ASCII 면 두 인코딩 모두 같은 결과라 판별할 수 없으므로, 첫 비ASCII 바이트가
+      나오는 위치까지 건너뛰어 그곳부터 판별 (헤더/숫자만 있고 한글이 뒤에 처음 나오는 파일 대응)
+    """
+    try:
+        first = fp.read(_SNIFF_BYTES)
+        if first.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        chunk = first
+        while chunk:
+            m = _NON_ASCII.search(chunk)
+            if m:
+                window = chunk[m.start():]
+                window += fp.read(_SNIFF_BYTES - len(window))
+                break
+            chunk = fp.read(_SNIFF_BYTES)
+        else:
+            return "utf-8"   # 전부 ASCII
+    finally:
+        fp.seek(0)
+    try:
+        window.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # 판별 구간 끝에서 멀티바이트 문자가 잘린 경우는 utf-8로 간주 (파일 끝이면 잘린 게 아님)
+        if len(window) == _SNIFF_BYTES and e.start >= len(window) - 3:
+            return "utf-8"
+    return "cp949"
+
+
+def _iter_csv(fp) -> Iterator[Tuple[Any, ...]]:
+    encoding = _detect_csv_encoding(fp)
+    text = io.TextIOWrapper(fp, encoding=encoding, newline="")
+    try:
+        for row in csv.reader(text):
+            yield tuple(row)
+    except UnicodeDecodeError:
+        # 판별 구간 뒤에서 다른 인코딩이 섞인 파일
+        raise HTTPException(status_code=400, detail="CSV 인코딩(utf-8/cp949)을 확인하세요")
+    finally:
+        # UploadFile의 원본 파일 객체는 FastAPI가 닫으므로 분리만 해 둠
+        text.detach()
+
+
+def _iter_xlsx(fp) -> Iterator[Tuple[Any, ...]]:
+    try:
+        wb = load_workbook(fp, read_only=True, data_only=True)
+    except Exception:
+        raise HTTPException(status_code=400, detail="엑셀을 읽을 수 없습니다.")
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+
+def iter_table(fp, kind: str) -> Iterator[Tuple[Any, ...]]:
+    """
+    바이너리 파일 객체에서 행(튜플)을 하나씩 생성. 첫 행은 헤더.
+    """
+    if kind == "xlsx":
+        return _iter_xlsx(fp)
+    return _iter_csv(fp)
+
+
+def read_table(file: UploadFile, expected: List[str] | None = None,
+               ) -> Tuple[List[str], Iterator[Tuple[int, Tuple[Any, ...]]]]:
+    """
+    업로드 파일을 (헤더, (행번호, 값튜플) 이터레이터)로 반환
+    - 행번호는 엑셀 기준(헤더=1, 데이터=2부터)
+    - expected 가 주어지면 왼쪽부터 같은 순서인지 검증 (불일치 시 400)
+    - 완전히 빈 행은 건너뜀
+    """
+    return open_table(file.file, file.filename, expected)
+
+
+def open_table(fp, filename: str | None, expected: List[str] | None = None,
+               ) -> Tuple[List[str], Iterator[Tuple[int, Tuple[Any, ...]]]]:
+    """
+    read_table 과 같되 임의의 바이너리 파일 객체(스풀 파일 등)에서 읽음
+    """
+    kind = table_kind(filename)
+    rows = iter_table(fp, kind)
+    try:
+        first = next(rows)
+    except StopIteration:
+        raise HTTPException(status_code=400, detail="빈 파일입니다.")
+    header = [str(v if v is not None else "").strip() for v in first]
+
+    if expected is not None:
+        if header[:len(expected)] != expected:
+            raise HTTPException(
+                status_code=400,
+                detail=f"헤더가 일치하지 않습니다. 기대 순서: {', '.join(expected)}",
+            )
+
+    def _body() -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+        for r, row in enumerate(rows, start=2):
+            if not any(cell not in (None, "", " ") for cell in row):
+                continue
+            yield r, row
+
+    return header, _body()
+
+
+def cell(row: Tuple[Any, ...], idx: int | None) -> Any:
+    """
+    짧은 행(뒤쪽 빈 칸이 잘린 CSV 등)에서도 안전하게 값 꺼내기
+    """
+    if idx is None or idx >= len(row):
+        return None
+    return row[idx]
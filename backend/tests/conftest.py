@@ -0,0 +1,76 @@
+# tests/conftest.py
+# 테스트 공통 준비
+# - 임시 디렉터리의 SQLite 파일 사용 (DATABASE_URL 은 앱 모듈 import 전에 지정해야 함)
+# - 테스트마다 스키마를 지우고 앱 기동(lifespan)으로 다시 생성 → 테스트끼리 데이터 공유 없음
+# - 인증은 로그인 대신 토큰 직접 발급 (bcrypt 비용 생략)
+# 실행: backend 디렉터리에서 python -m pytest -q
+
+import os
+import sys
+import tempfile
+
+from cryptography.fernet import Fernet
+
+_TMP = tempfile.mkdtemp(prefix="teacherdiary-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ["IMPORT_SPOOL_DIR"] = os.path.join(_TMP, "spool")
+os.environ["AI_CACHE_PATH"] = os.path.join(_TMP, "ai_cache.db")
+os.environ["PROFILE_DIR"] = os.path.join(_TMP, "profiles")
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import homeroom_index
+import main
+import score_stats
+from database import Base, SessionLocal, engine
+from models import Teacher, User
+from security import create_access_token
+
+
+@pytest.fixture
+def client():
+    Base.metadata.drop_all(bind=engine)
+    homeroom_index.invalidate()
+    score_stats.invalidate()
+    with TestClient(main.app) as c:
+        yield c
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def auth(user: User) -> dict:
+    """
+    user 로 로그인한 것과 같은 Authorization 헤더
+    """
+    return {"Authorization": "Bearer " + create_access_token(user.username, {"role": user.role})}
+
+
+@pytest.fixture
+def admin(db) -> User:
+    return db.query(User).filter(User.username == "admin").one()
+
+
+@pytest.fixture
+def make_teacher(db):
+    """
+    교사 계정 + 교사 프로필(teachers) 생성기
+    """
+    def _make(username: str) -> User:
+        t = Teacher(name=f"{username} 교사")
+        db.add(t); db.flush()
+        u = User(username=username, email=f"{username}@example.com", full_name=t.name,
+                 hashed_password="-", role="teacher", is_active=True, teacher_id=t.id,
+                 password_change_required=False)
+        db.add(u); db.commit()
+        return u
+    return _make
@@ -0,0 +1,55 @@
+import pytest
+
+import routers.auth
+from conftest import auth
+from models import Student, Teacher, User
+
+
+@pytest.fixture(autouse=True)
+def _fast_hash(monkeypatch):
+    # bcrypt 는 행마다 수백 ms → 업로드 로직만 검증
+    monkeypatch.setattr(routers.auth, "hash_password", lambda plain: "hashed:" + plain)
+
+
+def _upload(client, headers, lines):
+    body = "username,password,full_name,role\n" + "".join(l + "\n" for l in lines)
+    return client.post("/auth/admin/bulk_users_simple", headers=headers,
+                       files={"file": ("users.csv", body.encode("utf-8"))})
+
+
+def test_creates_updates_and_links(client, db, admin):
+    db.add(Student(id=1001, student_no="1001", name="홍학생", grade=1, class_no=1, number=1, gender="M"))
+    db.add(User(username="t02", email="t02@local", hashed_password="-", role="teacher"))
+    db.commit()
+
+    r = _upload(client, auth(admin), ["t01,Temp!234,김교사,teacher", "t02,Temp!234,이교사,teacher",
+                                      "s1001,Std!234,홍학생,student", "s9999,Std!234,없는학생,student",
+                                      "x,,빈비번,teacher"])
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["created"] == ["t01", "s1001", "s9999"]
+    assert body["updated"] == ["t02"]
+    assert body["skipped"] == ["x"]
+
+    db.expire_all()
+    users = {u.username: u for u in db.query(User)}
+    teachers = {t.name: t.id for t in db.query(Teacher)}
+    assert users["t01"].teacher_id == teachers["김교사"]
+    assert users["t02"].teacher_id == teachers["이교사"]
+    assert users["t02"].hashed_password == "hashed:Temp!234"
+    assert users["s1001"].student_id == 1001
+    assert users["s9999"].student_id is None
+
+
+def test_duplicate_username_in_file_is_rejected(client, db, admin):
+    r = _upload(client, auth(admin), ["t01,First!234,김교사,teacher", "t01,Second!234,박교사,teacher"])
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["created"] == ["t01"]
+    assert body["updated"] == []
+    assert "중복" in body["skipped_reasons"]["t01"]
+
+    db.expire_all()
+    u = db.query(User).filter(User.username == "t01").one()
+    assert u.full_name == "김교사"
+    assert u.hashed_password == "hashed:First!234"
@@ -0,0 +1,118 @@
+import json
+import time
+from datetime import date, datetime, timedelta
+
+import httpx
+import pytest
+
+import ai_client
+from conftest import auth
+from models import CounselLog, Student
+
+STUB_BASE = "http://ai-stub.test"
+
+
+class StubProvider:
+    """
+    Gemini generateContent 흉내: 본문 첫 줄 표시로 응답을 고름
+    - [FAIL] → 400 (재시도 없이 실패)
+    - [BUSY] → 첫 호출만 429 + Retry-After: 0, 재시도는 성공
+    """
+    def __init__(self):
+        self.calls: list[tuple[float, str]] = []   # (시각, 프롬프트)
+        self.busy_seen = False
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        assert str(request.url).startswith(STUB_BASE + "/v1beta/models/")
+        assert request.headers["x-goog-api-key"] == "stub-key-1234"
+        prompt = json.loads(request.content)["contents"][0]["parts"][0]["text"]
+        self.calls.append((time.monotonic(), prompt))
+        if "[FAIL]" in prompt:
+            return httpx.Response(400, json={"error": {"message": "bad request"}})
+        if "[BUSY]" in prompt and not self.busy_seen:
+            self.busy_seen = True
+            return httpx.Response(429, headers={"Retry-After": "0"}, json={"error": {}})
+        title = prompt.split("[제목] ", 1)[1].split("\n", 1)[0]
+        return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": f"요약-{title}"}]}}]})
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    provider = StubProvider()
+    monkeypatch.setattr(ai_client, "GEMINI_API_BASE", STUB_BASE)
+    monkeypatch.setattr(ai_client, "new_client",
+                        lambda: httpx.AsyncClient(transport=httpx.MockTransport(provider)))
+    return provider
+
+
+def _seed(db):
+    db.add(Student(id=1, student_no="1", name="학생1", grade=1, class_no=1, number=1, gender="M"))
+    db.add(Student(id=2, student_no="2", name="학생2", grade=1, class_no=2, number=1, gender="F"))
+    past = datetime.utcnow() - timedelta(days=1)
+    logs = {
+        "new1": CounselLog(student_id=1, date=date(2025, 3, 2), title="new1", content="첫 상담"),
+        "new2": CounselLog(student_id=1, date=date(2025, 3, 3), title="new2", content="두 번째"),
+        "busy": CounselLog(student_id=1, date=date(2025, 3, 4), title="busy", content="[BUSY] 상담"),
+        "fail": CounselLog(student_id=1, date=date(2025, 3, 5), title="fail", content="[FAIL] 상담"),
+        "stale": CounselLog(student_id=1, date=date(2025, 3, 6), title="stale", content="수정된 상담",
+                            summary="예전 요약", summarized_at=past - timedelta(hours=1), updated_at=past),
+        "manual": CounselLog(student_id=1, date=date(2025, 3, 7), title="manual", content="직접 요약",
+                             summary="교사가 쓴 요약"),
+        "other": CounselLog(student_id=2, date=date(2025, 3, 8), title="other", content="다른 반"),
+    }
+    db.add_all(logs.values())
+    db.commit()
+    return {k: v.id for k, v in logs.items()}
+
+
+def _wait(client, headers, job_id, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"작업이 끝나지 않음: {job}")
+
+
+def test_summary_job_against_stub_provider(client, db, admin, stub):
+    ids = _seed(db)
+    h = auth(admin)
+    r = client.post("/settings/me/ai-key", json={"provider": "gemini", "api_key": "stub-key-1234"}, headers=h)
+    assert r.status_code == 200
+
+    started = datetime.utcnow().replace(microsecond=0)
+    r = client.post("/jobs/counsel-summary", headers=h,
+                    json={"grade": 1, "class_no": 1, "concurrency": 2, "rate_per_sec": 10})
+    assert r.status_code == 200, r.text
+    job = _wait(client, h, r.json()["id"])
+
+    assert job["status"] == "done", job
+    assert job["total"] == 5 and job["processed"] == 5
+    assert job["updated"] == 4
+    assert list(job["skipped_reasons"]) == [f"LOG{ids['fail']}"]
+    assert job["skipped_reasons"][f"LOG{ids['fail']}"].startswith("Gemini 오류")
+
+    db.expire_all()
+    rows = {k: db.get(CounselLog, v) for k, v in ids.items()}
+    for k in ("new1", "new2", "busy", "stale"):
+        assert rows[k].summary == f"요약-{k}"
+        assert rows[k].summarized_at >= started
+        assert rows[k].updated_at == rows[k].summarized_at   # 다음 실행에서 '낡은 요약'으로 보이지 않음
+    assert rows["fail"].summary is None and rows["fail"].summarized_at is None
+    assert rows["manual"].summary == "교사가 쓴 요약" and rows["manual"].summarized_at is None
+    assert rows["other"].summary is None
+
+    # 429 는 재시도되어 성공, 대상 5건 + 재시도 1건 호출
+    prompts = [p for _, p in stub.calls]
+    assert len(prompts) == 6
+    assert sum("[BUSY]" in p for p in prompts) == 2
+    # 속도 제한: 초당 10건, 버스트 2 → 첫 시도 5건의 시작이 최소 (5-2)/10 초에 걸쳐 분산
+    first_tries = sorted({p: t for t, p in reversed(stub.calls)}.values())
+    assert first_tries[-1] - first_tries[0] >= 0.25
+
+    # 다시 실행하면 실패했던 1건만 대상
+    r = client.post("/jobs/counsel-summary", headers=h,
+                    json={"grade": 1, "class_no": 1, "rate_per_sec": 50})
+    job = _wait(client, h, r.json()["id"])
+    assert job["total"] == 1 and job["updated"] == 0
@@ -0,0 +1,36 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+import main
+from conftest import auth
+from database import get_db
+
+
+@pytest.fixture
+def failing_db(client):
+    def _install(message: str):
+        def _get_db():
+            raise OperationalError("SELECT 1", {}, Exception(message))
+            yield  # pragma: no cover
+        main.app.dependency_overrides[get_db] = _get_db
+    yield _install
+    main.app.dependency_overrides.pop(get_db, None)
+
+
+def test_database_locked_is_503_with_retry_after(client, admin, failing_db):
+    failing_db("database is locked")
+    r = client.get("/core/students", headers=auth(admin))
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+    assert r.json() == {"detail": "database is locked"}
+
+
+def test_other_operational_errors_use_default_500_path(client, admin, failing_db):
+    failing_db("no such table: students")
+    # 기본 경로로 전파 → 서버가 traceback 로그, 클라이언트는 500
+    with pytest.raises(OperationalError, match="no such table"):
+        client.get("/core/students", headers=auth(admin))
+
+    r = TestClient(main.app, raise_server_exceptions=False).get("/core/students", headers=auth(admin))
+    assert r.status_code == 500
@@ -0,0 +1,54 @@
+from conftest import auth
+from models import HomeroomAssignment
+
+YEAR = 2026
+
+
+def _assign(client, headers, items, overwrite=False):
+    r = client.put("/settings/admin/homerooms", headers=headers, params={"overwrite": overwrite},
+                   json=[{"school_year": YEAR, "grade": g, "class_no": c, "username": u} for g, c, u in items])
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _state(db) -> dict:
+    db.expire_all()
+    return {(h.grade, h.class_no): h.teacher_user_id
+            for h in db.query(HomeroomAssignment).filter(HomeroomAssignment.school_year == YEAR)}
+
+
+def _setup(db, make_teacher):
+    a, b, c = make_teacher("ta"), make_teacher("tb"), make_teacher("tc")
+    db.add_all([HomeroomAssignment(school_year=YEAR, grade=1, class_no=1, teacher_user_id=a.id),
+                HomeroomAssignment(school_year=YEAR, grade=1, class_no=2, teacher_user_id=c.id)])
+    db.commit()
+    return a, b, c
+
+
+def test_skipped_move_does_not_strand_displaced_teacher(client, db, admin, make_teacher):
+    a, b, c = _setup(db, make_teacher)
+    # B 가 A 의 1-1 을 받으려면 A 의 1-2 이동이 필요하지만, 1-2 는 C 가 가지고 있어 스킵됨
+    body = _assign(client, auth(admin), [(1, 1, "tb"), (1, 2, "ta")])
+
+    assert body["updated"] == [] and body["released"] == []
+    assert sorted(body["skipped"]) == [f"{YEAR}-1-1", f"{YEAR}-1-2"]
+    assert "이동이 스킵" in body["skipped_reasons"][f"{YEAR}-1-1"]
+    assert _state(db) == {(1, 1): a.id, (1, 2): c.id}
+
+
+def test_swap_between_teachers_is_allowed(client, db, admin, make_teacher):
+    a, b, c = _setup(db, make_teacher)
+    body = _assign(client, auth(admin), [(1, 1, "tc"), (1, 2, "ta")])
+
+    assert sorted(body["updated"]) == [f"{YEAR}-1-1", f"{YEAR}-1-2"]
+    assert body["skipped"] == []
+    assert _state(db) == {(1, 1): c.id, (1, 2): a.id}
+
+
+def test_chain_move_into_free_class(client, db, admin, make_teacher):
+    a, b, c = _setup(db, make_teacher)
+    # A → 1-3(빈 반), B → A 가 비운 1-1
+    body = _assign(client, auth(admin), [(1, 1, "tb"), (1, 3, "ta")])
+
+    assert body["created"] == [f"{YEAR}-1-3"] and body["updated"] == [f"{YEAR}-1-1"]
+    assert _state(db) == {(1, 1): b.id, (1, 2): c.id, (1, 3): a.id}
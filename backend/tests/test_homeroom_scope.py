@@ -0,0 +1,91 @@
+import csv
+import io
+import tempfile
+from datetime import datetime
+
+import pytest
+from openpyxl import Workbook
+
+from conftest import auth
+from models import HomeroomAssignment, Student
+from routers.homeroom_upload import EXPECTED_HEADERS
+
+THIS_YEAR = datetime.now().year
+
+
+def _seed(db, teacher):
+    # 지난 두 해와 올해 각각 다른 학반 담임
+    for year, grade, class_no in ((THIS_YEAR - 2, 1, 1), (THIS_YEAR - 1, 3, 1), (THIS_YEAR, 2, 1)):
+        db.add(HomeroomAssignment(school_year=year, grade=grade, class_no=class_no,
+                                  teacher_user_id=teacher.id))
+    for sid, grade in ((101, 1), (301, 3), (201, 2)):
+        db.add(Student(id=sid, student_no=str(sid), name=f"학생{sid}", grade=grade, class_no=1,
+                       number=1, gender="F", phone="010-0000-0000", address="주소",
+                       homeroom_teacher_id=99))
+    db.commit()
+
+
+def _roster_csv(rows) -> bytes:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(EXPECTED_HEADERS)
+    w.writerows(rows)
+    return buf.getvalue().encode("utf-8-sig")
+
+
+def test_teacher_export_is_limited_to_this_years_homeroom(client, db, make_teacher):
+    teacher = make_teacher("t001")
+    _seed(db, teacher)
+
+    r = client.get("/homeroom/students/export.csv", headers=auth(teacher))
+    assert r.status_code == 200, r.text
+    rows = list(csv.reader(io.StringIO(r.content.decode("utf-8-sig"))))
+    assert rows[0] == EXPECTED_HEADERS
+    assert [row[4] for row in rows[1:]] == ["201"]
+
+    r = client.get("/homeroom/students/export.csv", params={"grade": 3, "class_no": 1},
+                   headers=auth(teacher))
+    assert r.status_code == 403
+
+
+def test_teacher_upload_cannot_claim_past_years_class(client, db, make_teacher):
+    teacher = make_teacher("t001")
+    _seed(db, teacher)
+
+    body = _roster_csv([
+        [3, 1, 1, "학생301", 301, "여", None, None, None, None, None, None, None],
+        [2, 1, 1, "학생201", 201, "여", None, None, None, None, None, None, None],
+    ])
+    r = client.post("/homeroom/students/upload-csv", headers=auth(teacher),
+                    files={"file": ("roster.csv", body)})
+    assert r.status_code == 200, r.text
+    result = r.json()
+    assert result["updated"] == ["201"]
+    assert result["skipped"] == ["ROW2"]
+
+    db.expire_all()
+    assert db.get(Student, 301).homeroom_teacher_id == 99
+    assert db.get(Student, 201).homeroom_teacher_id == teacher.teacher_id
+
+
+def test_xlsx_export_removes_temp_file(client, db, make_teacher, tmp_path, monkeypatch):
+    teacher = make_teacher("t001")
+    _seed(db, teacher)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    r = client.get("/homeroom/students/export.xlsx", headers=auth(teacher))
+    assert r.status_code == 200, r.text
+    assert r.content[:2] == b"PK"
+    assert list(tmp_path.iterdir()) == []
+
+    # 저장 중 실패해도 임시 파일을 남기지 않음 (파일을 쓴 뒤 실패한 상황)
+    real_save = Workbook.save
+
+    def _broken_save(self, path):
+        real_save(self, path)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(Workbook, "save", _broken_save)
+    with pytest.raises(OSError):
+        client.get("/homeroom/students/export.xlsx", headers=auth(teacher))
+    assert list(tmp_path.iterdir()) == []
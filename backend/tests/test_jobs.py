@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+from conftest import auth
+from models import Job
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    seen = []
+    monkeypatch.setitem(jobs._handlers, "test_noop", lambda db, job, progress: seen.append(job.id))
+    return seen
+
+
+def _job(db, job_id, status, heartbeat_at=None):
+    db.add(Job(id=job_id, kind="test_noop", status=status, user_id=1,
+               started_at=heartbeat_at, heartbeat_at=heartbeat_at))
+    db.commit()
+
+
+def test_run_claims_only_queued_jobs(client, db, admin, calls):
+    _job(db, "q", "queued")
+    _job(db, "r", "running", datetime.utcnow())
+    jobs.run("q")
+    jobs.run("q")   # 중복 예약: 이미 완료
+    jobs.run("r")   # 다른 워커가 처리 중
+    assert calls == ["q"]
+    db.expire_all()
+    assert db.get(Job, "q").status == "done"
+    assert db.get(Job, "r").status == "running"
+
+
+def test_resume_pending_leaves_live_running_jobs(client, db, admin, calls, monkeypatch):
+    submitted, scheduled = [], []
+
+    class _Executor:
+        def submit(self, fn, job_id):
+            submitted.append(job_id)
+
+    monkeypatch.setattr(jobs, "_get_executor", _Executor)
+    monkeypatch.setattr(jobs, "_schedule_stale_check", lambda: scheduled.append(True))
+    old = datetime.utcnow() - timedelta(seconds=jobs.STALE_SECONDS + 60)
+    _job(db, "queued", "queued")
+    _job(db, "live", "running", datetime.utcnow())
+    _job(db, "dead", "running", old)
+
+    assert jobs.resume_pending(db) == 2
+    assert sorted(submitted) == ["dead", "queued"]
+    db.expire_all()
+    assert db.get(Job, "live").status == "running"
+    assert db.get(Job, "dead").status == "queued"
+    assert scheduled   # 살아 있어 보이는 작업은 나중에 다시 확인
+
+
+def test_ws_sends_final_state(client, db, admin, calls):
+    _job(db, "q", "queued")
+    jobs.run("q")
+    with client.websocket_connect(f"/jobs/q/ws?token={auth(admin)['Authorization'][7:]}") as ws:
+        assert ws.receive_json()["status"] == "done"
@@ -0,0 +1,45 @@
+from conftest import auth
+from models import MockConversion, MockExam, MockExamSubjectScore, Student
+
+
+def _seed(db):
+    # 같은 2025년 6월 회차를 1학년(50~70점)과 3학년(80~100점)이 따로 응시
+    exams = {}
+    for sid, grade, score in ((1, 1, 50), (2, 1, 60), (3, 1, 70), (4, 3, 80), (5, 3, 90), (6, 3, 100)):
+        db.add(Student(id=sid, student_no=str(sid), name=f"학생{sid}", grade=grade,
+                       class_no=1, number=sid, gender="M"))
+        exam = MockExam(student_id=sid, year=2025, round=6, name="학평")
+        db.add(exam); db.flush()
+        db.add(MockExamSubjectScore(exam_id=exam.id, subject_code="KOR", score=score))
+        exams[sid] = exam.id
+    db.commit()
+    return exams
+
+
+def test_derive_is_scoped_by_grade(client, db, admin):
+    exams = _seed(db)
+    r = client.post("/grades/mock/conversions/derive", params={"year": 2025, "round": 6},
+                    headers=auth(admin))
+    assert r.status_code == 200, r.text
+    assert sorted(r.json()["tables"]) == ["2025-6-1-KOR", "2025-6-3-KOR"]
+
+    # 1학년 최고점은 1학년 분포 기준으로 평균(100)보다 높아야 함 (합쳐서 산출하면 평균 아래)
+    body = client.get(f"/grades/mock/summary/{exams[3]}").json()
+    assert body["converted"]["KOR"]["standard_score"] > 100
+    body = client.get(f"/grades/mock/summary/{exams[4]}").json()
+    assert body["converted"]["KOR"]["standard_score"] < 100
+
+
+def test_reloads_tables_changed_by_another_worker(client, db, admin):
+    exams = _seed(db)
+    assert client.get("/grades/mock/conversions").json() == []
+
+    # 다른 워커가 저장한 것처럼 메모리를 거치지 않고 DB에만 기록
+    db.add(MockConversion(year=2025, round=6, school_grade=0, subject_code="KOR", raw_score=50,
+                          standard_score=77, percentile=10, grade=8))
+    db.commit()
+    tables = client.get("/grades/mock/conversions").json()
+    assert [(t["school_grade"], t["subject_code"]) for t in tables] == [(0, "KOR")]
+    # 학년 표가 없으면 학년 공통 표로 조회
+    body = client.get(f"/grades/mock/summary/{exams[1]}").json()
+    assert body["converted"]["KOR"]["standard_score"] == 77
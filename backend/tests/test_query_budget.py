@@ -0,0 +1,71 @@
+# 자주 쓰는 쓰기 엔드포인트의 쿼리 예산 (querycheck.capture)
+# - count: 요청 1건의 SQL 수 상한, max_repeat: 같은 정규화 문장 반복 상한 (행마다 쿼리가 돌아오면 실패)
+import csv
+import io
+
+import querycheck
+import routers.auth
+from conftest import auth
+from models import Student, Subject
+from routers.homeroom_upload import EXPECTED_HEADERS
+
+ROWS = 30
+
+
+def _report(reports, endpoint):
+    matched = [r for r in reports if r.endpoint == endpoint]
+    assert len(matched) == 1, [r.endpoint for r in reports]
+    return matched[0]
+
+
+def test_bulk_users_simple_budget(client, db, admin, monkeypatch):
+    monkeypatch.setattr(routers.auth, "hash_password", lambda plain: "hashed")
+    db.add_all(Student(id=1000 + i, student_no=str(1000 + i), name=f"학생{i}", grade=1, class_no=1,
+                       number=i + 1, gender="M") for i in range(ROWS))
+    db.commit()
+    lines = [f"t{i:02d},pw,교사{i},teacher" for i in range(ROWS // 2)]
+    lines += [f"s{1000 + i},pw,학생{i},student" for i in range(ROWS // 2)]
+    body = "username,password,full_name,role\n" + "\n".join(lines) + "\n"
+
+    with querycheck.capture() as reports:
+        r = client.post("/auth/admin/bulk_users_simple", headers=auth(admin),
+                        files={"file": ("users.csv", body.encode("utf-8"))})
+    assert r.status_code == 200, r.text
+    assert len(r.json()["created"]) == ROWS
+
+    rep = _report(reports, "POST /auth/admin/bulk_users_simple")
+    assert rep.max_repeat <= 1, rep.repeats
+    assert rep.count <= 10
+
+
+def test_roster_upload_budget(client, db, admin):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(EXPECTED_HEADERS)
+    for i in range(ROWS):
+        w.writerow([1, 1 + i % 3, i + 1, f"학생{i}", 2000 + i, "남", None, None, None, None, None, None, None])
+
+    with querycheck.capture() as reports:
+        r = client.post("/homeroom/students/upload-csv", headers=auth(admin),
+                        files={"file": ("roster.csv", buf.getvalue().encode("utf-8"))})
+    assert r.status_code == 200, r.text
+    assert len(r.json()["created"]) == ROWS
+
+    rep = _report(reports, "POST /homeroom/students/upload-csv")
+    assert rep.max_repeat <= 1, rep.repeats
+    assert rep.count <= 5
+
+
+def test_enrollment_create_budget(client, db, admin):
+    db.add(Student(id=1, student_no="1", name="학생", grade=1, class_no=1, number=1, gender="M"))
+    db.add(Subject(name="국어"))
+    db.commit()
+
+    with querycheck.capture() as reports:
+        r = client.post("/core/enrollments", headers=auth(admin),
+                        json={"student_id": 1, "subject_id": 1, "year": 2025, "term": 1})
+    assert r.status_code == 200, r.text
+
+    rep = _report(reports, "POST /core/enrollments")
+    assert rep.max_repeat <= 1, rep.repeats
+    assert rep.count <= 7
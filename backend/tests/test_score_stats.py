@@ -0,0 +1,80 @@
+import score_stats
+from conftest import auth
+from models import MidtermScore, Student, Subject
+
+
+def _seed(db):
+    sub = Subject(name="국어")
+    db.add(sub); db.flush()
+    for sid, class_no, score in ((1, 1, 90), (2, 2, 70), (3, 2, 80)):
+        db.add(Student(id=sid, student_no=str(sid), name=f"학생{sid}", grade=1,
+                       class_no=class_no, number=sid, gender="M"))
+        db.add(MidtermScore(student_id=sid, subject_id=sub.id, year=2025, term=1, score=score))
+    db.commit()
+
+
+def _stats(client, headers, **params):
+    r = client.get("/grades/midterm/stats", params={"year": 2025, "term": 1, **params}, headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_student_update_invalidates_cache(client, db, admin):
+    _seed(db)
+    h = auth(admin)
+    assert _stats(client, h, grade=1, class_no=1)["count"] == 1
+
+    r = client.patch("/core/students/2", json={"class_no": 1}, headers=h)
+    assert r.status_code == 200
+    body = _stats(client, h, grade=1, class_no=1)
+    assert body["count"] == 2
+    assert [s["student_id"] for s in body["students"]] == [1, 2]
+
+
+def test_past_year_uses_grade_of_that_year_after_rollover(client, db, admin):
+    _seed(db)
+    h = auth(admin)
+    assert _stats(client, h, grade=1)["count"] == 3
+
+    r = client.post("/auth/admin/rollover", json={"from_year": 2025, "dry_run": False}, headers=h)
+    assert r.status_code == 200, r.text
+    assert db.get(Student, 1).grade == 2
+
+    # 2025학년도 통계는 그 해 학년(1학년) 기준 그대로
+    body = _stats(client, h, grade=1)
+    assert body["count"] == 3
+    assert {s["class_no"] for s in body["students"]} == {1, 2}
+    assert _stats(client, h, grade=2)["count"] == 0
+
+    # 학기 성적 재계산/조회의 학년·반 필터도 그 해 기준
+    r = client.post("/grades/semester/compute", params={"year": 2025, "term": 1, "grade": 1}, headers=h)
+    assert r.json()["refreshed"] == 3
+    params = {"year": 2025, "term": 1, "grade": 1}
+    assert len(client.get("/grades/semester", params=params).json()) == 3
+    assert len(client.get("/grades/semester", params={**params, "class_no": 2}).json()) == 2
+    assert client.get("/grades/semester", params={**params, "grade": 2}).json() == []
+
+
+def test_stats_require_teacher_or_admin(client, db):
+    _seed(db)
+    for kind in ("midterm", "final"):
+        r = client.get(f"/grades/{kind}/stats", params={"year": 2025, "term": 1})
+        assert r.status_code == 401
+
+
+def test_invalidate_during_computation_skips_cache_store(client, db, monkeypatch):
+    _seed(db)
+    real = score_stats.rank_stats
+
+    def _racing(values):
+        # 계산 도중 다른 요청이 성적을 바꾸고 무효화한 상황
+        score_stats.invalidate(MidtermScore.__tablename__)
+        return real(values)
+
+    monkeypatch.setattr(score_stats, "rank_stats", _racing)
+    score_stats.score_statistics(db, MidtermScore, 2025, 1)
+    assert not score_stats._cache
+
+    monkeypatch.setattr(score_stats, "rank_stats", real)
+    score_stats.score_statistics(db, MidtermScore, 2025, 1)
+    assert len(score_stats._cache) == 1
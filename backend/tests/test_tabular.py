@@ -0,0 +1,46 @@
+import io
+
+from conftest import auth
+from models import MidtermScore, Student, Subject
+from tabular import _SNIFF_BYTES, open_table
+
+
+def _big_csv(tail: str, encoding: str) -> bytes:
+    # 판별 구간(_SNIFF_BYTES)을 ASCII 행으로 채운 뒤 마지막에 한글 행
+    lines = ["student_id,subject_id,year,term,score,comment"]
+    while sum(len(l) + 2 for l in lines) <= _SNIFF_BYTES:
+        lines.append("9999,1,2025,1,50,ok")
+    body = ("\r\n".join(lines) + "\r\n").encode("ascii")
+    return body + tail.encode(encoding)
+
+
+def test_cp949_korean_after_sniff_window():
+    data = _big_csv("1,1,2025,1,90,수행평가 우수\r\n", "cp949")
+    assert len(data) > _SNIFF_BYTES
+    header, rows = open_table(io.BytesIO(data), "scores.csv")
+    assert header[0] == "student_id"
+    assert list(rows)[-1][1][-1] == "수행평가 우수"
+
+
+def test_bulk_upload_large_cp949_csv(client, db, admin):
+    sub = Subject(name="국어")
+    db.add(sub); db.flush()
+    db.add(Student(id=1, student_no="1", name="학생1", grade=1, class_no=1, number=1, gender="M"))
+    db.commit()
+
+    data = _big_csv(f"1,{sub.id},2025,1,90,수행평가 우수\r\n", "cp949")
+    r = client.post("/grades/midterm/bulk-upload", headers=auth(admin),
+                    files={"file": ("scores.csv", data, "text/csv")})
+    assert r.status_code == 200, r.text
+    db.expire_all()
+    assert db.query(MidtermScore).filter_by(student_id=1).one().comment == "수행평가 우수"
+
+
+def test_mixed_encoding_is_400(client, admin):
+    data = ("student_id,subject_id,year,term,score,comment\r\n1,1,2025,1,90,좋음\r\n").encode("utf-8")
+    filler = _big_csv("", "ascii").split(b"\r\n", 1)[1]
+    data += filler * 2 + "1,1,2025,1,90,수행평가\r\n".encode("cp949")
+    r = client.post("/grades/midterm/bulk-upload", headers=auth(admin),
+                    files={"file": ("scores.csv", data, "text/csv")})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "CSV 인코딩(utf-8/cp949)을 확인하세요"